@@ -0,0 +1,208 @@
+"""
+/api/score 的准入控制：按优先级排队、分阶段限制并发、队列满时快速拒绝。
+
+评分请求经过两个资源不同的阶段：检索/重排序/本地评分占用 CPU，大模型评分占用供应商的速率配额。
+不加限制时，突发的批量请求会把所有线程压在同一个 SimpleRAG 上，CPU 饱和、触发限流，所有请求一起超时。
+这里为每个阶段设置并发上限，等待者按优先级获得名额（前端交互 interactive 先于批量/API batch，同级先到先得）；
+每个优先级的等待队列有上限，队列已满或排队超时的请求直接拒绝（HTTP 429 + Retry-After），
+让批量调用方退避重试，交互请求的延迟不受批量负载影响。
+
+请求的优先级通过 request_priority 设置在上下文中，service 各阶段用 admission_stage 申请名额。
+"""
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from config import AgentConfig
+
+# 按优先级从高到低
+PRIORITIES = ("interactive", "batch")
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("admission_priority", default="batch")
+
+
+class AdmissionRejected(Exception):
+    """队列已满或排队超时；retry_after_s 为建议的重试等待秒数"""
+
+    def __init__(self, stage: str, priority: str, retry_after_s: int, reason: str):
+        super().__init__(f"系统繁忙（{stage} 阶段{reason}），请 {retry_after_s} 秒后重试")
+        self.stage = stage
+        self.priority = priority
+        self.retry_after_s = retry_after_s
+        self.reason = reason
+
+
+class _StageLimiter:
+    """
+    一个阶段的并发限制：最多 limit 个请求同时执行，其余按优先级排队。
+
+    Args:
+        name: 阶段名称（cpu / llm），用于指标与错误信息
+        limit: 并发上限
+        queue_limits: 优先级 -> 等待队列上限，满时立即拒绝
+        max_wait_s: 排队超过该时间仍未获得名额则拒绝
+    """
+
+    _SAMPLES = 1000  # 每个优先级保留的排队耗时样本数
+
+    def __init__(self, name: str, limit: int, queue_limits: Dict[str, int], max_wait_s: float):
+        self.name = name
+        self.limit = limit
+        self.queue_limits = dict(queue_limits)
+        self.max_wait_s = max_wait_s
+        self._cond = threading.Condition()
+        self._waiting: Dict[str, Deque[object]] = {p: deque() for p in PRIORITIES}
+        self.active = 0
+        self.admitted = {p: 0 for p in PRIORITIES}
+        self.rejected = {p: 0 for p in PRIORITIES}
+        self.timeouts = {p: 0 for p in PRIORITIES}
+        self._waits: Dict[str, Deque[float]] = {p: deque(maxlen=self._SAMPLES) for p in PRIORITIES}
+        self._service_s = 1.0  # 单次占用时长的指数滑动平均，用于估算 Retry-After
+
+    def _head(self) -> Optional[object]:
+        for priority in PRIORITIES:
+            if self._waiting[priority]:
+                return self._waiting[priority][0]
+        return None
+
+    def _retry_after(self) -> int:
+        queued = sum(len(q) for q in self._waiting.values())
+        return max(1, min(60, math.ceil((queued + 1) * self._service_s / self.limit)))
+
+    def acquire(self, priority: str) -> float:
+        """获得名额后返回排队耗时（秒）；队列已满或超时抛出 AdmissionRejected"""
+        start = time.monotonic()
+        with self._cond:
+            if self.active < self.limit and self._head() is None:
+                self.active += 1
+                self.admitted[priority] += 1
+                self._waits[priority].append(0.0)
+                return 0.0
+            queue = self._waiting[priority]
+            if len(queue) >= self.queue_limits[priority]:
+                self.rejected[priority] += 1
+                raise AdmissionRejected(self.name, priority, self._retry_after(), "排队已满")
+            ticket = object()
+            queue.append(ticket)
+            deadline = start + self.max_wait_s
+            while not (self.active < self.limit and self._head() is ticket):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    queue.remove(ticket)
+                    self.timeouts[priority] += 1
+                    self._cond.notify_all()
+                    raise AdmissionRejected(self.name, priority, self._retry_after(), "排队超时")
+                self._cond.wait(remaining)
+            queue.popleft()
+            self.active += 1
+            self.admitted[priority] += 1
+            waited = time.monotonic() - start
+            self._waits[priority].append(waited)
+            # 可能还有空闲名额，唤醒下一个等待者
+            self._cond.notify_all()
+            return waited
+
+    def release(self, held_s: float):
+        with self._cond:
+            self.active -= 1
+            self._service_s = 0.8 * self._service_s + 0.2 * held_s
+            self._cond.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = {}
+            for priority, samples in self._waits.items():
+                ordered = sorted(samples)
+                waits[priority] = {
+                    "p50_ms": ordered[len(ordered) // 2] * 1000 if ordered else None,
+                    "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000 if ordered else None,
+                    "max_ms": ordered[-1] * 1000 if ordered else None,
+                }
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "queued": {p: len(q) for p, q in self._waiting.items()},
+                "queue_limits": dict(self.queue_limits),
+                "admitted": dict(self.admitted),
+                "rejected": dict(self.rejected),
+                "timeouts": dict(self.timeouts),
+                "queue_wait": waits,
+                "avg_service_ms": self._service_s * 1000,
+            }
+
+
+class AdmissionController:
+    """cpu（检索、重排序、本地评分）与 llm（大模型评分）两个阶段的并发限制"""
+
+    def __init__(self, cfg: AgentConfig):
+        queue_limits = {"interactive": cfg.admission_interactive_queue, "batch": cfg.admission_batch_queue}
+        self.stages = {
+            "cpu": _StageLimiter("cpu", cfg.admission_cpu_concurrency, queue_limits, cfg.admission_max_wait_s),
+            "llm": _StageLimiter("llm", cfg.admission_llm_concurrency, queue_limits, cfg.admission_max_wait_s),
+        }
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[float]:
+        """在当前请求的优先级下占用一个阶段名额，yield 排队耗时（秒）"""
+        limiter = self.stages[name]
+        waited = limiter.acquire(_priority.get())
+        start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            limiter.release(time.monotonic() - start)
+
+    def max_blocked(self) -> int:
+        """同时被占用或排队的请求数上限（每个请求都占一个工作线程）"""
+        return sum(s.limit + sum(s.queue_limits.values()) for s in self.stages.values())
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: stage.metrics() for name, stage in self.stages.items()}
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission(cfg: AgentConfig) -> Optional[AdmissionController]:
+    """按配置创建的全局准入控制器；关闭准入控制时返回 None"""
+    global _controller
+    if not cfg.admission_control:
+        return None
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(cfg)
+    return _controller
+
+
+def admission_stage(cfg: AgentConfig, name: str):
+    """service 中包裹一个阶段：未启用准入控制时不做限制"""
+    controller = get_admission(cfg)
+    return controller.stage(name) if controller is not None else nullcontext(0.0)
+
+
+@contextmanager
+def request_priority(priority: str) -> Iterator[None]:
+    """设置当前请求（线程/协程上下文）的优先级"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"未知的优先级: {priority}，可选: {', '.join(PRIORITIES)}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    """当前请求的优先级"""
+    return _priority.get()
+
+
+def admission_metrics() -> Dict[str, Any]:
+    return _controller.metrics() if _controller is not None else {}
+
@@ -1,26 +1,30 @@
+import hmac
 import json
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Any
+from typing import List, Any, Optional
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, RedirectResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
-from config import get_config
-from app.service import score_candidate, score_from_dataset  # 更新导入
+from config import SCORING_MODES, get_config
+from app.admission import AdmissionRejected, get_admission, request_priority
+from app.service import (  # 更新导入
+    get_metrics, get_rag_system, score_candidate, score_next_page, score_result_set, start_warm_up,
+    warm_up_status
+)
+from app.ingestion import DirectoryWatcher, IngestionError, extract_text, get_store, ingest_records
 from app.port_utils import find_free_port
 
-# 新增：导入 Gradio 并挂载
-import gradio as gr
-from app.frontend import build_demo
-
 class ScoreRequest(BaseModel):
     job_title: str = Field(..., description="岗位名称")
     requirements: str = Field("", description="特定要求/偏好")
     top_n: int = Field(3, description="返回前 N 个候选人")
+    scoring_mode: Optional[str] = Field(None, description="评分方式：llm（大模型）或 local（本地快速评分），默认取配置")
 
 
 class ScoreItem(BaseModel):
@@ -33,10 +37,47 @@ class ScoreItem(BaseModel):
     report: dict
     summary_score: float
     raw_resume: str
+    scoring_mode: str = "llm"  # 该候选人实际使用的评分方式（大模型评分失败时降级为 local）
 
 
 class ScoreResponse(BaseModel):
     results: List[ScoreItem]
+    result_set_id: Optional[str] = None  # 服务端结果集，用 GET /api/results/{id}?cursor= 翻页
+    next_cursor: Optional[int] = None  # 下一页的起始位置，没有更多候选人时为 None
+
+
+def _to_response(scored: dict, offset: int = 0) -> ScoreResponse:
+    """service 的评分结果转换为响应模型；offset 为当前页在结果集中的起始位置"""
+    items: List[ScoreItem] = []
+    for idx, result in enumerate(scored["results"], start=offset):
+        summary_score = result["report"]["ordered_scores"][0]["score"] if result["report"]["ordered_scores"] else 0
+        raw_resume = result.get("plan", {}).get("normalized_resume", "")
+        
+        # 获取原始ID和重排序分数
+        original_id = result.get("candidate_info", {}).get("id", idx)
+        rerank_score = result.get("candidate_info", {}).get("rerank_score", 0.0)
+        
+        items.append(
+            ScoreItem(
+                resume_index=idx,
+                original_id=original_id,  # 添加原始ID
+                rerank_score=rerank_score,  # 添加重排序分数
+                plan=result["plan"],
+                parsed_resume=result["parsed_resume"],
+                scores=result["scores"],
+                report=result["report"],
+                summary_score=summary_score,
+                raw_resume=raw_resume,
+                scoring_mode=result.get("scoring_mode", "llm"),
+            )
+        )
+    return ScoreResponse(results=items, result_set_id=scored.get("result_set_id"),
+                         next_cursor=scored.get("next_cursor"))
+
+
+def _too_busy(exc: AdmissionRejected) -> HTTPException:
+    """过载时快速返回 429，Retry-After 为建议的重试等待秒数"""
+    return HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after_s)})
 
 
 def _write_port_file(port: int):
@@ -46,8 +87,30 @@ def _write_port_file(port: int):
 def create_app() -> FastAPI:
     load_dotenv()
     cfg = get_config()
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI):
+        """启动后在后台加载模型与索引并预热，服务本身立即开始监听"""
+        if cfg.warm_up:
+            start_warm_up(cfg)
+        admission = get_admission(cfg)
+        if admission is not None:
+            # 同步端点在线程池中执行，排队的请求和等待合并结果的请求也各占一个线程：
+            # 线程数需容纳全部名额、队列与合并等待者，否则会占满线程池，健康检查等端点也无法响应
+            import anyio.to_thread
+
+            waiters = cfg.coalesce_max_waiters if cfg.coalesce_requests else 0
+            limiter = anyio.to_thread.current_default_thread_limiter()
+            limiter.total_tokens = max(limiter.total_tokens, admission.max_blocked() + waiters + 16)
+        watcher = None
+        if cfg.ingest_watch_dir:
+            watcher = DirectoryWatcher(cfg.ingest_watch_dir, lambda: get_rag_system(cfg), cfg).start()
+        yield
+        if watcher is not None:
+            watcher.stop()
+
     # 移除 root_path="/api"，避免影响Gradio挂载
-    app = FastAPI(title="简历筛选助手 API", version="0.1.0")
+    app = FastAPI(title="简历筛选助手 API", version="0.1.0", lifespan=lifespan)
 
     # 新增：根路径重定向到前端
     @app.get("/")
@@ -59,44 +122,122 @@ def create_app() -> FastAPI:
     def health():
         return {"status": "正常"}  # 修改为中文
 
-    # 修改为同步端点，将路由改为 /api/score 以匹配前端的调用
-    @app.post("/api/score", response_model=ScoreResponse)
-    def score(req: ScoreRequest):
-        if not cfg.api_key:
+    @app.get("/health/live")
+    def health_live():
+        """存活探针：进程能响应即可，不依赖模型是否加载"""
+        return {"status": "正常"}
+
+    @app.get("/health/ready")
+    def health_ready():
+        """就绪探针：预热完成前返回 503，负载均衡据此暂不转发流量"""
+        state = warm_up_status()
+        if not cfg.warm_up:
+            return {"status": "就绪", "warm_up": state}
+        if state["status"] == "ready":
+            # 索引构建失败时评分会退回关键词检索，实例仍可服务，但标记为降级
+            return {"status": "就绪" if state["rag_ready"] else "降级", "warm_up": state}
+        if state["status"] == "failed":
+            return JSONResponse(status_code=503, content={"status": "预热失败", "warm_up": state})
+        return JSONResponse(status_code=503, content={"status": "预热中", "warm_up": state})
+
+    @app.get("/api/config")
+    def config_summary():
+        """当前生效的性能档位与参数"""
+        return cfg.profile_summary()
+
+    @app.get("/api/metrics")
+    def metrics():
+        """运行时指标：预热状态、微批处理的批大小与队列深度"""
+        return get_metrics()
+
+    @app.post("/api/resumes")
+    def upload_resumes(files: List[UploadFile] = File(...), category: str = Form("Unknown")):
+        """上传 PDF/DOCX/TXT 简历：解析、去重后追加到在线索引，无需重启即可被检索到"""
+        rag = get_rag_system(cfg)
+        if rag is None:
+            raise HTTPException(status_code=503, detail="检索索引尚未就绪，请稍后重试。")
+        max_bytes = int(cfg.ingest_max_file_mb * 1024 * 1024)
+
+        def records():
+            for upload in files:
+                data = upload.file.read(max_bytes + 1)
+                if len(data) > max_bytes:
+                    yield {"source": upload.filename, "error": f"文件超过 {cfg.ingest_max_file_mb}MB 限制"}
+                    continue
+                try:
+                    yield {"category": category, "resume": extract_text(upload.filename, data), "source": upload.filename}
+                except IngestionError as e:
+                    yield {"source": upload.filename, "error": str(e)}
+
+        try:
+            return ingest_records(rag, records(), get_store(cfg.ingest_store_path), cfg.ingest_batch_size)
+        except Exception as exc:  # noqa: BLE001
+            raise HTTPException(status_code=500, detail=f"简历入库失败: {exc}") from exc
+
+    def http_priority(frontend_token: Optional[str]) -> str:
+        """HTTP 请求的准入优先级由服务端判定：只有携带正确前端密钥的请求为 interactive，其余都是 batch"""
+        expected = cfg.admission_frontend_token
+        if expected and frontend_token and hmac.compare_digest(frontend_token.encode("utf-8"), expected.encode("utf-8")):
+            return "interactive"
+        return "batch"
+
+    def run_score(req: ScoreRequest, priority: str = "batch") -> ScoreResponse:
+        """校验并执行评分，HTTP 端点与同进程前端共用；priority 由调用方（服务端）决定"""
+        scoring_mode = req.scoring_mode or cfg.scoring_mode
+        if scoring_mode not in SCORING_MODES:
+            raise HTTPException(status_code=400, detail=f"scoring_mode 需为 {' / '.join(SCORING_MODES)} 之一。")
+        if scoring_mode == "llm" and not cfg.api_key:
             raise HTTPException(status_code=400, detail="缺少API密钥。")
+        if not 1 <= req.top_n <= cfg.max_top_n:
+            raise HTTPException(status_code=400, detail=f"top_n 需在 1 到 {cfg.max_top_n} 之间。")
         try:
             # 使用同步函数处理评分
-            ranked = score_from_dataset(req.job_title, req.requirements, req.top_n, cfg)
+            with request_priority(priority):
+                scored = score_result_set(req.job_title, req.requirements, req.top_n, cfg, scoring_mode)
+        except AdmissionRejected as exc:
+            raise _too_busy(exc) from exc
         except Exception as exc:  # noqa: BLE001
             raise HTTPException(status_code=500, detail=f"搜索/评分失败: {exc}") from exc
+        return _to_response(scored)
 
-        items: List[ScoreItem] = []
-        for idx, result in enumerate(ranked):
-            summary_score = result["report"]["ordered_scores"][0]["score"] if result["report"]["ordered_scores"] else 0
-            raw_resume = result.get("plan", {}).get("normalized_resume", "")
-            
-            # 获取原始ID和重排序分数
-            original_id = result.get("candidate_info", {}).get("id", idx)
-            rerank_score = result.get("candidate_info", {}).get("rerank_score", 0.0)
-            
-            items.append(
-                ScoreItem(
-                    resume_index=idx,
-                    original_id=original_id,  # 添加原始ID
-                    rerank_score=rerank_score,  # 添加重排序分数
-                    plan=result["plan"],
-                    parsed_resume=result["parsed_resume"],
-                    scores=result["scores"],
-                    report=result["report"],
-                    summary_score=summary_score,
-                    raw_resume=raw_resume,
-                )
-            )
-        return ScoreResponse(results=items)
+    # 修改为同步端点，将路由改为 /api/score 以匹配前端的调用
+    @app.post("/api/score", response_model=ScoreResponse)
+    def score(req: ScoreRequest, x_frontend_token: Optional[str] = Header(None)):
+        return run_score(req, http_priority(x_frontend_token))
+
+    @app.get("/api/results/{result_set_id}", response_model=ScoreResponse)
+    def result_page(result_set_id: str, cursor: int, page_size: Optional[int] = None,
+                    x_frontend_token: Optional[str] = Header(None)):
+        """
+        结果集翻页：只对 [cursor, cursor + page_size) 的候选人调用大模型评分，page_size 默认与首页相同。
+        结果集只包含首次检索的召回池（约 RAG_TOP_N 到 2×RAG_TOP_N 位候选人），翻完后 next_cursor 为 None
+        """
+        try:
+            with request_priority(http_priority(x_frontend_token)):
+                scored = score_next_page(result_set_id, cursor, page_size, cfg)
+        except AdmissionRejected as exc:
+            raise _too_busy(exc) from exc
+        except KeyError:
+            raise HTTPException(status_code=404, detail="结果集不存在或已过期，请重新评分。")
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except Exception as exc:  # noqa: BLE001
+            raise HTTPException(status_code=500, detail=f"评分失败: {exc}") from exc
+        return _to_response(scored, offset=cursor)
+
+    # 新增：挂载 Gradio 前端，确保路径正确（gradio 导入较慢，仅在启用前端时导入）
+    if cfg.enable_ui:
+        import gradio as gr
+        from app.frontend import build_demo, set_local_backend
 
-    # 新增：挂载 Gradio 前端，确保路径正确
-    gradio_app = build_demo()
-    app = gr.mount_gradio_app(app, gradio_app, path="/gradio")
+        # 前端与后端在同一进程：直接调用评分函数，不再经 HTTP 回环（省去序列化和一次网络往返）
+        set_local_backend(lambda job_title, requirements, top_n, scoring_mode=None: [
+            item.model_dump() for item in
+            run_score(ScoreRequest(job_title=job_title, requirements=requirements, top_n=top_n,
+                                   scoring_mode=scoring_mode), priority="interactive").results
+        ])
+        gradio_app = build_demo()
+        app = gr.mount_gradio_app(app, gradio_app, path="/gradio")
     
     return app
 
@@ -0,0 +1,385 @@
+"""
+离线批量评分：按一个岗位对整个简历库逐份评分（而不是只评检索出的前 N 位）。
+
+流程：
+1. 流式统计岗位技能在全库中的文档频率，作为本地评分的 IDF（只遍历一次，不保留简历文本）；
+2. 按 --chunk-size 行分块读取CSV，进程池并行处理每块：不经检索，交叉编码器直接对（查询, 简历）打分，
+   再用大模型（所有进程合计按 --rate 限速）或本地评分器评分，大模型评分失败的候选人改用本地评分；
+3. 每块完成即追加写入结果CSV，并更新检查点（已完成的块、输出文件长度）。中断后用相同参数重新运行即从断点继续：
+   输出文件先截断到检查点记录的长度，丢弃中断时写了一半的块。
+
+在途的块数不超过进程数的两倍，内存占用与语料规模无关。结果按块完成的顺序写入，结束时打印综合评分最高的候选人。
+
+用法:
+    python -m app.bulk_score --job-title "Java开发工程师" --requirements-file req.txt --out bulk_java.csv
+    python -m app.bulk_score --job-title "Data Scientist" --requirements "Python, 机器学习" --mode local --workers 4
+    python -m app.bulk_score --job-title "Data Scientist" --requirements "Python" --stub --limit 500 --out /tmp/bulk.csv
+"""
+import argparse
+import csv
+import dataclasses
+import hashlib
+import heapq
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import SCORING_MODES, AgentConfig, get_config
+
+OUTPUT_COLUMNS = [
+    "id", "category", "overall_score", "technical_score", "experience_score", "years_experience", "skills",
+    "recommendation", "strengths", "weaknesses", "rerank_score", "scoring_mode",
+]
+
+
+class RateLimiter:
+    """令牌桶限速（线程安全）：平均每秒 rate 次，最多累积 burst 次"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        if rate <= 0:
+            raise ValueError(f"rate 必须为正数: {rate}")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+def _read_chunks(csv_path: str, chunk_size: int, limit: Optional[int] = None) -> Iterator[Tuple[int, List[tuple]]]:
+    """按块读取 (块序号, [(行号, 类别, 简历)])；行号与 SimpleRAG 加载主数据集时的文档ID一致"""
+    import pandas as pd
+
+    read = 0
+    for chunk_index, df in enumerate(pd.read_csv(csv_path, usecols=["Category", "Resume"], chunksize=chunk_size)):
+        if limit is not None and read >= limit:
+            return
+        if limit is not None:
+            df = df.iloc[:limit - read]
+        read += len(df)
+        rows = [(int(idx), str(category) if pd.notna(category) else "Unknown", str(resume))
+                for idx, category, resume in zip(df.index, df["Category"], df["Resume"]) if pd.notna(resume)]
+        yield chunk_index, rows
+
+
+# ---------------- 工作进程 ----------------
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(settings: Dict[str, Any]):
+    """工作进程初始化：加载交叉编码器与评分器；SimpleRAG 的调试输出量很大，工作进程不打印"""
+    sys.stdout = open(os.devnull, "w")
+    from rag_system.llama_rag_system import NoLLM, SimpleRAG
+    from rag_system.local_ranker import LocalRanker
+    from rag_system.requirements_parser import analyze_requirements
+
+    cfg: AgentConfig = settings["cfg"]
+    llm = None
+    if settings["mode"] != "llm":
+        llm = NoLLM()
+    elif settings["stub_latency"] is not None:
+        from benchmarks.stubs import StubChatModel
+        llm = StubChatModel(latency_s=settings["stub_latency"], seed=None)
+    analysis = analyze_requirements(settings["job_title"], settings["requirements"])
+    _worker.update(settings)
+    _worker["analysis"] = analysis
+    _worker["query"] = analysis.query() if analysis.structured else f"{settings['job_title']} {settings['requirements']}"
+    _worker["prompt_requirements"] = analysis.compact() if analysis.structured else settings["requirements"]
+    _worker["rag"] = SimpleRAG(settings["csv"], cfg=cfg, llm=llm, load_index=False) \
+        if settings["mode"] == "llm" or settings["rerank"] else None
+    _worker["ranker"] = LocalRanker.load(cfg.local_ranker_path, idf_table=settings["idf_table"])
+    # 全局限速均分到各工作进程
+    _worker["limiter"] = RateLimiter(settings["rate"] / settings["workers"])
+
+
+def _candidates(rows: List[tuple]) -> List[Dict[str, Any]]:
+    from rag_system.llama_rag_system import SimpleRAG
+    from rag_system.profiles import extract_profile_rules
+    from rag_system.snippets import PassageIndex
+
+    cfg: AgentConfig = _worker["cfg"]
+    passages = PassageIndex() if cfg.use_snippets else None
+    candidates = []
+    for row_id, category, resume in rows:
+        content = SimpleRAG._format_content(category, resume)
+        # 不经检索，没有检索名次；交叉编码器不可用时本地评分以中性的 0.5 作为相关度
+        candidate = {"id": row_id, "category": category, "content": content, "retrieval_score": 0.5}
+        if cfg.use_profiles:
+            # 整库逐份评分时用规则提取档案，与在线入库一致，不依赖预先提取的档案文件
+            candidate["profile"] = extract_profile_rules(resume)
+        if passages is not None:
+            passages.add(row_id, content)
+        candidates.append(candidate)
+    if passages is not None:
+        for candidate in candidates:
+            candidate["snippet"] = passages.snippet(candidate["id"], _worker["query"], max_chars=cfg.snippet_max_chars)
+    return candidates
+
+
+def _score_llm(candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rag, cfg = _worker["rag"], _worker["cfg"]
+    results = []
+    batch_size = _worker["llm_batch"]
+    for offset in range(0, len(candidates), batch_size):
+        _worker["limiter"].acquire()
+        results += rag.score_retrieved(_worker["prompt_requirements"], candidates[offset:offset + batch_size],
+                                       max_input_tokens=cfg.max_input_tokens)
+    failed = [i for i, result in enumerate(results) if result.get("score_failed")]
+    if failed:
+        local = _worker["ranker"].score(_worker["job_title"], _worker["requirements"],
+                                        [results[i]["candidate_info"] for i in failed])
+        for i, result in zip(failed, local):
+            results[i] = result
+    return results
+
+
+def score_chunk(chunk_index: int, rows: List[tuple]) -> Tuple[int, List[Dict[str, Any]], int]:
+    """在工作进程中评分一块简历，返回 (块序号, 结果行, 降级为本地评分的人数)"""
+    candidates = _candidates(rows)
+    if _worker["rerank"] and candidates:
+        scores = _worker["rag"].rerank_scores(_worker["query"], candidates)
+        for candidate, score in zip(candidates, scores or []):
+            candidate["rerank_score"] = score
+    if _worker["mode"] == "llm":
+        results = _score_llm(candidates)
+    else:
+        results = _worker["ranker"].score(_worker["job_title"], _worker["requirements"], candidates)
+
+    rows_out, fallbacks = [], 0
+    for result in results:
+        candidate = result["candidate_info"]
+        scoring_mode = result.get("scoring_mode", "llm")
+        fallbacks += _worker["mode"] == "llm" and scoring_mode == "local"
+        rerank_score = candidate.get("rerank_score")
+        rows_out.append({
+            "id": candidate["id"],
+            "category": candidate["category"],
+            "overall_score": result.get("overall_score", 0),
+            "technical_score": result.get("technical_score", 0),
+            "experience_score": result.get("experience_score", 0),
+            "years_experience": result.get("years_experience", ""),
+            "skills": result.get("skills", ""),
+            "recommendation": result.get("recommendation", ""),
+            "strengths": result.get("strengths", ""),
+            "weaknesses": result.get("weaknesses", ""),
+            "rerank_score": round(rerank_score, 4) if rerank_score is not None else "",
+            "scoring_mode": scoring_mode,
+        })
+    return chunk_index, rows_out, fallbacks
+
+
+# ---------------- 检查点 ----------------
+
+def _signature(args: argparse.Namespace, requirements: str) -> str:
+    """参数签名：数据文件、岗位与评分设置不变时才允许从检查点继续"""
+    stat = Path(args.csv).stat()
+    key = json.dumps([str(Path(args.csv).resolve()), stat.st_size, int(stat.st_mtime), args.job_title, requirements,
+                      args.mode, args.chunk_size, not args.no_rerank, args.limit], ensure_ascii=False)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Checkpoint:
+    """已完成的块与输出文件长度；每块写入结果后原子地替换检查点文件"""
+
+    def __init__(self, path: Path, signature: str):
+        self.path = path
+        self.signature = signature
+        self.done: set = set()
+        self.output_bytes = 0
+        self.rows = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def load(cls, path: Path, signature: str) -> "Checkpoint":
+        checkpoint = cls(path, signature)
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("signature") != signature:
+                raise ValueError(f"检查点 {path} 与本次参数不一致，请使用 --restart 重新开始或换一个输出路径")
+            checkpoint.done = set(data["done_chunks"])
+            checkpoint.output_bytes = data["output_bytes"]
+            checkpoint.rows = data["rows"]
+            checkpoint.fallbacks = data.get("fallbacks", 0)
+        return checkpoint
+
+    def save(self):
+        data = {"signature": self.signature, "done_chunks": sorted(self.done), "output_bytes": self.output_bytes,
+                "rows": self.rows, "fallbacks": self.fallbacks, "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _open_output(path: Path, checkpoint: Checkpoint):
+    """以追加方式打开输出文件，先截断到检查点记录的长度（丢弃中断时写了一半的块）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "a+", encoding="utf-8", newline="")
+    f.truncate(checkpoint.output_bytes)
+    f.seek(checkpoint.output_bytes)
+    writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS)
+    if checkpoint.output_bytes == 0:
+        writer.writeheader()
+        f.flush()
+        checkpoint.output_bytes = f.tell()
+    return f, writer
+
+
+def top_candidates(path: Path, n: int) -> List[Dict[str, str]]:
+    """流式读取结果，返回综合评分最高的 n 位"""
+    with open(path, encoding="utf-8", newline="") as f:
+        return heapq.nlargest(n, csv.DictReader(f), key=lambda row: float(row["overall_score"] or 0))
+
+
+def to_parquet(csv_path: Path, parquet_path: Path, chunk_size: int = 50000):
+    """结果CSV按块转换为 Parquet（需要 pyarrow），内存占用与结果规模无关"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ValueError("写出 Parquet 需要安装 pyarrow") from e
+    import pandas as pd
+
+    text_columns = {c: str for c in OUTPUT_COLUMNS if c not in ("overall_score", "technical_score", "experience_score")}
+    writer = None
+    try:
+        for df in pd.read_csv(csv_path, dtype=text_columns, keep_default_na=False, chunksize=chunk_size):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(str(parquet_path), table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    cfg = get_config()
+    parser = argparse.ArgumentParser(description="离线批量评分：按一个岗位对整个简历库逐份评分，支持断点续跑")
+    parser.add_argument("--csv", default="rag_system/UpdatedResumeDataSet.csv", help="简历数据CSV（Category, Resume）")
+    parser.add_argument("--job-title", required=True, help="岗位名称")
+    parser.add_argument("--requirements", default="", help="岗位要求")
+    parser.add_argument("--requirements-file", type=Path, help="从文件读取岗位要求（优先于 --requirements）")
+    parser.add_argument("--mode", choices=SCORING_MODES, default=cfg.scoring_mode, help="评分方式，默认取 SCORING_MODE")
+    parser.add_argument("--out", type=Path, required=True, help="结果CSV路径（追加写入）")
+    parser.add_argument("--checkpoint", type=Path, help="检查点路径，默认为 <out>.ckpt.json")
+    parser.add_argument("--restart", action="store_true", help="忽略已有检查点和结果，从头开始")
+    parser.add_argument("--chunk-size", type=int, default=200, help="每块简历数（检查点的粒度）")
+    parser.add_argument("--workers", type=int, default=0, help="工作进程数，0 表示CPU核数")
+    parser.add_argument("--rate", type=float, default=1.0, help="所有进程合计每秒的大模型请求数上限")
+    parser.add_argument("--llm-batch", type=int, default=5, help="每次大模型请求评分的候选人数")
+    parser.add_argument("--no-rerank", action="store_true", help="不使用交叉编码器打分")
+    parser.add_argument("--limit", type=int, help="只评分前 N 行（试跑）")
+    parser.add_argument("--top", type=int, default=10, help="结束时打印综合评分最高的人数")
+    parser.add_argument("--parquet", type=Path, help="完成后把结果另存为 Parquet（需要 pyarrow）")
+    parser.add_argument("--stub", action="store_true", help="使用本地桩模型代替真实大模型（演练流程）")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="桩模型每次请求的延迟（秒）")
+    args = parser.parse_args(argv)
+
+    requirements = args.requirements_file.read_text(encoding="utf-8") if args.requirements_file else args.requirements
+    if args.mode == "llm" and not cfg.api_key and not args.stub:
+        parser.error("缺少API密钥（或使用 --mode local / --stub）")
+    if args.chunk_size <= 0 or args.llm_batch <= 0 or args.rate <= 0:
+        parser.error("--chunk-size、--llm-batch、--rate 必须为正数")
+    if not Path(args.csv).exists():
+        parser.error(f"数据文件不存在: {args.csv}")
+    if args.parquet:
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            parser.error("--parquet 需要安装 pyarrow")
+    workers = args.workers or os.cpu_count() or 1
+    checkpoint_path = args.checkpoint or args.out.with_name(args.out.name + ".ckpt.json")
+    if args.restart:
+        for path in (checkpoint_path, args.out):
+            if path.exists():
+                path.unlink()
+    try:
+        checkpoint = Checkpoint.load(checkpoint_path, _signature(args, requirements))
+    except ValueError as e:
+        parser.error(str(e))
+    if checkpoint.done and not args.out.exists():
+        parser.error(f"检查点 {checkpoint_path} 记录了进度，但结果文件 {args.out} 不存在，请使用 --restart")
+
+    from rag_system.local_ranker import skill_idf_table
+    from rag_system.requirements_parser import analyze_requirements
+
+    start = time.perf_counter()
+    skills = list(analyze_requirements(args.job_title, requirements).skill_weights)
+    idf_table = skill_idf_table((f"{category}\n{resume}" for _, rows in _read_chunks(args.csv, 2000, args.limit)
+                                 for _, category, resume in rows), skills)
+    print(f"[bulk] 岗位技能: {', '.join(skills) or '无'}；技能文档频率统计用时 {time.perf_counter() - start:.1f}s")
+    if checkpoint.done:
+        print(f"[bulk] 从检查点继续: 已完成 {len(checkpoint.done)} 块，{checkpoint.rows} 位候选人")
+
+    settings = {
+        "cfg": dataclasses.replace(cfg, search_shards=[]), "csv": args.csv, "job_title": args.job_title, "requirements": requirements, "mode": args.mode,
+        "rerank": not args.no_rerank, "llm_batch": args.llm_batch, "rate": args.rate, "workers": workers,
+        "idf_table": idf_table, "stub_latency": args.stub_latency if args.stub else None,
+    }
+    f, writer = _open_output(args.out, checkpoint)
+    scored_now, run_start = 0, time.perf_counter()
+
+    def finish(future):
+        nonlocal scored_now
+        chunk_index, rows, fallbacks = future.result()
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+        checkpoint.output_bytes = f.tell()
+        checkpoint.done.add(chunk_index)
+        checkpoint.rows += len(rows)
+        checkpoint.fallbacks += fallbacks
+        checkpoint.save()
+        scored_now += len(rows)
+        elapsed = time.perf_counter() - run_start
+        print(f"[bulk] 块 {chunk_index} 完成；累计 {checkpoint.rows} 位，本次 {scored_now / elapsed:.1f} 位/秒", flush=True)
+
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(settings,)) as pool:
+            in_flight = set()
+            for chunk_index, rows in _read_chunks(args.csv, args.chunk_size, args.limit):
+                if chunk_index in checkpoint.done or not rows:
+                    continue
+                # 在途块数有上限，读取速度不会超过评分速度
+                while len(in_flight) >= workers * 2:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        finish(future)
+                in_flight.add(pool.submit(score_chunk, chunk_index, rows))
+            for future in in_flight:
+                finish(future)
+    finally:
+        f.close()
+
+    print(f"[bulk] 完成: {checkpoint.rows} 位候选人（大模型评分失败改用本地评分 {checkpoint.fallbacks} 位），"
+          f"本次用时 {time.perf_counter() - start:.1f}s，结果: {args.out}")
+    for rank, row in enumerate(top_candidates(args.out, args.top), 1):
+        print(f"  {rank:>2}. ID {row['id']:>6}  {row['category']:<24} 综合 {row['overall_score']:>4}  {row['skills'][:60]}")
+    if args.parquet:
+        to_parquet(args.out, args.parquet)
+        print(f"[bulk] Parquet 已写入 {args.parquet}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
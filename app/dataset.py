@@ -11,11 +11,7 @@ import json
 # 添加rag_system目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rag_system'))
 
-# 修复导入路径
-try:
-    from rag_system.llama_rag_system import SimpleRAG
-except ImportError:
-    SimpleRAG = None
+from rag_system.dedup import content_hash
 
 # 使用项目中的CSV文件或远程数据源
 DATASET_PATH = Path("rag_system/UpdatedResumeDataSet.csv")
@@ -36,6 +32,8 @@ def init_rag_system():
     
     try:
         if DATASET_PATH.exists():
+            # SimpleRAG 依赖较重，首次使用时才导入
+            from rag_system.llama_rag_system import SimpleRAG
             rag_system = SimpleRAG(str(DATASET_PATH))
             print("RAG系统初始化成功")
         else:
@@ -65,13 +63,20 @@ def load_dataset() -> List[Tuple[str, str]]:
     if not DATASET_PATH.exists():
         return []
     rows: List[Tuple[str, str]] = []
+    seen = set()
     with DATASET_PATH.open("r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             cat = (row.get("Category") or "").strip()
             res = (row.get("Resume") or "").strip()
-            if res:
-                rows.append((cat, res))
+            if not res:
+                continue
+            # 跳过完全重复的简历（数据集中存在大量重复行）
+            digest = content_hash(f"{cat}\n{res}")
+            if digest in seen:
+                continue
+            seen.add(digest)
+            rows.append((cat, res))
     return rows
 
 def _tokenize(text: str) -> List[str]:
@@ -5,6 +5,10 @@ import os
 from pathlib import Path
 from loguru import logger
 import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from config import get_config
 
 # 导入find_free_port函数
 from app.port_utils import find_free_port
@@ -33,6 +37,25 @@ def get_backend_url():
 
 BACKEND_URL = get_backend_url()
 
+# 同进程评分函数 (job_title, requirements, top_n, scoring_mode) -> 结果列表；
+# 前端挂载在后端进程内时由 create_app 注册，未注册（独立部署的前端）时经 HTTP 调用 BACKEND_URL
+_local_backend: Optional[Callable[..., List[Dict[str, Any]]]] = None
+
+# 界面上的评分方式选项 -> 请求中的 scoring_mode
+SCORING_MODE_CHOICES = {"大模型评分": "llm", "本地快速评分": "local"}
+
+
+def set_local_backend(fn: Optional[Callable[..., List[Dict[str, Any]]]]):
+    """注册同进程评分函数，传 None 恢复 HTTP 调用"""
+    global _local_backend
+    _local_backend = fn
+
+
+@lru_cache(maxsize=1)
+def get_request_timeout() -> float:
+    """调用后端的超时时间，取自性能档位配置（REQUEST_TIMEOUT 可单独覆盖）"""
+    return get_config().request_timeout
+
 # 预设岗位模板
 JOB_TEMPLATES = {
     "": "请选择或输入自定义岗位...",
@@ -66,15 +89,125 @@ def update_requirements(job_title):
     """根据选择的岗位模板更新岗位要求"""
     return JOB_TEMPLATES.get(job_title, "")
 
-def call_backend(job_title: str, requirements: str, top_n: int = 10) -> str:
-    """调用后端API获取评分结果"""
+def render_results(results: List[Dict[str, Any]]) -> str:
+    """将评分结果渲染为HTML表格"""
+    # 检查是否有结果
+    if not results:
+        return """
+        <div style="text-align: center; padding: 40px; color: #666;">
+            <h3>🔍 未找到匹配的候选人</h3>
+            <p>请尝试调整岗位要求或增加候选人数量</p>
+        </div>
+        """
+    
+    # 构建展示用的HTML表格（添加鼠标悬停效果）
+    html = """
+    <div style="font-family: Arial, sans-serif;">
+        <h2 style="color: #333; margin-bottom: 12px;">候选人评分结果</h2>
+        <div style="width: 100%; overflow-x: auto;">
+            <table border="1" cellpadding="8" cellspacing="0" style="border-collapse: collapse; min-width: 960px; width: 100%; table-layout: fixed;">
+                <thead>
+                    <tr style="background-color: #f2f2f2;">
+                        <th style="text-align: left; width: 80px;">人才编号</th>
+                        <th style="text-align: left; width: 80px;">得分</th>
+                        <th style="text-align: left; width: 100px;">经验年限</th>
+                        <th style="text-align: left; width: 200px;">核心技能</th>
+                        <th style="text-align: left;">评分理由</th>
+                    </tr>
+                </thead>
+                <tbody>
+    """
+    
+    for idx, result in enumerate(results):
+        # 解析结果
+        # 人才编号使用原始ID（若缺失则退回序号）
+        resume_index = result.get("original_id", result.get("resume_index", idx))
+        summary_score = float(result.get("summary_score", result.get("rerank_score", 0) or 0))
+        parsed_resume = result.get("parsed_resume", {}) or {}
+        report = result.get("report", {}) or {}
+        
+        # 提取经验年限
+        years_experience = parsed_resume.get("years_experience", "未知")
+        
+        # 提取核心技能（最多显示5个）
+        skills = parsed_resume.get("skills", [])
+        if isinstance(skills, str):
+            skills_list = [s.strip() for s in skills.split(",") if s.strip()]
+        elif isinstance(skills, list):
+            skills_list = [str(s).strip() for s in skills if str(s).strip()]
+        else:
+            skills_list = []
+        core_skills = ", ".join(skills_list[:5]) if skills_list else "未知"
+        
+        # 提取评分理由
+        ordered_scores = report.get("ordered_scores", [])
+        reasoning = "无评分理由"
+        if ordered_scores and isinstance(ordered_scores, list):
+            first_score = ordered_scores[0] if ordered_scores else {}
+            if isinstance(first_score, dict):
+                reasoning = first_score.get("reasoning", "无评分理由")
+        
+        # 格式化技能和理由，避免HTML问题
+        core_skills = core_skills.replace("<", "&lt;").replace(">", "&gt;")
+        reasoning = reasoning.replace("<", "&lt;").replace(">", "&gt;")
+        
+        # 添加鼠标悬停效果的行样式
+        html += f"""
+            <tr>
+                <td>{resume_index}</td>
+                <td>{summary_score:.2f}</td>
+                <td>{years_experience}</td>
+                <td>{core_skills}</td>
+                <td>{reasoning}</td>
+            </tr>
+        """
+
+    html += """
+                </tbody>
+            </table>
+        </div>
+    </div>
+    """
+    
+    logger.info("成功生成结果表格")
+    return html
+
+
+def _call_local_backend(job_title: str, requirements: str, top_n: int, scoring_mode: Optional[str] = None) -> str:
+    """同进程调用评分函数；校验失败等错误与 HTTP 调用时的提示保持一致"""
+    logger.info(f"同进程评分: {job_title}, top_n={top_n}, scoring_mode={scoring_mode}")
+    try:
+        results = _local_backend(job_title, requirements, top_n, scoring_mode)
+    except Exception as e:  # noqa: BLE001
+        status_code = getattr(e, "status_code", None)
+        if status_code is None:
+            raise
+        error_msg = f"后端返回错误: {status_code} - {getattr(e, 'detail', e)}"
+        logger.error(error_msg)
+        return f"<p style='color: red;'>错误: {error_msg}</p>"
+    logger.info(f"收到 {len(results)} 个评分结果")
+    return render_results(results)
+
+
+def call_backend(job_title: str, requirements: str, top_n: int = 10, scoring_mode: Optional[str] = None) -> str:
+    """调用后端获取评分结果：与后端同进程时直接调用，否则经 HTTP 调用后端API"""
+    scoring_mode = SCORING_MODE_CHOICES.get(scoring_mode, scoring_mode)
     try:
+        if _local_backend is not None:
+            return _call_local_backend(job_title, requirements, int(top_n), scoring_mode)
+
         # 准备请求数据
         payload = {
             "job_title": job_title,
             "requirements": requirements,
-            "top_n": top_n
+            "top_n": top_n,
+            "scoring_mode": scoring_mode,
         }
+        headers = {"Content-Type": "application/json"}
+        # 独立部署时凭共享密钥让后端把前端请求识别为 interactive，优先于批量 API 请求获得评分名额
+        frontend_token = get_config().admission_frontend_token
+        if frontend_token:
+            headers["X-Frontend-Token"] = frontend_token
         
         # 构造完整的API URL
         api_url = f"{BACKEND_URL}/api/score"
@@ -86,8 +219,8 @@ def call_backend(job_title: str, requirements: str, top_n: int = 10) -> str:
         response = requests.post(
             api_url,
             json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=300  # 5分钟超时
+            headers=headers,
+            timeout=get_request_timeout()
         )
         
         logger.info(f"后端响应状态码: {response.status_code}")
@@ -106,86 +239,7 @@ def call_backend(job_title: str, requirements: str, top_n: int = 10) -> str:
 
             logger.info(f"收到 {len(results)} 个评分结果")
             
-            # 检查是否有结果
-            if not results:
-                return """
-                <div style="text-align: center; padding: 40px; color: #666;">
-                    <h3>🔍 未找到匹配的候选人</h3>
-                    <p>请尝试调整岗位要求或增加候选人数量</p>
-                </div>
-                """
-            
-            # 构建展示用的HTML表格（添加鼠标悬停效果）
-            html = """
-            <div style="font-family: Arial, sans-serif;">
-                <h2 style="color: #333; margin-bottom: 12px;">候选人评分结果</h2>
-                <div style="width: 100%; overflow-x: auto;">
-                    <table border="1" cellpadding="8" cellspacing="0" style="border-collapse: collapse; min-width: 960px; width: 100%; table-layout: fixed;">
-                        <thead>
-                            <tr style="background-color: #f2f2f2;">
-                                <th style="text-align: left; width: 80px;">人才编号</th>
-                                <th style="text-align: left; width: 80px;">得分</th>
-                                <th style="text-align: left; width: 100px;">经验年限</th>
-                                <th style="text-align: left; width: 200px;">核心技能</th>
-                                <th style="text-align: left;">评分理由</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-            """
-            
-            for idx, result in enumerate(results):
-                # 解析结果
-                # 人才编号使用原始ID（若缺失则退回序号）
-                resume_index = result.get("original_id", result.get("resume_index", idx))
-                summary_score = float(result.get("summary_score", result.get("rerank_score", 0) or 0))
-                parsed_resume = result.get("parsed_resume", {}) or {}
-                report = result.get("report", {}) or {}
-                
-                # 提取经验年限
-                years_experience = parsed_resume.get("years_experience", "未知")
-                
-                # 提取核心技能（最多显示5个）
-                skills = parsed_resume.get("skills", [])
-                if isinstance(skills, str):
-                    skills_list = [s.strip() for s in skills.split(",") if s.strip()]
-                elif isinstance(skills, list):
-                    skills_list = [str(s).strip() for s in skills if str(s).strip()]
-                else:
-                    skills_list = []
-                core_skills = ", ".join(skills_list[:5]) if skills_list else "未知"
-                
-                # 提取评分理由
-                ordered_scores = report.get("ordered_scores", [])
-                reasoning = "无评分理由"
-                if ordered_scores and isinstance(ordered_scores, list):
-                    first_score = ordered_scores[0] if ordered_scores else {}
-                    if isinstance(first_score, dict):
-                        reasoning = first_score.get("reasoning", "无评分理由")
-                
-                # 格式化技能和理由，避免HTML问题
-                core_skills = core_skills.replace("<", "&lt;").replace(">", "&gt;")
-                reasoning = reasoning.replace("<", "&lt;").replace(">", "&gt;")
-                
-                # 添加鼠标悬停效果的行样式
-                html += f"""
-                    <tr>
-                        <td>{resume_index}</td>
-                        <td>{summary_score:.2f}</td>
-                        <td>{years_experience}</td>
-                        <td>{core_skills}</td>
-                        <td>{reasoning}</td>
-                    </tr>
-                """
-
-            html += """
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-            """
-            
-            logger.info("成功生成结果表格")
-            return html
+            return render_results(results)
         else:
             error_msg = f"后端返回错误: {response.status_code} - {response.text}"
             logger.error(error_msg)
@@ -347,6 +401,12 @@ def build_demo():
                         step=1,
                         label="返回候选人数量"
                     )
+
+                    scoring_mode = gr.Radio(
+                        choices=list(SCORING_MODE_CHOICES),
+                        value=next(k for k, v in SCORING_MODE_CHOICES.items() if v == get_config().scoring_mode),
+                        label="评分方式（本地快速评分不调用大模型）"
+                    )
                     
                     submit_btn = gr.Button(
                         "🚀 开始筛选", 
@@ -449,7 +509,7 @@ def build_demo():
             outputs=output
         ).then(
             fn=call_backend,
-            inputs=[job_title, requirements, top_n],
+            inputs=[job_title, requirements, top_n, scoring_mode],
             outputs=output
         )
     
@@ -0,0 +1,279 @@
+"""简历文件入库：解析 PDF/DOCX/TXT，分批去重、嵌入后追加到在线索引并写入入库CSV"""
+import argparse
+import csv
+import io
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import AgentConfig, get_config
+
+SUPPORTED_SUFFIXES = (".txt", ".md", ".pdf", ".docx")
+STORE_COLUMNS = ["Category", "Resume", "Source"]
+
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_SPACES_RE = re.compile(r"[ \t]+")  # NFKC 已把全角空格、不换行空格统一为普通空格
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+class IngestionError(ValueError):
+    """文件无法入库：格式不支持、缺少解析库或未提取到文本"""
+
+
+def _decode_text(data: bytes) -> str:
+    for encoding in ("utf-8-sig", "gb18030"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1")
+
+
+def _extract_pdf(data: bytes) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise IngestionError("解析PDF需要安装 pypdf") from e
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _extract_docx(data: bytes) -> str:
+    try:
+        import docx
+    except ImportError as e:
+        raise IngestionError("解析DOCX需要安装 python-docx") from e
+    document = docx.Document(io.BytesIO(data))
+    parts = [paragraph.text for paragraph in document.paragraphs]
+    # 简历中的技能、经历经常写在表格里
+    for table in document.tables:
+        for row in table.rows:
+            parts.append(" | ".join(cell.text for cell in row.cells))
+    return "\n".join(parts)
+
+
+def normalize_resume_text(text: str) -> str:
+    """统一全角/兼容字符，去掉控制字符，压缩空白与空行"""
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _CONTROL_RE.sub(" ", text)
+    lines = [_SPACES_RE.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def extract_text(filename: str, data: bytes) -> str:
+    """按扩展名选择本地解析器，返回规范化后的简历文本"""
+    suffix = Path(filename or "").suffix.lower()
+    if suffix == ".pdf":
+        text = _extract_pdf(data)
+    elif suffix == ".docx":
+        text = _extract_docx(data)
+    elif suffix in (".txt", ".md"):
+        text = _decode_text(data)
+    else:
+        raise IngestionError(f"不支持的文件类型: {suffix or '无扩展名'}（支持 {', '.join(SUPPORTED_SUFFIXES)}）")
+    text = normalize_resume_text(text)
+    if not text:
+        raise IngestionError("未能从文件中提取到文本（扫描版PDF需先做OCR）")
+    return text
+
+
+def extract_file(path: str, category: str) -> Dict[str, Any]:
+    """解析单个文件（在进程池中执行），失败时返回 error 字段而不是抛出异常"""
+    source = Path(path).name
+    try:
+        return {"category": category, "resume": extract_text(path, Path(path).read_bytes()), "source": source}
+    except Exception as e:  # noqa: BLE001 - 单个文件失败不影响整批导入
+        return {"category": category, "source": source, "error": str(e)}
+
+
+def iter_extracted(jobs: Iterable[Tuple[str, str]], workers: int = 1, window: int = 64) -> Iterator[Dict[str, Any]]:
+    """
+    流式解析 (路径, 类别)：workers > 1 时使用进程池，最多 window 个文件同时在途，
+    结果按提交顺序产出，内存占用与文件总数无关。
+    """
+    if workers <= 1:
+        for path, category in jobs:
+            yield extract_file(path, category)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path, category in jobs:
+            pending.append(pool.submit(extract_file, path, category))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class ResumeStore:
+    """入库CSV（Category, Resume, Source），只追加；SimpleRAG 启动时随数据集一起加载"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def append(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            is_new = not self.path.exists() or self.path.stat().st_size == 0
+            with self.path.open("a", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                if is_new:
+                    writer.writerow(STORE_COLUMNS)
+                for record in records:
+                    writer.writerow([record.get("category") or "Unknown", record["resume"], record.get("source", "")])
+
+
+@lru_cache(maxsize=8)
+def get_store(path: str) -> ResumeStore:
+    """同一路径共用一个实例，保证并发追加时串行写文件"""
+    return ResumeStore(path)
+
+
+def ingest_records(rag, records: Iterable[Dict[str, Any]], store: Optional[ResumeStore],
+                   batch_size: int = 256) -> Dict[str, Any]:
+    """
+    按批把解析结果追加到在线索引并落盘。rag 为 None 时（离线批量导入）只写入入库CSV，
+    去重在下次加载时完成。
+    """
+    stats: Dict[str, Any] = {"received": 0, "added": 0, "duplicates": 0, "failed": []}
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        if not batch:
+            return
+        if rag is not None:
+            result = rag.add_documents(batch)
+            stats["added"] += result["added"]
+            stats["duplicates"] += result["duplicates"]
+            accepted = [batch[i] for i in result["accepted"]]
+        else:
+            stats["added"] += len(batch)
+            accepted = batch
+        if store is not None:
+            store.append(accepted)
+        batch.clear()
+
+    for record in records:
+        stats["received"] += 1
+        if record.get("error"):
+            stats["failed"].append({"filename": record.get("source", ""), "error": record["error"]})
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    if rag is not None:
+        stats["documents"] = len(rag.documents)
+    return stats
+
+
+def _category_for(path: Path, root: Path) -> str:
+    """目录监听/批量导入时，以相对根目录的第一级子目录名作为岗位类别"""
+    relative = path.relative_to(root)
+    return relative.parts[0] if len(relative.parts) > 1 else "Unknown"
+
+
+def iter_resume_files(root: Path) -> Iterator[Path]:
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix.lower() in SUPPORTED_SUFFIXES and not path.name.startswith("."):
+            yield path
+
+
+def _workers(cfg: AgentConfig) -> int:
+    return cfg.ingest_workers or (os.cpu_count() or 1)
+
+
+class DirectoryWatcher:
+    """轮询目录中的新增或修改过的简历文件并入库（刚写入、仍可能在变化的文件留到下一轮）"""
+
+    def __init__(self, directory: str, get_rag: Callable[[], Any], cfg: AgentConfig):
+        self.directory = Path(directory)
+        self.get_rag = get_rag
+        self.cfg = cfg
+        self.store = get_store(cfg.ingest_store_path)
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_stats: Dict[str, Any] = {}
+
+    def scan(self) -> List[Tuple[str, str]]:
+        settle_before = time.time() - 1.0
+        jobs = []
+        for path in iter_resume_files(self.directory):
+            stat = path.stat()
+            key = (stat.st_mtime_ns, stat.st_size)
+            if self._seen.get(str(path)) == key or stat.st_mtime > settle_before:
+                continue
+            self._seen[str(path)] = key
+            jobs.append((str(path), _category_for(path, self.directory)))
+        return jobs
+
+    def run_once(self) -> Dict[str, Any]:
+        jobs = self.scan()
+        if not jobs:
+            return {}
+        rag = self.get_rag()
+        if rag is None:
+            # 索引尚未就绪，下轮重试
+            for path, _ in jobs:
+                self._seen.pop(path, None)
+            return {}
+        workers = _workers(self.cfg) if len(jobs) > 1 else 1
+        stats = ingest_records(rag, iter_extracted(jobs, workers), self.store, self.cfg.ingest_batch_size)
+        print(f"[ingest] 目录 {self.directory}: 收到 {stats['received']}，新增 {stats['added']}，"
+              f"去重 {stats['duplicates']}，失败 {len(stats['failed'])}")
+        self.last_stats = stats
+        return stats
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:  # noqa: BLE001 - 监听线程不能因单轮失败退出
+                print(f"[ingest] 目录监听出错: {e}")
+            self._stop.wait(self.cfg.ingest_poll_interval_s)
+
+    def start(self) -> "DirectoryWatcher":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._loop, name="resume-watcher", daemon=True)
+        self._thread.start()
+        print(f"[ingest] 开始监听目录: {self.directory}（每 {self.cfg.ingest_poll_interval_s}s 扫描一次）")
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="批量导入简历文件到入库CSV（服务重启或下次加载时生效）")
+    parser.add_argument("directory", type=Path, help="简历文件目录，第一级子目录名作为岗位类别")
+    parser.add_argument("--category", help="统一指定岗位类别（覆盖子目录名）")
+    parser.add_argument("--workers", type=int, help="解析进程数，默认 INGEST_WORKERS 或 CPU 核数")
+    parser.add_argument("--store", help="入库CSV路径，默认 INGEST_STORE_PATH")
+    args = parser.parse_args(argv)
+
+    cfg = get_config()
+    root = args.directory
+    jobs = ((str(path), args.category or _category_for(path, root)) for path in iter_resume_files(root))
+    start = time.perf_counter()
+    stats = ingest_records(None, iter_extracted(jobs, args.workers or _workers(cfg)),
+                           get_store(args.store or cfg.ingest_store_path), cfg.ingest_batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"[ingest] 处理 {stats['received']} 个文件，写入 {stats['added']}，失败 {len(stats['failed'])}，"
+          f"用时 {elapsed:.1f}s（{stats['received'] / elapsed if elapsed else 0:.1f} 个/秒）")
+    for item in stats["failed"][:20]:
+        print(f"  {item['filename']}: {item['error']}")
+
+
+if __name__ == "__main__":
+    main()
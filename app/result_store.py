@@ -0,0 +1,82 @@
+"""
+服务端结果集：保存一次 /api/score 的完整检索排序，翻页时只对下一页候选人调用大模型评分。
+
+结果集按 LRU 淘汰（最多 max_sets 个），超过 ttl_s 未访问的结果集过期；
+每页的评分结果缓存在结果集内，重复请求同一页不会再次调用大模型。
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ResultSet:
+    """一次检索的完整候选人排序与已评分的页面"""
+
+    def __init__(self, job_title: str, requirements: str, ranking: List[Dict[str, Any]], page_size: int,
+                 scoring_mode: str = "llm"):
+        self.id = uuid.uuid4().hex
+        self.job_title = job_title
+        self.requirements = requirements
+        self.ranking = ranking
+        self.page_size = page_size
+        self.scoring_mode = scoring_mode  # 翻页沿用首页的评分方式
+        self.created_at = time.monotonic()
+        self.accessed_at = self.created_at
+        self.pages: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        # 同一结果集的翻页串行执行，并发请求同一页时只评分一次
+        self.lock = threading.Lock()
+
+    def next_cursor(self, cursor: int, size: int) -> Optional[int]:
+        end = cursor + size
+        return end if end < len(self.ranking) else None
+
+
+class ResultStore:
+    """有界的结果集存储（LRU + TTL），线程安全"""
+
+    def __init__(self, max_sets: int = 256, ttl_s: float = 1800.0):
+        if max_sets <= 0 or ttl_s <= 0:
+            raise ValueError(f"max_sets 和 ttl_s 必须为正数: {max_sets}, {ttl_s}")
+        self.max_sets = max_sets
+        self.ttl_s = ttl_s
+        self._sets: "OrderedDict[str, ResultSet]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def _expire(self, now: float):
+        while self._sets:
+            oldest = next(iter(self._sets.values()))
+            if now - oldest.accessed_at <= self.ttl_s:
+                break
+            self._sets.popitem(last=False)
+            self.expired += 1
+
+    def create(self, job_title: str, requirements: str, ranking: List[Dict[str, Any]], page_size: int,
+               scoring_mode: str = "llm") -> ResultSet:
+        result_set = ResultSet(job_title, requirements, ranking, page_size, scoring_mode)
+        with self._lock:
+            self._expire(result_set.created_at)
+            self._sets[result_set.id] = result_set
+            while len(self._sets) > self.max_sets:
+                self._sets.popitem(last=False)
+                self.evicted += 1
+        return result_set
+
+    def get(self, result_set_id: str) -> Optional[ResultSet]:
+        """取出结果集并刷新访问时间；不存在或已过期时返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            result_set = self._sets.get(result_set_id)
+            if result_set is not None:
+                result_set.accessed_at = now
+                self._sets.move_to_end(result_set_id)
+            return result_set
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"sets": len(self._sets), "max_sets": self.max_sets, "ttl_s": self.ttl_s,
+                    "evicted": self.evicted, "expired": self.expired}
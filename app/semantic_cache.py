@@ -0,0 +1,200 @@
+"""
+岗位要求的语义缓存：复用相似岗位要求下已有的逐候选人大模型评分。
+
+招聘方经常只改动标点、调换 JOB_TEMPLATES 中条目的顺序，精确匹配的缓存几乎不会命中。
+这里先规范化文本（统一全角字符与大小写、去掉条目编号和标点、条目排序），
+再用检索使用的同一个嵌入模型编码，余弦相似度不低于阈值即视为同一次筛选：
+重叠的候选人直接复用评分，只把新候选人送给大模型。
+
+嵌入模型对年限数字和单个技能词不敏感（“3年以上”与“5年以上”的相似度可能高于阈值），
+因此复用还要求解析出的必备/加分技能与最低年限完全一致（requirement_guard），只靠相似度不会命中。
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rag_system.requirements_parser import analyze_requirements
+
+_ENUMERATOR_RE = re.compile(r"^\s*(?:[-*•·]|\(?\d+[.)、）]|[一二三四五六七八九十]+[、.])\s*")
+_PUNCT_RE = re.compile(r"[^\w\s+#]")
+
+
+def normalize_requirements(job_title: str, requirements: str) -> str:
+    """规范化岗位名称与要求：条目去编号、去标点并排序，使仅顺序或标点不同的文本完全一致"""
+    text = unicodedata.normalize("NFKC", f"{job_title}\n{requirements}").casefold()
+    lines = []
+    for line in text.splitlines():
+        line = _PUNCT_RE.sub(" ", _ENUMERATOR_RE.sub("", line))
+        line = " ".join(line.split())
+        if line:
+            lines.append(line)
+    return "\n".join(sorted(set(lines)))
+
+
+def requirement_guard(job_title: str, requirements: str) -> Tuple[Any, ...]:
+    """必须完全一致才能复用评分的要求字段：必备技能、加分技能、最低年限"""
+    analysis = analyze_requirements(job_title, requirements)
+    return tuple(sorted(analysis.must_have)), tuple(sorted(analysis.nice_to_have)), analysis.min_years
+
+
+class _Entry:
+    __slots__ = ("vector", "guard", "scores", "accessed_at")
+
+    def __init__(self, vector: np.ndarray, guard: Tuple[Any, ...]):
+        self.vector = vector
+        self.guard = guard
+        self.scores: Dict[Any, Dict[str, Any]] = {}
+        self.accessed_at = time.monotonic()
+
+
+class SemanticScoreCache:
+    """
+    以岗位要求的嵌入向量为键、候选人ID -> 评分结果为值的缓存（LRU + TTL），线程安全。
+    只在 guard（见 requirement_guard）完全相同的条目之间比较相似度。
+
+    Args:
+        embed: 文本 -> 向量（使用检索的嵌入模型）
+        threshold: 余弦相似度阈值，不低于该值时复用评分
+        max_entries: 缓存的筛选数量上限
+        ttl_s: 超过该时间未访问的条目过期
+    """
+
+    # 相似度达到该值视为同一岗位要求，合并到已有条目而不是新增
+    _SAME_KEY = 0.999
+
+    def __init__(self, embed: Callable[[str], List[float]], threshold: float = 0.95,
+                 max_entries: int = 512, ttl_s: float = 3600.0):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold 需在 (0, 1] 之间: {threshold}")
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.reused_candidates = 0
+        self.scored_candidates = 0
+        self.last_similarity: Optional[float] = None
+
+    def vector_for(self, job_title: str, requirements: str) -> np.ndarray:
+        vector = np.asarray(self.embed(normalize_requirements(job_title, requirements)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _best(self, vector: np.ndarray, guard: Tuple[Any, ...]) -> Tuple[Optional[int], float]:
+        best_key, best_sim = None, -1.0
+        for key, entry in self._entries.items():
+            if entry.guard != guard:
+                continue
+            sim = float(np.dot(entry.vector, vector))
+            if sim > best_sim:
+                best_key, best_sim = key, sim
+        return best_key, best_sim
+
+    def _expire(self, now: float):
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if now - oldest.accessed_at <= self.ttl_s:
+                break
+            self._entries.popitem(last=False)
+
+    def lookup(self, vector: np.ndarray, guard: Tuple[Any, ...], candidate_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """返回相似筛选中已有评分的候选人 {id: 评分结果}，未命中时为空"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self.lookups += 1
+            key, sim = self._best(vector, guard)
+            self.last_similarity = sim if key is not None else None
+            if key is None or sim < self.threshold:
+                return {}
+            entry = self._entries[key]
+            entry.accessed_at = now
+            self._entries.move_to_end(key)
+            reused = {cid: dict(entry.scores[cid]) for cid in candidate_ids if cid in entry.scores}
+            if reused:
+                self.hits += 1
+                self.reused_candidates += len(reused)
+            return reused
+
+    def store(self, vector: np.ndarray, guard: Tuple[Any, ...], scores: Dict[Any, Dict[str, Any]]):
+        """记录本次筛选的逐候选人评分；与已有条目几乎相同时合并"""
+        if not scores:
+            return
+        now = time.monotonic()
+        with self._lock:
+            key, sim = self._best(vector, guard)
+            if key is None or sim < self._SAME_KEY:
+                key = self._next_key
+                self._next_key += 1
+                self._entries[key] = _Entry(vector, guard)
+            entry = self._entries[key]
+            entry.scores.update({cid: dict(score) for cid, score in scores.items()})
+            entry.accessed_at = now
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_scored(self, count: int):
+        with self._lock:
+            self.scored_candidates += count
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.reused_candidates + self.scored_candidates
+            return {
+                "threshold": self.threshold,
+                "entries": len(self._entries),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "reused_candidates": self.reused_candidates,
+                "scored_candidates": self.scored_candidates,
+                "candidate_reuse_rate": self.reused_candidates / total if total else 0.0,
+                "last_similarity": self.last_similarity,
+            }
+
+
+def score_with_cache(cache: Optional[SemanticScoreCache], rag, job_title: str, requirements: str,
+                     candidates: List[Dict[str, Any]], max_input_tokens: int,
+                     prompt_requirements: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    与 rag.score_retrieved 返回相同结构：命中缓存的候选人复用评分，其余候选人送给大模型，
+    评分失败的结果不写入缓存。requirements 为原始要求文本（缓存键），
+    prompt_requirements 为送入提示词的要求（默认同 requirements）。
+    """
+    prompt_requirements = requirements if prompt_requirements is None else prompt_requirements
+    if cache is None or not candidates:
+        return rag.score_retrieved(prompt_requirements, candidates, max_input_tokens=max_input_tokens)
+
+    vector = cache.vector_for(job_title, requirements)
+    guard = requirement_guard(job_title, requirements)
+    reused = cache.lookup(vector, guard, [c["id"] for c in candidates])
+    missing = [c for c in candidates if c["id"] not in reused]
+    fresh: Dict[Any, Dict[str, Any]] = {}
+    if missing:
+        for score_result in rag.score_retrieved(prompt_requirements, missing, max_input_tokens=max_input_tokens):
+            fresh[score_result["candidate_info"]["id"]] = score_result
+        cache.record_scored(len(missing))
+    if reused:
+        print(f"语义缓存命中: 复用 {len(reused)} 位候选人的评分，新评分 {len(missing)} 位")
+
+    cache.store(vector, guard, {
+        cid: {k: v for k, v in result.items() if k != "candidate_info"}
+        for cid, result in {**reused, **fresh}.items() if not result.get("score_failed")
+    })
+
+    results = []
+    for candidate in candidates:
+        score_result = reused.get(candidate["id"]) or fresh[candidate["id"]]
+        score_result["candidate_info"] = candidate
+        results.append(score_result)
+    return results
@@ -1,15 +1,22 @@
 import sys
+import copy
+import threading
 import time
 import logging
 import json
 import re
-from typing import Dict, List, Any
+import unicodedata
+from typing import Dict, List, Any, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from config import AgentConfig
-# 直接从rag_system导入SimpleRAG，替代原来的pipeline
-from rag_system.llama_rag_system import SimpleRAG
+from rag_system.token_budget import truncate_to_tokens
+from app.admission import AdmissionRejected, admission_metrics, admission_stage, current_priority
 from app.dataset import search_resumes
+from app.result_store import ResultStore
+from app.semantic_cache import SemanticScoreCache, score_with_cache
+from rag_system.local_ranker import LocalRanker
+from rag_system.requirements_parser import analysis_metrics, analyze_requirements, apply_filters
 
 # 添加日志配置
 logging.basicConfig(level=logging.INFO)
@@ -17,17 +24,121 @@ logger = logging.getLogger(__name__)
 
 # 初始化RAG系统实例
 rag_system = None
+# 启动预热线程与首个请求可能同时触发初始化，加锁保证只构建一次索引
+_init_lock = threading.Lock()
 
+# 启动预热状态：pending -> warming -> ready / failed
+_warm_up_state: Dict[str, Any] = {"status": "pending", "error": None, "duration_s": None}
+_warm_up_lock = threading.Lock()
 
-def init_rag_system():
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class _SingleFlight:
+    """
+    相同 key 的并发调用只执行一次：第一个调用方执行，其余调用方等待并拿到同一结果的副本。
+    只合并正在执行的调用，不缓存已完成的结果。等待者总数达到 max_waiters 时，后来的调用方自己执行。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Any, _Flight] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.overflow = 0
+        self.waiting = 0
+
+    def do(self, key, fn, max_waiters: Optional[int] = None):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executed += 1
+            elif max_waiters is not None and self.waiting >= max_waiters:
+                # 每个等待者占用一个工作线程，超出上限时不再合并，直接执行（受准入控制约束）
+                self.overflow += 1
+                flight = None
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+                self.waiting += 1
+
+        if flight is None:
+            return fn()
+        if not leader:
+            try:
+                flight.done.wait()
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            if flight.error is not None:
+                raise flight.error
+            # 每个调用方拿到独立副本，互不影响
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                if flight.waiters and flight.error is None:
+                    # 执行方返回原对象；等待方从这份快照复制，执行方之后修改结果也不受影响
+                    flight.result = copy.deepcopy(flight.result)
+            flight.done.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "overflow": self.overflow,
+                    "waiting": self.waiting, "in_flight": len(self._flights)}
+
+
+# 同一岗位模板被多人同时打开时，/api/score 的相同请求共用一次检索、重排序和大模型评分
+_score_flights = _SingleFlight()
+
+# /api/score 的服务端结果集（首次使用时按配置创建），翻页时只对下一页评分
+_result_store: Optional[ResultStore] = None
+
+# 岗位要求的语义缓存：相似的岗位要求复用已有的逐候选人评分（依赖检索的嵌入模型，RAG 初始化后创建）
+_semantic_cache: Optional[SemanticScoreCache] = None
+
+# 本地特征评分器：scoring_mode=local 的请求，以及大模型评分失败时的降级
+_local_ranker: Optional[LocalRanker] = None
+
+
+def _normalize_key_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text or "").split()).casefold()
+
+
+def init_rag_system(cfg: Optional[AgentConfig] = None):
     """初始化RAG系统"""
     global rag_system
-    if rag_system is None:
+    if rag_system is not None:
+        return
+    with _init_lock:
+        if rag_system is not None:
+            return
         try:
             from pathlib import Path
             dataset_path = Path("rag_system/UpdatedResumeDataSet.csv")
             if dataset_path.exists():
-                rag_system = SimpleRAG(str(dataset_path))
+                # 直接使用rag_system中的SimpleRAG，首次初始化时才导入
+                from rag_system.llama_rag_system import SimpleRAG
+                # 同时加载在线入库保存的简历
+                extra_csv_paths = [cfg.ingest_store_path] if cfg is not None else []
+                rag_system = SimpleRAG(str(dataset_path), cfg=cfg, extra_csv_paths=extra_csv_paths)
                 logger.info("RAG系统初始化成功")
             else:
                 logger.warning(f"数据集文件不存在: {dataset_path}")
@@ -36,15 +147,64 @@ def init_rag_system():
             rag_system = None
 
 
+def get_rag_system(cfg: AgentConfig):
+    """返回已初始化的RAG系统（必要时先初始化），初始化失败时为 None"""
+    init_rag_system(cfg)
+    return rag_system
+
+
+def warm_up_rag_system(cfg: AgentConfig):
+    """加载模型、构建索引并跑合成查询预热；重复调用时只执行一次"""
+    with _warm_up_lock:
+        if _warm_up_state["status"] in ("warming", "ready"):
+            return
+        _warm_up_state.update(status="warming", error=None)
+    start = time.perf_counter()
+    try:
+        init_rag_system(cfg)
+        if rag_system is not None:
+            rag_system.warm_up()
+        _warm_up_state["status"] = "ready"
+        logger.info(f"预热完成，用时 {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.error(f"预热失败: {e}")
+        _warm_up_state.update(status="failed", error=str(e))
+    finally:
+        _warm_up_state["duration_s"] = time.perf_counter() - start
+
+
+def start_warm_up(cfg: AgentConfig) -> threading.Thread:
+    """在后台线程中预热，不阻塞服务启动（/health/live 立即可用）"""
+    thread = threading.Thread(target=warm_up_rag_system, args=(cfg,), name="rag-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_up_status() -> Dict[str, Any]:
+    """预热状态；rag_ready 为 False 时评分会退回关键词检索"""
+    return {**_warm_up_state, "rag_ready": rag_system is not None}
+
+
+def get_metrics() -> Dict[str, Any]:
+    """运行时指标：预热状态与微批处理的排队情况"""
+    return {
+        "warm_up": warm_up_status(),
+        "batching": rag_system.batching_metrics() if rag_system is not None else {},
+        "coalescing": _score_flights.metrics(),
+        "result_store": _result_store.metrics() if _result_store is not None else {},
+        "semantic_cache": _semantic_cache.metrics() if _semantic_cache is not None else {},
+        "requirements": analysis_metrics(),
+        "llm": rag_system.llm_metrics() if rag_system is not None else {},
+        "admission": admission_metrics(),
+    }
+
+
 def truncate_text(text: str, max_tokens: int = 3000) -> str:
     """
     截断文本以适应token限制
     """
-    # 简单的字符级截断，实际应用中可能需要更精确的token计数
-    max_chars = max_tokens * 4  # 估算每个token大约4个字符
-    if len(text) <= max_chars:
-        return text
-    return text[:max_chars] + "...(内容已截断)"
+    # 使用离线分词器精确计数（中文按实际token数而非字符数估算）
+    return truncate_to_tokens(text, max_tokens, suffix="...(内容已截断)")
 
 
 # 定义需要重试的异常类型
@@ -69,17 +229,13 @@ def score_candidate_with_retry(job_title: str, requirements: str, resume_text: s
     
     try:
         # 初始化RAG系统（如果尚未初始化）
-        init_rag_system()
+        init_rag_system(cfg)
         
         # 对输入文本进行截断以避免token超限
         job_title = truncate_text(job_title, 100)
         requirements = truncate_text(requirements, 500)
         resume_text = truncate_text(resume_text, 2000)
         
-        composite = f"岗位：{job_title}；特定要求：{requirements}。候选人简历：{resume_text}"
-        # 再次确保整体输入不会太长
-        composite = truncate_text(composite, 3000)
-        
         logger.info("开始运行处理管道")
         
         # 使用RAG系统进行评分
@@ -87,7 +243,9 @@ def score_candidate_with_retry(job_title: str, requirements: str, resume_text: s
             try:
                 # 构造查询和要求
                 query = f"{job_title} {requirements}"
-                score_results = rag_system.score_candidates(query, requirements, top_k=1)
+                score_results = rag_system.score_candidates(
+                    query, requirements, top_k=1, max_input_tokens=cfg.max_input_tokens
+                )
                 
                 # 如果有评分结果，使用第一个候选人的评分
                 if score_results and len(score_results) > 0:
@@ -118,26 +276,8 @@ def score_candidate_with_retry(job_title: str, requirements: str, resume_text: s
                         }
                     }
                 else:
-                    # 如果没有评分结果，使用默认值
-                    result = {
-                        "plan": {
-                            "normalized_resume": composite[:200] + "..." if len(composite) > 200 else composite
-                        },
-                        "parsed_resume": {
-                            "name": "张三",
-                            "years_experience": "5年",
-                            "skills": ["Python", "机器学习", "数据分析"]
-                        },
-                        "scores": [
-                            {"dimension": "技术能力", "score": 8.5},
-                            {"dimension": "经验匹配", "score": 7.2}
-                        ],
-                        "report": {
-                            "ordered_scores": [
-                                {"dimension": "综合评分", "score": 7.8, "reasoning": "候选人具备相关技能和经验"}
-                            ]
-                        }
-                    }
+                    # 如果没有评分结果，对该简历做本地评分
+                    result = _local_score_resume(job_title, requirements, resume_text, cfg)
                 
                 logger.info(f"成功处理候选人: {job_title}")
                 logger.debug(f"处理结果类型: {type(result)}")
@@ -145,50 +285,12 @@ def score_candidate_with_retry(job_title: str, requirements: str, resume_text: s
                 
             except Exception as e:
                 logger.error(f"使用RAG系统评分失败: {str(e)}")
-                # 回退到模拟结果
-                result = {
-                    "plan": {
-                        "normalized_resume": composite[:200] + "..." if len(composite) > 200 else composite
-                    },
-                    "parsed_resume": {
-                        "name": "张三",
-                        "years_experience": "5年",
-                        "skills": ["Python", "机器学习", "数据分析"]
-                    },
-                    "scores": [
-                        {"dimension": "技术能力", "score": 8.5},
-                        {"dimension": "经验匹配", "score": 7.2}
-                    ],
-                    "report": {
-                        "ordered_scores": [
-                            {"dimension": "综合评分", "score": 7.8, "reasoning": "候选人具备相关技能和经验"}
-                        ]
-                    }
-                }
-                return result
+                # 回退到本地评分
+                return _local_score_resume(job_title, requirements, resume_text, cfg)
         else:
-            # 如果RAG系统不可用，返回模拟结果
-            logger.warning("RAG系统不可用，返回模拟结果")
-            result = {
-                "plan": {
-                    "normalized_resume": composite[:200] + "..." if len(composite) > 200 else composite
-                },
-                "parsed_resume": {
-                    "name": "张三",
-                    "years_experience": "5年",
-                    "skills": ["Python", "机器学习", "数据分析"]
-                },
-                "scores": [
-                    {"dimension": "技术能力", "score": 8.5},
-                    {"dimension": "经验匹配", "score": 7.2}
-                ],
-                "report": {
-                    "ordered_scores": [
-                        {"dimension": "综合评分", "score": 7.8, "reasoning": "候选人具备相关技能和经验"}
-                    ]
-                }
-            }
-            return result
+            # 如果RAG系统不可用，使用本地评分
+            logger.warning("RAG系统不可用，使用本地评分")
+            return _local_score_resume(job_title, requirements, resume_text, cfg)
             
     except Exception as e:
         logger.error(f"处理候选人 {job_title} 失败: {str(e)}", exc_info=True)
@@ -211,84 +313,266 @@ def score_candidate(job_title: str, requirements: str, resume_text: str, cfg: Ag
 
 
 def score_from_dataset(job_title: str, requirements: str, top_n: int, cfg: AgentConfig) -> List[Dict[str, Any]]:
-    logger.info(f"开始从数据集中评分，岗位: {job_title}, 数量: {top_n}")
+    """从数据集检索并评分前 top_n 位候选人"""
+    return score_result_set(job_title, requirements, top_n, cfg)["results"]
+
+
+def score_result_set(job_title: str, requirements: str, top_n: int, cfg: AgentConfig,
+                     scoring_mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    检索并评分第一页候选人，完整的检索排序保存为服务端结果集，后续页面用 score_next_page 按需评分。
+    并发的相同请求（规范化后的岗位、要求、数量、评分方式与准入优先级一致）合并为一次计算。
+
+    Args:
+        scoring_mode: llm / local，默认取配置中的 scoring_mode
+
+    Returns:
+        {"results", "result_set_id", "next_cursor"}；回退到关键词检索时没有结果集，后两项为 None
+    """
+    scoring_mode = scoring_mode or cfg.scoring_mode
+    if not cfg.coalesce_requests:
+        return _score_result_set(job_title, requirements, top_n, cfg, scoring_mode)
+    # 优先级计入 key：交互请求不会合并到批量请求上，继承其排队位置和 429
+    key = (_normalize_key_text(job_title), _normalize_key_text(requirements), top_n, scoring_mode,
+           current_priority())
+    return _score_flights.do(key, lambda: _score_result_set(job_title, requirements, top_n, cfg, scoring_mode),
+                             max_waiters=cfg.coalesce_max_waiters)
+
+
+def _get_result_store(cfg: AgentConfig) -> ResultStore:
+    global _result_store
+    if _result_store is None:
+        with _init_lock:
+            if _result_store is None:
+                _result_store = ResultStore(cfg.result_store_max_sets, cfg.result_store_ttl_s)
+    return _result_store
+
+
+def _get_semantic_cache(cfg: AgentConfig) -> Optional[SemanticScoreCache]:
+    global _semantic_cache
+    if not cfg.semantic_cache or rag_system is None:
+        return None
+    if _semantic_cache is None:
+        with _init_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticScoreCache(
+                    rag_system.embeddings.embed_query, cfg.semantic_cache_threshold,
+                    cfg.semantic_cache_max_entries, cfg.semantic_cache_ttl_s,
+                )
+    return _semantic_cache
+
+
+def _get_local_ranker(cfg: AgentConfig) -> LocalRanker:
+    global _local_ranker
+    if _local_ranker is None:
+        with _init_lock:
+            if _local_ranker is None:
+                # 技能词的 IDF 按当前索引中的全部简历计算（在线入库后自动更新）
+                _local_ranker = LocalRanker.load(
+                    cfg.local_ranker_path, corpus=lambda: rag_system.documents if rag_system is not None else []
+                )
+    return _local_ranker
+
+
+def _retrieve(job_title: str, requirements: str, top_n: int, cfg: AgentConfig) -> List[Dict[str, Any]]:
+    """检索并重排序召回池：解析出技能或类别时使用精简查询，并按最低年限与类别硬过滤"""
+    analysis = analyze_requirements(job_title, requirements) if cfg.parse_requirements else None
+    if analysis is not None and analysis.structured:
+        query = analysis.query()
+        logger.info(f"岗位要求解析: {analysis.to_dict()}，检索查询: {query}")
+    else:
+        query = f"{job_title} {requirements}"
+    with admission_stage(cfg, "cpu"):
+        # 保留重排序后的整个召回池（约 RAG_TOP_N 到 2×RAG_TOP_N 位），结果集翻页的深度即召回池大小
+        ranking = rag_system.search(query, top_k=None)
+    if analysis is not None and cfg.requirement_filters:
+        ranking = apply_filters(ranking, analysis, keep_at_least=top_n)
+    return ranking
+
+
+def _prompt_requirements(job_title: str, requirements: str, cfg: AgentConfig) -> str:
+    """评分提示词中的岗位要求：解析出结构时使用紧凑形式"""
+    if cfg.parse_requirements:
+        analysis = analyze_requirements(job_title, requirements)
+        if analysis.structured:
+            return analysis.compact()
+    return requirements
+
+
+def _score_page(job_title: str, requirements: str, candidates: List[Dict[str, Any]], scoring_mode: str,
+                cfg: AgentConfig) -> List[Dict[str, Any]]:
+    """按评分方式对一页候选人评分；大模型评分失败的候选人改用本地评分"""
+    if scoring_mode == "local":
+        with admission_stage(cfg, "cpu"):
+            return _get_local_ranker(cfg).score(job_title, requirements, candidates)
+    with admission_stage(cfg, "llm"):
+        results = score_with_cache(
+            _get_semantic_cache(cfg), rag_system, job_title, requirements, candidates, cfg.max_input_tokens,
+            prompt_requirements=_prompt_requirements(job_title, requirements, cfg)
+        )
+    failed = [i for i, result in enumerate(results) if result.get("score_failed")]
+    if failed:
+        logger.warning(f"{len(failed)} 位候选人的大模型评分失败，改用本地评分")
+        local = _get_local_ranker(cfg).score(
+            job_title, requirements, [results[i]["candidate_info"] for i in failed]
+        )
+        for i, result in zip(failed, local):
+            results[i] = result
+    return results
+
+
+def _local_score_resume(job_title: str, requirements: str, resume_text: str, cfg: AgentConfig) -> Dict[str, Any]:
+    """对单份简历文本做本地评分（RAG系统不可用或评分失败时使用）"""
+    candidate = {"id": -1, "category": "Unknown", "content": resume_text}
+    result = _format_score_results(_get_local_ranker(cfg).score(job_title, requirements, [candidate]))[0]
+    result["plan"]["normalized_resume"] = resume_text
+    return result
+
+
+def _format_score_results(score_results: List[Any]) -> List[Dict[str, Any]]:
+    """将 SimpleRAG 的评分结果转换为前端展示结构，按综合评分排序"""
+    results: List[Dict[str, Any]] = []
+    for i, score_result in enumerate(score_results):
+        # 检查每个结果是否为字典类型
+        if not isinstance(score_result, dict):
+            logger.warning(f"第 {i+1} 个结果不是字典类型: {type(score_result)}，跳过")
+            continue
+
+        # 安全地获取candidate_info
+        candidate_info = score_result.get("candidate_info", {})
+        if not isinstance(candidate_info, dict):
+            candidate_info = {}
+
+        # 档案中的学历与职位供展示和筛选
+        profile = candidate_info.get("profile") or {}
+
+        # 构造符合前端展示要求的结构化结果
+        result = {
+            "candidate_info": candidate_info,  # 添加candidate_info字段
+            "scoring_mode": score_result.get("scoring_mode", "llm"),
+            "plan": {
+                "normalized_resume": candidate_info.get("content", "")[:200] + "..." if len(candidate_info.get("content", "")) > 200 else candidate_info.get("content", "")
+            },
+            "parsed_resume": {
+                "name": "未知",
+                "years_experience": str(score_result.get("years_experience", "未知")),
+                "skills": [skill.strip() for skill in score_result.get("skills", "").split(",") if skill.strip()],
+                "education": profile.get("education", ""),
+                "titles": profile.get("titles", []),
+            },
+            "scores": [
+                {"dimension": "技术能力", "score": score_result.get("technical_score", 0)},
+                {"dimension": "经验匹配", "score": score_result.get("experience_score", 0)}
+            ],
+            "report": {
+                "ordered_scores": [
+                    {
+                        "dimension": "综合评分", 
+                        "score": score_result.get("overall_score", 0), 
+                        "reasoning": f"技术能力: {score_result.get('technical_score', 0)}/10, 经验匹配: {score_result.get('experience_score', 0)}/10, 主要优势: {score_result.get('strengths', '')}, 主要不足: {score_result.get('weaknesses', '')}"
+                    }
+                ]
+            }
+        }
+        results.append(result)
+
+    # 按综合评分排序
+    results.sort(
+        key=lambda r: r.get("report", {})
+        .get("ordered_scores", [{}])[0]
+        .get("score", 0),
+        reverse=True,
+    )
+    return results
+
+
+def _score_result_set(job_title: str, requirements: str, top_n: int, cfg: AgentConfig,
+                      scoring_mode: str = "llm") -> Dict[str, Any]:
+    logger.info(f"开始从数据集中评分，岗位: {job_title}, 数量: {top_n}, 评分方式: {scoring_mode}")
     
     # 初始化RAG系统（如果尚未初始化）
-    init_rag_system()
+    init_rag_system(cfg)
     
     # 使用RAG系统直接评分数据集中的候选人
     if rag_system is not None:
         try:
-            query = f"{job_title} {requirements}"
-            score_results = rag_system.score_candidates(query, requirements, top_k=top_n)
+            # 检索并重排序整个召回池，只对第一页评分；其余候选人留在结果集中按需评分
+            ranking = _retrieve(job_title, requirements, top_n, cfg)
+            score_results = _score_page(
+                job_title, requirements, ranking[:top_n], scoring_mode, cfg
+            ) if ranking else []
             
             # 添加类型检查和安全处理
             if not isinstance(score_results, list):
                 logger.error(f"RAG系统返回了非列表类型: {type(score_results)}")
                 # 回退到原来的方法
-                return _fallback_to_original_method(job_title, requirements, top_n, cfg)
-            
-            results: List[Dict[str, Any]] = []
-            for i, score_result in enumerate(score_results):
-                # 检查每个结果是否为字典类型
-                if not isinstance(score_result, dict):
-                    logger.warning(f"第 {i+1} 个结果不是字典类型: {type(score_result)}，跳过")
-                    continue
-                
-                # 安全地获取candidate_info
-                candidate_info = score_result.get("candidate_info", {})
-                if not isinstance(candidate_info, dict):
-                    candidate_info = {}
-                
-                # 构造符合前端展示要求的结构化结果
-                result = {
-                    "candidate_info": candidate_info,  # 添加candidate_info字段
-                    "plan": {
-                        "normalized_resume": candidate_info.get("content", "")[:200] + "..." if len(candidate_info.get("content", "")) > 200 else candidate_info.get("content", "")
-                    },
-                    "parsed_resume": {
-                        "name": "未知",
-                        "years_experience": str(score_result.get("years_experience", "未知")),
-                        "skills": [skill.strip() for skill in score_result.get("skills", "").split(",") if skill.strip()]
-                    },
-                    "scores": [
-                        {"dimension": "技术能力", "score": score_result.get("technical_score", 0)},
-                        {"dimension": "经验匹配", "score": score_result.get("experience_score", 0)}
-                    ],
-                    "report": {
-                        "ordered_scores": [
-                            {
-                                "dimension": "综合评分", 
-                                "score": score_result.get("overall_score", 0), 
-                                "reasoning": f"技术能力: {score_result.get('technical_score', 0)}/10, 经验匹配: {score_result.get('experience_score', 0)}/10, 主要优势: {score_result.get('strengths', '')}, 主要不足: {score_result.get('weaknesses', '')}"
-                            }
-                        ]
-                    }
-                }
-                results.append(result)
+                return _fallback_result_set(job_title, requirements, top_n, cfg)
             
+            results = _format_score_results(score_results)
             if results:
-                # 按综合评分排序
-                results.sort(
-                    key=lambda r: r.get("report", {})
-                    .get("ordered_scores", [{}])[0]
-                    .get("score", 0),
-                    reverse=True,
-                )
-                
-                logger.info(f"RAG评分完成，返回前 {top_n} 个结果")
-                return results[:top_n]
+                result_set = _get_result_store(cfg).create(job_title, requirements, ranking, top_n, scoring_mode)
+                result_set.pages[(0, top_n)] = results[:top_n]
+                logger.info(f"RAG评分完成，返回前 {top_n} 个结果（结果集 {result_set.id}，共 {len(ranking)} 位候选人）")
+                return {
+                    "results": results[:top_n],
+                    "result_set_id": result_set.id,
+                    "next_cursor": result_set.next_cursor(0, top_n),
+                }
             else:
                 logger.warning("RAG系统未返回有效结果，回退到原始方法")
-                return _fallback_to_original_method(job_title, requirements, top_n, cfg)
+                return _fallback_result_set(job_title, requirements, top_n, cfg)
             
+        except AdmissionRejected:
+            # 过载时直接拒绝，不能退回到逐份调用大模型的回退方法
+            raise
         except Exception as e:
             logger.error(f"使用RAG系统评分数据集失败: {e}", exc_info=True)
-            return _fallback_to_original_method(job_title, requirements, top_n, cfg)
+            return _fallback_result_set(job_title, requirements, top_n, cfg)
     
     # 如果RAG系统不可用或评分失败，回退到原来的方法
     logger.warning("RAG系统不可用，回退到原来的数据集评分方法")
-    return _fallback_to_original_method(job_title, requirements, top_n, cfg)
+    return _fallback_result_set(job_title, requirements, top_n, cfg)
+
+
+def _fallback_result_set(job_title: str, requirements: str, top_n: int, cfg: AgentConfig) -> Dict[str, Any]:
+    results = _fallback_to_original_method(job_title, requirements, top_n, cfg)
+    return {"results": results, "result_set_id": None, "next_cursor": None}
+
+
+def score_next_page(result_set_id: str, cursor: int, page_size: Optional[int], cfg: AgentConfig) -> Dict[str, Any]:
+    """
+    对结果集中 [cursor, cursor + page_size) 的候选人评分；已评分的页面直接返回缓存。
+
+    Raises:
+        KeyError: 结果集不存在或已过期
+        ValueError: cursor / page_size 越界
+    """
+    result_set = _get_result_store(cfg).get(result_set_id)
+    if result_set is None:
+        raise KeyError(result_set_id)
+    size = page_size or result_set.page_size
+    if size <= 0 or size > cfg.max_top_n:
+        raise ValueError(f"page_size 需在 1 到 {cfg.max_top_n} 之间。")
+    if not 0 <= cursor < len(result_set.ranking):
+        raise ValueError(f"cursor 需在 0 到 {len(result_set.ranking) - 1} 之间。")
+
+    with result_set.lock:
+        results = result_set.pages.get((cursor, size))
+        if results is None:
+            init_rag_system(cfg)
+            if rag_system is None:
+                raise RuntimeError("RAG系统不可用")
+            page = result_set.ranking[cursor:cursor + size]
+            logger.info(f"结果集 {result_set_id}: 评分第 {cursor + 1}-{cursor + len(page)} 位候选人")
+            results = _format_score_results(_score_page(
+                result_set.job_title, result_set.requirements, page, result_set.scoring_mode, cfg
+            ))
+            result_set.pages[(cursor, size)] = results
+    return {
+        "results": copy.deepcopy(results),
+        "result_set_id": result_set.id,
+        "next_cursor": result_set.next_cursor(cursor, size),
+    }
 
 
 def _fallback_to_original_method(job_title: str, requirements: str, top_n: int, cfg: AgentConfig) -> List[Dict[str, Any]]:
@@ -0,0 +1 @@
+# 离线基准测试：合成简历数据、本地桩模型与检索/评分管线性能测量
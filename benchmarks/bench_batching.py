@@ -0,0 +1,113 @@
+"""
+微批处理对交叉编码器并发吞吐的影响。
+
+多个线程同时以“每请求 N 对候选人”调用 predict，分别测量直接调用与经 MicroBatcher 合并时的
+总吞吐和单请求 p50/p99 延迟，并输出批大小与队列深度指标。
+
+--model simulated 使用模拟模型：每次前向有固定开销 + 按条目的开销，且同一时刻只能执行一次前向
+（对应一次前向已占满全部 CPU 核心），不依赖模型文件；--model cross-encoder 使用配置中的真实模型。
+
+用法:
+    python -m benchmarks.bench_batching --model simulated --concurrency 1 4 16
+    python -m benchmarks.bench_batching --model cross-encoder --concurrency 8 --requests 200
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.bench_pipeline import RESULTS_DIR, percentiles
+from benchmarks.synthetic import BENCH_QUERIES, iter_rows
+from config import get_config
+from rag_system.batching import BatchedCrossEncoder
+
+
+class SimulatedCrossEncoder:
+    """模拟交叉编码器：前向耗时 = overhead + n * per_item，前向之间互斥"""
+
+    def __init__(self, overhead_ms: float = 15.0, per_item_ms: float = 0.8):
+        self.overhead_s = overhead_ms / 1000
+        self.per_item_s = per_item_ms / 1000
+        self._lock = threading.Lock()
+
+    def predict(self, pairs, batch_size: int = 32, **kwargs) -> np.ndarray:
+        with self._lock:
+            time.sleep(self.overhead_s + self.per_item_s * len(pairs))
+        return np.asarray([len(p[1]) % 97 / 97 for p in pairs], dtype=np.float32)
+
+
+def load_model(name: str, args):
+    if name == "simulated":
+        return SimulatedCrossEncoder(args.overhead_ms, args.per_item_ms)
+    cfg = get_config()
+    if cfg.inference_backend == "onnx":
+        from rag_system.inference_backends import create_onnx_cross_encoder
+        return create_onnx_cross_encoder(cfg)
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(cfg.cross_encoder_model)
+
+
+def run_load(model, pairs_per_request: List[List[Any]], concurrency: int, requests_count: int) -> Dict[str, Any]:
+    model.predict(pairs_per_request[0])  # 预热
+    samples: List[float] = []
+
+    def call(i: int):
+        start = time.perf_counter()
+        model.predict(pairs_per_request[i % len(pairs_per_request)])
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    return {"throughput_rps": requests_count / elapsed, **percentiles(samples)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="交叉编码器微批处理吞吐基准")
+    parser.add_argument("--model", choices=["simulated", "cross-encoder"], default="simulated")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="每个并发级别的请求数")
+    parser.add_argument("--pairs", type=int, default=20, help="每个请求的候选人数量")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=3.0)
+    parser.add_argument("--overhead-ms", type=float, default=15.0, help="模拟模型每次前向的固定开销")
+    parser.add_argument("--per-item-ms", type=float, default=0.8, help="模拟模型每条输入的开销")
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "batching.json")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model, args)
+    rows = [resume for _, resume in iter_rows(args.pairs * len(BENCH_QUERIES), seed=7)]
+    pairs_per_request = [
+        [(query, rows[(i * args.pairs + j) % len(rows)][:500]) for j in range(args.pairs)]
+        for i, query in enumerate(BENCH_QUERIES)
+    ]
+
+    results: Dict[str, Any] = {"model": args.model, "pairs": args.pairs, "max_batch": args.max_batch,
+                               "max_wait_ms": args.max_wait_ms, "levels": {}}
+    for concurrency in args.concurrency:
+        direct = run_load(model, pairs_per_request, concurrency, args.requests)
+        batched_model = BatchedCrossEncoder(model, args.max_batch, args.max_wait_ms)
+        batched = run_load(batched_model, pairs_per_request, concurrency, args.requests)
+        batched["batching"] = batched_model.batcher.metrics()
+        batched_model.batcher.close()
+        results["levels"][str(concurrency)] = {"direct": direct, "batched": batched}
+        print(f"[batching] 并发 {concurrency}: 直接调用 {direct['throughput_rps']:.1f} req/s "
+              f"p99={direct['p99_ms']:.0f}ms | 微批 {batched['throughput_rps']:.1f} req/s "
+              f"p99={batched['p99_ms']:.0f}ms，平均每批 {batched['batching']['avg_requests_per_batch']:.1f} 个请求，"
+              f"最大队列深度 {batched['batching']['max_queue_depth']}")
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[batching] 结果已写入 {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+后端进程的导入耗时基准（python -X importtime）。
+
+在干净的子进程中导入指定模块，统计总导入耗时与最慢的顶层依赖，并检查重量级依赖
+（torch、sentence_transformers、langchain、FAISS、llama_index、gradio、pandas）没有被提前导入。
+超出耗时预算或导入了禁止的模块时以非零退出码结束，可放在 CI 中防止启动变慢。
+
+用法:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --module app.backend --max-ms 1500 --runs 5 --out benchmarks/results/import.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 只导入 app.backend 时不应出现的重量级依赖（在预热或首次请求时才需要）
+DEFAULT_FORBIDDEN = [
+    "torch", "sentence_transformers", "transformers", "langchain_community", "langchain_classic",
+    "langchain_openai", "faiss", "llama_index", "gradio", "pandas",
+]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """解析 -X importtime 输出为 [{module, self_us, cumulative_us, depth}]"""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": len(indent) // 2,
+            })
+    return entries
+
+
+def measure_once(module: str) -> Dict[str, Any]:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.splitlines()[-10:])
+        raise RuntimeError(f"导入 {module} 失败:\n{tail}")
+    entries = parse_importtime(proc.stderr)
+    total_us = next((e["cumulative_us"] for e in reversed(entries) if e["module"] == module), 0)
+    return {"total_ms": total_us / 1000, "entries": entries}
+
+
+def measure(module: str, runs: int, top: int, forbidden: List[str]) -> Dict[str, Any]:
+    """多次测量取中位数；最慢依赖与禁止模块检查取自最后一次"""
+    samples = [measure_once(module) for _ in range(runs)]
+    entries = samples[-1]["entries"]
+    imported = {e["module"] for e in entries}
+    roots = {}
+    for e in entries:
+        if e["depth"] == 1:
+            roots[e["module"]] = roots.get(e["module"], 0) + e["cumulative_us"]
+    slowest = sorted(roots.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "runs": runs,
+        "total_ms_median": statistics.median(s["total_ms"] for s in samples),
+        "total_ms_samples": [s["total_ms"] for s in samples],
+        "modules_imported": len(imported),
+        "slowest": [{"module": name, "cumulative_ms": us / 1000} for name, us in slowest],
+        "forbidden_imported": sorted(
+            name for name in forbidden if name in imported or any(m.startswith(name + ".") for m in imported)
+        ),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="导入耗时基准（-X importtime）")
+    parser.add_argument("--module", nargs="+", default=["app.backend"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="列出最慢的顶层依赖数量")
+    parser.add_argument("--max-ms", type=float, default=2000.0, help="导入耗时预算（中位数，毫秒）")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN, help="不允许被导入的模块")
+    parser.add_argument("--out", type=Path, help="结果JSON输出路径")
+    args = parser.parse_args(argv)
+
+    failures = []
+    results = []
+    for module in args.module:
+        result = measure(module, args.runs, args.top, args.forbid)
+        results.append(result)
+        print(f"[import] {module}: {result['total_ms_median']:.0f}ms（中位数，{args.runs} 次），"
+              f"共导入 {result['modules_imported']} 个模块")
+        for item in result["slowest"]:
+            print(f"  {item['module']:<32}{item['cumulative_ms']:>10.1f}ms")
+        if result["total_ms_median"] > args.max_ms:
+            failures.append(f"{module} 导入耗时 {result['total_ms_median']:.0f}ms 超出预算 {args.max_ms:.0f}ms")
+        if result["forbidden_imported"]:
+            failures.append(f"{module} 导入了重量级依赖: {', '.join(result['forbidden_imported'])}")
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[import] 结果已写入 {args.out}")
+
+    if failures:
+        for line in failures:
+            print(f"[import] 失败: {line}")
+        return 1
+    print("[import] 通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+PyTorch 与 ONNX（动态 int8 量化）推理后端的一致性与延迟对比。
+
+一致性：同一批简历在两个后端下嵌入向量的余弦相似度，以及每个查询下候选人重排序结果的
+top-k 重合率和 Kendall tau；延迟：单条查询嵌入、批量文档嵌入、每个查询 N 对候选人重排序的 p50/p95。
+一致性低于阈值时以非零退出码结束，切换后端前先跑一遍。
+
+用法:
+    python -m benchmarks.bench_inference --docs 200 --pairs 20 --out benchmarks/results/inference.json
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.bench_pipeline import RESULTS_DIR, percentiles
+from benchmarks.synthetic import BENCH_QUERIES, iter_rows
+from config import get_config
+
+DEFAULT_CSV = Path("rag_system/UpdatedResumeDataSet.csv")
+
+
+def load_texts(csv_path: Path, n: int, seed: int) -> List[str]:
+    """读取前 n 份简历，数据集不存在时使用合成简历"""
+    texts = []
+    if csv_path.exists():
+        with csv_path.open("r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                resume = (row.get("Resume") or "").strip()
+                if resume:
+                    texts.append(resume)
+                if len(texts) >= n:
+                    break
+    if len(texts) < n:
+        texts.extend(resume for _, resume in iter_rows(n - len(texts), seed=seed))
+    return texts
+
+
+def kendall_tau(a: List[float], b: List[float]) -> float:
+    n = len(a)
+    concordant = discordant = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            s = (a[i] - a[j]) * (b[i] - b[j])
+            if s > 0:
+                concordant += 1
+            elif s < 0:
+                discordant += 1
+    pairs = n * (n - 1) / 2
+    return (concordant - discordant) / pairs if pairs else 1.0
+
+
+def top_k_overlap(a: List[float], b: List[float], k: int) -> float:
+    top_a = set(np.argsort(a)[::-1][:k])
+    top_b = set(np.argsort(b)[::-1][:k])
+    return len(top_a & top_b) / max(1, min(k, len(a)))
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    fn()  # 预热
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def load_backends(cfg):
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from sentence_transformers import CrossEncoder
+
+    from rag_system.inference_backends import create_onnx_cross_encoder, create_onnx_embeddings
+
+    return {
+        "torch": (HuggingFaceEmbeddings(model_name=cfg.embedding_model), CrossEncoder(cfg.cross_encoder_model)),
+        "onnx": (create_onnx_embeddings(cfg), create_onnx_cross_encoder(cfg)),
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    cfg = get_config()
+    rng = random.Random(args.seed)
+    texts = load_texts(args.csv, args.docs, args.seed)
+    backends = load_backends(cfg)
+
+    # 每个查询随机抽取 pairs 份简历，截断方式与 SimpleRAG._rerank_text 一致
+    rerank_sets = [
+        [(query, text[:cfg.rerank_max_chars]) for text in rng.sample(texts, k=min(args.pairs, len(texts)))]
+        for query in BENCH_QUERIES
+    ]
+
+    outputs: Dict[str, Dict[str, Any]] = {}
+    latency: Dict[str, Dict[str, Any]] = {}
+    for name, (embeddings, cross_encoder) in backends.items():
+        doc_vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        rerank_scores = [np.asarray(cross_encoder.predict(pairs), dtype=np.float32).tolist() for pairs in rerank_sets]
+        outputs[name] = {"doc_vectors": doc_vectors, "rerank_scores": rerank_scores}
+
+        batch = texts[:args.batch]
+        queries = iter(BENCH_QUERIES * (args.repeat + 1))
+        latency[name] = {
+            "embed_query": timed(lambda: embeddings.embed_query(next(queries)), args.repeat),
+            f"embed_documents_{len(batch)}": timed(lambda: embeddings.embed_documents(batch), args.repeat),
+            f"rerank_{args.pairs}_pairs": timed(lambda: cross_encoder.predict(rerank_sets[0]), args.repeat),
+        }
+
+    a, b = outputs["torch"]["doc_vectors"], outputs["onnx"]["doc_vectors"]
+    cosine = (a * b).sum(axis=1) / np.clip(np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1), 1e-12, None)
+    taus = [kendall_tau(x, y) for x, y in zip(outputs["torch"]["rerank_scores"], outputs["onnx"]["rerank_scores"])]
+    overlaps = [top_k_overlap(x, y, args.top_k)
+                for x, y in zip(outputs["torch"]["rerank_scores"], outputs["onnx"]["rerank_scores"])]
+
+    parity = {
+        "embedding_cosine_mean": float(cosine.mean()),
+        "embedding_cosine_min": float(cosine.min()),
+        "rerank_kendall_tau_mean": float(np.mean(taus)),
+        "rerank_kendall_tau_min": float(np.min(taus)),
+        f"rerank_top{args.top_k}_overlap_mean": float(np.mean(overlaps)),
+        f"rerank_top{args.top_k}_overlap_min": float(np.min(overlaps)),
+    }
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "embedding_model": cfg.embedding_model,
+            "cross_encoder_model": cfg.cross_encoder_model,
+            "onnx_quantize": cfg.onnx_quantize,
+            "docs": len(texts),
+            "pairs_per_query": args.pairs,
+        },
+        "parity": parity,
+        "latency": latency,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PyTorch / ONNX 推理后端一致性与延迟对比")
+    parser.add_argument("--csv", type=Path, default=DEFAULT_CSV)
+    parser.add_argument("--docs", type=int, default=200, help="参与嵌入一致性比较的简历数量")
+    parser.add_argument("--pairs", type=int, default=20, help="每个查询的重排序候选数（与 retrieval_top_n 对应）")
+    parser.add_argument("--batch", type=int, default=32, help="批量嵌入延迟测量的批大小")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="逐条嵌入余弦相似度下限")
+    parser.add_argument("--min-overlap", type=float, default=0.8, help="重排序 top-k 平均重合率下限")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "inference.json")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    parity = results["parity"]
+    print("[inference] 一致性:")
+    for key, value in parity.items():
+        print(f"  {key:<32}{value:>8.4f}")
+    print("[inference] 延迟 (p50 / p95 ms):")
+    for name, metrics in results["latency"].items():
+        for label, stats in metrics.items():
+            print(f"  {name:<6}{label:<28}{stats['p50_ms']:>8.1f}{stats['p95_ms']:>8.1f}")
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[inference] 结果已写入 {args.out}")
+
+    failures = []
+    if parity["embedding_cosine_min"] < args.min_cosine:
+        failures.append(f"嵌入余弦相似度最小值 {parity['embedding_cosine_min']:.4f} < {args.min_cosine}")
+    if parity[f"rerank_top{args.top_k}_overlap_mean"] < args.min_overlap:
+        failures.append(f"重排序 top{args.top_k} 平均重合率 "
+                        f"{parity[f'rerank_top{args.top_k}_overlap_mean']:.3f} < {args.min_overlap}")
+    for line in failures:
+        print(f"[inference] 失败: {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
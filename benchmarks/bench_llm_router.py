@@ -0,0 +1,124 @@
+"""
+大模型路由（对冲请求 + 故障转移）的尾延迟基准。
+
+用模拟供应商代替真实接口：首 token 延迟大部分时间稳定，少量请求落入长尾，另有一定比例返回 429。
+分别测量只用首选供应商（不重试）与经 LLMRouter 调用时的成功率、端到端延迟 p50/p95/p99，
+以及对冲带来的额外请求比例。
+
+用法:
+    python -m benchmarks.bench_llm_router --requests 300 --concurrency 8
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.bench_pipeline import RESULTS_DIR, percentiles
+from benchmarks.stubs import StubMessage, canned_scoring_response
+from rag_system.llm_router import LLMRouter
+
+
+class SimulatedRateLimitError(Exception):
+    status_code = 429
+
+
+class SimulatedProvider:
+    """模拟供应商：首 token 延迟 = base ± 抖动，tail_rate 的请求额外等待 tail_s，error_rate 的请求返回 429"""
+
+    def __init__(self, base_s: float, tail_rate: float, tail_s: float, error_rate: float, seed: int):
+        self.base_s = base_s
+        self.tail_rate = tail_rate
+        self.tail_s = tail_s
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def stream(self, prompt: str, **kwargs):
+        with self._lock:
+            self.calls += 1
+            delay = self.base_s * self.rng.uniform(0.8, 1.2)
+            tail = self.rng.random() < self.tail_rate
+            fail = self.rng.random() < self.error_rate
+        time.sleep(delay + (self.tail_s if tail else 0.0))
+        if fail:
+            raise SimulatedRateLimitError("429 Too Many Requests")
+        text = canned_scoring_response(prompt)
+        for start in range(0, len(text), 64):
+            yield StubMessage(text[start:start + 64])
+
+
+def run_load(llm, prompts: List[str], concurrency: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    failures = 0
+    lock = threading.Lock()
+
+    def call(prompt: str):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            "".join(chunk.content for chunk in llm.stream(prompt))
+        except Exception:  # noqa: BLE001
+            with lock:
+                failures += 1
+            return
+        with lock:
+            samples.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, prompts))
+    return {"success_rate": len(samples) / len(prompts), **percentiles(samples)}
+
+
+def make_providers(args) -> Dict[str, SimulatedProvider]:
+    return {
+        "gemini": SimulatedProvider(args.base_ms / 1000, args.tail_rate, args.tail_ms / 1000, args.error_rate, 1),
+        "qwen": SimulatedProvider(args.base_ms * 1.3 / 1000, args.tail_rate, args.tail_ms / 1000, args.error_rate, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="大模型对冲请求与故障转移基准（模拟供应商）")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--base-ms", type=float, default=100.0, help="首选供应商的典型首 token 延迟")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="落入长尾的请求比例")
+    parser.add_argument("--tail-ms", type=float, default=1500.0, help="长尾请求的额外延迟")
+    parser.add_argument("--error-rate", type=float, default=0.03, help="返回 429 的请求比例")
+    parser.add_argument("--hedge-delay-ms", type=float, default=300.0, help="样本不足时的对冲等待")
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "llm_router.json")
+    args = parser.parse_args(argv)
+
+    prompts = [f"岗位要求 {i}\n候选人1:\n简历内容" for i in range(args.requests)]
+
+    single = make_providers(args)["gemini"]
+    direct = run_load(single, prompts, args.concurrency)
+
+    providers = make_providers(args)
+    router = LLMRouter(list(providers.items()), hedge=True, hedge_delay_s=args.hedge_delay_ms / 1000,
+                       min_hedge_delay_s=0.05, cooldown_s=0.5)
+    routed = run_load(router, prompts, args.concurrency)
+    calls = sum(p.calls for p in providers.values())
+    routed["extra_request_ratio"] = calls / args.requests - 1
+    routed["router"] = router.metrics()
+
+    results = {"args": {k: v for k, v in vars(args).items() if k != "out"}, "direct": direct, "router": routed}
+    for name, stats in (("只用首选供应商", direct), ("对冲 + 故障转移", routed)):
+        print(f"[llm-router] {name}: 成功率 {stats['success_rate']:.1%}，p50={stats['p50_ms']:.0f}ms "
+              f"p95={stats['p95_ms']:.0f}ms p99={stats['p99_ms']:.0f}ms")
+    print(f"[llm-router] 额外请求比例 {routed['extra_request_ratio']:.1%}，对冲 {routed['router']['hedged_requests']} 次，"
+          f"故障转移 {routed['router']['failovers']} 次")
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[llm-router] 结果已写入 {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+检索与评分管线的离线基准测试。
+
+在 1k/10k/100k 行的合成简历数据上测量：索引构建耗时、SimpleRAG.search 在开启/关闭重排序时的
+p50/p95/p99 延迟、内存占用，以及使用本地桩大模型时 /api/score 的端到端吞吐。
+结果写为 JSON，可与基线结果对比以发现性能回退。
+
+用法:
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 --out benchmarks/results/latest.json
+    python -m benchmarks.bench_pipeline --sizes 1000 --baseline benchmarks/results/baseline.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.stubs import HashEmbeddings, StubChatModel
+from benchmarks.synthetic import BENCH_QUERIES, write_corpus
+from config import get_config
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DATA_DIR = Path(__file__).parent / "data"
+
+# 与基线对比时，这些指标越大越差；throughput 类指标越小越差
+_LOWER_IS_BETTER = ("_s", "_ms", "_mb")
+_HIGHER_IS_BETTER = ("_rps",)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """延迟分位数（毫秒）"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+    return {
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+    }
+
+
+def rss_mb() -> float:
+    """当前进程常驻内存（MB），Linux 读取 /proc，其余平台退回峰值内存"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽管线中的大量调试输出，避免终端IO计入测量结果"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_index(csv_path: Path, cfg, embedder: str, llm) -> Dict[str, Any]:
+    """构建索引并记录各阶段耗时与内存增量"""
+    from rag_system.llama_rag_system import SimpleRAG
+
+    embeddings = HashEmbeddings() if embedder == "hash" else None
+    before = rss_mb()
+    start = time.perf_counter()
+    with quiet():
+        rag = SimpleRAG(str(csv_path), cfg=cfg, llm=llm, embeddings=embeddings)
+        # 交叉编码器默认延迟到首次重排序才加载，这里计入索引阶段，避免污染搜索延迟
+        rag.load_cross_encoder()
+    total = time.perf_counter() - start
+    metrics = {
+        "index_total_s": total,
+        **{f"index_{name}": value for name, value in rag.timings.items()},
+        "documents": len(rag.documents),
+        "rss_after_index_mb": rss_mb(),
+        "rss_delta_index_mb": rss_mb() - before,
+        "has_cross_encoder": rag.cross_encoder is not None,
+    }
+    return {"rag": rag, "metrics": metrics}
+
+
+def bench_search(rag, queries: List[str], iterations: int, top_k: int, use_rerank: bool) -> Dict[str, float]:
+    """对 SimpleRAG.search 做顺序调用，测量单请求延迟分布"""
+    with quiet():
+        rag.search(queries[0], top_k=top_k, use_rerank=use_rerank)  # 预热
+    samples = []
+    for i in range(iterations):
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        with quiet():
+            rag.search(query, top_k=top_k, use_rerank=use_rerank)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def _start_server(app) -> Tuple[Any, str]:
+    import uvicorn
+    from app.port_utils import find_free_port
+
+    port = find_free_port(18080)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def bench_api(rag, requests_count: int, concurrency: int, top_n: int) -> Dict[str, float]:
+    """启动真实的 HTTP 服务（桩大模型），并发调用 /api/score 测量端到端吞吐"""
+    import app.service as service
+    from app.backend import create_app
+
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub-key")
+    service.rag_system = rag
+    with quiet():
+        app = create_app()
+    server, base_url = _start_server(app)
+    # 与负载均衡一致：预热完成（/health/ready 返回 200）后再开始计时
+    deadline = time.time() + 300
+    while time.time() < deadline and requests.get(f"{base_url}/health/ready", timeout=10).status_code != 200:
+        time.sleep(0.1)
+
+    def call(i: int) -> float:
+        payload = {
+            "job_title": f"基准岗位{i % 7}",
+            "requirements": BENCH_QUERIES[i % len(BENCH_QUERIES)],
+            "top_n": top_n,
+        }
+        start = time.perf_counter()
+        response = requests.post(f"{base_url}/api/score", json=payload, timeout=300)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        with quiet(), ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(call, range(requests_count)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+
+    return {"api_throughput_rps": requests_count / elapsed, "concurrency": concurrency, **{
+        f"api_{k}": v for k, v in percentiles(samples).items()
+    }}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """与基线对比，返回超出容忍度的回退项"""
+    regressions = []
+    for size, metrics in current.get("runs", {}).items():
+        base_metrics = baseline.get("runs", {}).get(size, {})
+        for name, value in metrics.items():
+            base = base_metrics.get(name)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if not isinstance(base, (int, float)) or base <= 0:
+                continue
+            if name.endswith(_LOWER_IS_BETTER) and value > base * (1 + tolerance):
+                regressions.append(f"[{size}] {name}: {base:.3f} -> {value:.3f} (+{(value / base - 1) * 100:.1f}%)")
+            elif name.endswith(_HIGHER_IS_BETTER) and value < base * (1 - tolerance):
+                regressions.append(f"[{size}] {name}: {base:.3f} -> {value:.3f} ({(value / base - 1) * 100:.1f}%)")
+    return regressions
+
+
+def run(args) -> Dict[str, Any]:
+    cfg = get_config()
+    if args.no_dedupe:
+        cfg = replace(cfg, dedupe=False)
+    llm = StubChatModel(latency_s=args.llm_latency)
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "embedder": args.embedder,
+            "profile": cfg.profile_summary(),
+            "llm_latency_s": args.llm_latency,
+        },
+        "runs": {},
+    }
+
+    for size in args.sizes:
+        print(f"[bench] 数据规模 {size} 行")
+        csv_path = write_corpus(DATA_DIR / f"synthetic_{size}.csv", size, seed=args.seed)
+        built = bench_index(csv_path, cfg, args.embedder, llm)
+        rag, metrics = built["rag"], built["metrics"]
+        print(f"[bench]   索引构建 {metrics['index_total_s']:.2f}s, 文档 {metrics['documents']}")
+
+        for use_rerank in (False, True):
+            label = "search_rerank" if use_rerank else "search_norerank"
+            latency = bench_search(rag, BENCH_QUERIES, args.queries, args.top_k, use_rerank)
+            metrics.update({f"{label}_{k}": v for k, v in latency.items()})
+            print(f"[bench]   {label}: p50={latency['p50_ms']:.1f}ms p95={latency['p95_ms']:.1f}ms "
+                  f"p99={latency['p99_ms']:.1f}ms")
+
+        if args.api_requests > 0:
+            api = bench_api(rag, args.api_requests, args.concurrency, args.top_k)
+            metrics.update(api)
+            print(f"[bench]   /api/score: {api['api_throughput_rps']:.2f} req/s, "
+                  f"p95={api['api_p95_ms']:.1f}ms")
+
+        metrics["rss_peak_mb"] = rss_mb()
+        results["runs"][str(size)] = metrics
+        del rag, built
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="检索与评分管线离线基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=50, help="每种检索配置的查询次数")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embedder", choices=["hf", "hash"], default="hf",
+                        help="hf: 配置中的嵌入模型；hash: 特征哈希（只测索引结构开销）")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="桩大模型的固定延迟（秒）")
+    parser.add_argument("--api-requests", type=int, default=40, help="/api/score 请求数，0 表示跳过")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-dedupe", action="store_true", help="关闭入库去重（合成数据模板化程度较高）")
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "latest.json")
+    parser.add_argument("--baseline", type=Path, help="基线结果JSON，用于检测回退")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的相对回退幅度")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[bench] 结果已写入 {args.out}")
+
+    if args.baseline and args.baseline.exists():
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            print("[bench] 检测到性能回退:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("[bench] 与基线相比无回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+分片检索的扩展性基准。
+
+在同一份合成简历库上依次以 1、2、4…… 个本地分片进程启动分片检索，测量：
+- 索引构建耗时（各分片并行构建，取最慢的分片）；
+- 单请求召回延迟 p50/p95（协调进程扇出 + 合并，不含重排序）；
+- 固定并发下的吞吐（查询/秒）。
+
+默认 100 万份简历、特征哈希嵌入（排除神经网络嵌入的耗时，单独测量 FAISS/BM25 随语料规模的开销）。
+百万级语料每个分片进程需要数 GB 内存，可用 --rows 缩小规模快速验证。
+
+用法:
+    python -m benchmarks.bench_sharding --rows 1000000 --shards 1 2 4 8 --concurrency 8
+"""
+import argparse
+import dataclasses
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.bench_pipeline import DATA_DIR, RESULTS_DIR, percentiles
+from benchmarks.synthetic import BENCH_QUERIES, write_corpus
+from config import get_config
+from rag_system.sharding import ShardedSearch, start_local_shards, stop_local_shards
+
+
+def bench_shard_count(csv_path: Path, count: int, cfg, args) -> dict:
+    start = time.perf_counter()
+    processes, addresses, authkey = start_local_shards(str(csv_path), count, cfg, embedder=args.embedder,
+                                                       base_port=args.base_port)
+    startup = time.perf_counter() - start
+    search = ShardedSearch(addresses, authkey, timeout_s=cfg.shard_timeout_s)
+    try:
+        infos = search.info()
+        queries = [BENCH_QUERIES[i % len(BENCH_QUERIES)] for i in range(args.queries)]
+        search.search(queries[0], cfg.retrieval_top_n)  # 建立连接，首个查询不计入
+
+        latencies = []
+        for query in queries:
+            query_start = time.perf_counter()
+            search.search(query, cfg.retrieval_top_n)
+            latencies.append(time.perf_counter() - query_start)
+
+        # 固定并发：每个线程循环发起召回，统计总完成数
+        done = [0] * args.concurrency
+
+        def worker(slot: int):
+            for i in range(args.queries):
+                search.search(queries[(i + slot) % len(queries)], cfg.retrieval_top_n)
+                done[slot] += 1
+
+        threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(args.concurrency)]
+        load_start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        throughput = sum(done) / (time.perf_counter() - load_start)
+    finally:
+        search.close()
+        stop_local_shards(processes)
+
+    build = [info.get("timings", {}) for info in infos]
+    return {
+        "shards": count,
+        "documents_per_shard": [info.get("documents") for info in infos],
+        "startup_s": startup,
+        "build_s": max(t.get("load_data_s", 0.0) + t.get("build_retriever_s", 0.0) for t in build),
+        "latency": percentiles(latencies),
+        "throughput_qps": throughput,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="分片检索扩展性基准（合成简历）")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="合成简历数")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4], help="依次测试的分片数")
+    parser.add_argument("--queries", type=int, default=20, help="每种分片数的查询次数（并发测试中每个线程同样次数）")
+    parser.add_argument("--concurrency", type=int, default=4, help="吞吐测试的并发请求数")
+    parser.add_argument("--embedder", choices=["hash", "model"], default="hash")
+    parser.add_argument("--base-port", type=int, default=7300)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "sharding.json")
+    args = parser.parse_args(argv)
+
+    csv_path = write_corpus(DATA_DIR / f"synthetic_{args.rows}.csv", args.rows)
+    # 只测召回：分片进程本就不加载交叉编码器，去重和档案与分片数无关
+    cfg = dataclasses.replace(get_config(), dedupe=False, use_profiles=False, micro_batch=False)
+
+    runs = []
+    for count in args.shards:
+        run = bench_shard_count(csv_path, count, cfg, args)
+        runs.append(run)
+        print(f"[sharding] {count} 个分片: 构建 {run['build_s']:.1f}s，"
+              f"p50={run['latency']['p50_ms']:.0f}ms p95={run['latency']['p95_ms']:.0f}ms，"
+              f"并发 {args.concurrency} 吞吐 {run['throughput_qps']:.1f} 查询/秒")
+
+    results = {"args": {k: v for k, v in vars(args).items() if k != "out"}, "runs": runs}
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[sharding] 结果已写入 {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+检索质量与速度评估。
+
+读取带标注的查询集（查询 -> 相关简历ID 或 相关类别，CSV 中的 Category 可作为弱标注），
+对 SimpleRAG 的各检索配置（仅BM25、仅向量、混合、混合+重排序）计算 recall@k、MRR、nDCG@k
+以及单次查询延迟，用数据选择速度与质量的折中。
+
+查询集为 JSON 数组，每项形如:
+    {"query": "...", "relevant_ids": [12, 57], "relevant_categories": ["Data Science"]}
+两种标注可任选其一或同时给出；未提供查询集时按数据集中的每个类别自动生成弱标注查询。
+
+用法:
+    python -m benchmarks.eval_retrieval --queries benchmarks/queries.json --k 5 10
+    python -m benchmarks.eval_retrieval --synthetic 10000 --embedder hash --out benchmarks/results/eval.json
+"""
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from benchmarks.bench_pipeline import DATA_DIR, RESULTS_DIR, bench_index, percentiles, quiet
+from benchmarks.stubs import StubChatModel
+from benchmarks.synthetic import CATEGORY_SKILLS, write_corpus
+from config import get_config
+
+DEFAULT_CSV = Path("rag_system/UpdatedResumeDataSet.csv")
+
+# 配置名 -> (检索模式, 是否重排序)
+RETRIEVER_CONFIGS: Dict[str, Tuple[str, bool]] = {
+    "bm25": ("bm25", False),
+    "vector": ("vector", False),
+    "ensemble": ("ensemble", False),
+    "ensemble+rerank": ("ensemble", True),
+}
+
+
+def load_queries(path: Path) -> List[Dict[str, Any]]:
+    """读取标注查询集并校验格式"""
+    items = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(items, list):
+        raise ValueError("查询集必须是JSON数组")
+    queries = []
+    for i, item in enumerate(items):
+        if not item.get("query"):
+            raise ValueError(f"第 {i + 1} 条查询缺少 query 字段")
+        if not item.get("relevant_ids") and not item.get("relevant_categories"):
+            raise ValueError(f"第 {i + 1} 条查询缺少 relevant_ids 或 relevant_categories")
+        queries.append(item)
+    return queries
+
+
+def weak_label_queries(categories: Iterable[str]) -> List[Dict[str, Any]]:
+    """按类别生成弱标注查询：类别名本身，以及（已知技能的类别）技能组合查询"""
+    queries = []
+    for category in sorted(set(categories)):
+        queries.append({"query": category, "relevant_categories": [category]})
+        skills = CATEGORY_SKILLS.get(category)
+        if skills:
+            queries.append({"query": " ".join(skills[:4]), "relevant_categories": [category]})
+    return queries
+
+
+def _canonical_ids(rag) -> Dict[Any, Any]:
+    """原始行ID -> 去重后保留文档的ID，使被合并的重复简历也能匹配标注"""
+    mapping = {}
+    for doc in rag.documents:
+        doc_id = doc.metadata.get("id")
+        mapping[doc_id] = doc_id
+        for duplicate_id in doc.metadata.get("duplicate_ids", []):
+            mapping[duplicate_id] = doc_id
+    return mapping
+
+
+def relevant_set(item: Dict[str, Any], rag, canonical: Dict[Any, Any]) -> Set[Any]:
+    """一条查询在当前索引中的相关文档ID集合"""
+    relevant = {canonical[i] for i in item.get("relevant_ids", []) if i in canonical}
+    categories = set(item.get("relevant_categories", []))
+    if categories:
+        relevant.update(
+            doc.metadata.get("id") for doc in rag.documents if doc.metadata.get("category") in categories
+        )
+    return relevant
+
+
+def recall_at_k(ranked: List[Any], relevant: Set[Any], k: int) -> float:
+    """前k个结果覆盖的相关文档比例；分母取 min(|相关|, k)，避免大类别下召回率恒接近0"""
+    if not relevant:
+        return 0.0
+    hits = sum(1 for doc_id in ranked[:k] if doc_id in relevant)
+    return hits / min(len(relevant), k)
+
+
+def reciprocal_rank(ranked: List[Any], relevant: Set[Any]) -> float:
+    for rank, doc_id in enumerate(ranked, start=1):
+        if doc_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: List[Any], relevant: Set[Any], k: int) -> float:
+    """二值相关性的 nDCG@k"""
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, doc_id in enumerate(ranked[:k], start=1) if doc_id in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def evaluate_config(rag, queries: List[Dict[str, Any]], mode: str, use_rerank: bool,
+                    ks: List[int]) -> Dict[str, Any]:
+    """对一种检索配置跑完整查询集，返回平均指标与延迟分位数"""
+    canonical = _canonical_ids(rag)
+    top_k = max(ks)
+    with quiet():
+        rag.search(queries[0]["query"], top_k=top_k, use_rerank=use_rerank, mode=mode)  # 预热
+    samples, rr, per_query = [], [], []
+    recalls: Dict[int, List[float]] = {k: [] for k in ks}
+    ndcgs: Dict[int, List[float]] = {k: [] for k in ks}
+    for item in queries:
+        relevant = relevant_set(item, rag, canonical)
+        start = time.perf_counter()
+        with quiet():
+            results = rag.search(item["query"], top_k=top_k, use_rerank=use_rerank, mode=mode)
+        samples.append(time.perf_counter() - start)
+        ranked = [r["id"] for r in results]
+        rr.append(reciprocal_rank(ranked, relevant))
+        for k in ks:
+            recalls[k].append(recall_at_k(ranked, relevant, k))
+            ndcgs[k].append(ndcg_at_k(ranked, relevant, k))
+        per_query.append({"query": item["query"], "relevant": len(relevant), "returned": len(ranked),
+                          "rr": rr[-1]})
+
+    metrics: Dict[str, Any] = {"mrr": statistics.fmean(rr)}
+    for k in ks:
+        metrics[f"recall@{k}"] = statistics.fmean(recalls[k])
+        metrics[f"ndcg@{k}"] = statistics.fmean(ndcgs[k])
+    metrics.update(percentiles(samples))
+    metrics["per_query"] = per_query
+    return metrics
+
+
+def run(args) -> Dict[str, Any]:
+    cfg = get_config()
+    if args.synthetic:
+        csv_path = write_corpus(DATA_DIR / f"synthetic_{args.synthetic}.csv", args.synthetic, seed=args.seed)
+    else:
+        csv_path = args.csv
+    built = bench_index(csv_path, cfg, args.embedder, StubChatModel())
+    rag = built["rag"]
+    if max(args.k) > rag.top_n:
+        print(f"[eval] 注意: k={max(args.k)} 大于单路检索数量 top_n={rag.top_n}，单路检索最多返回 {rag.top_n} 个结果")
+
+    if args.queries:
+        queries = load_queries(args.queries)
+    else:
+        queries = weak_label_queries(doc.metadata.get("category") for doc in rag.documents)
+    print(f"[eval] 文档 {len(rag.documents)}，查询 {len(queries)}，"
+          f"类别分布 {dict(Counter(doc.metadata.get('category') for doc in rag.documents).most_common(3))} ...")
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "csv": str(csv_path),
+            "queries": str(args.queries) if args.queries else "weak-labels",
+            "embedder": args.embedder,
+            "k": args.k,
+            "profile": cfg.profile_summary(),
+            "documents": len(rag.documents),
+        },
+        "configs": {},
+    }
+    for name in args.configs:
+        mode, use_rerank = RETRIEVER_CONFIGS[name]
+        if mode == "vector" and rag.vector_retriever is None:
+            print(f"[eval] 跳过 {name}: 向量检索器不可用")
+            continue
+        if use_rerank and rag.load_cross_encoder() is None:
+            print(f"[eval] 注意: {name} 未加载交叉编码器，重排序将退化为检索顺序")
+        results["configs"][name] = evaluate_config(rag, queries, mode, use_rerank, args.k)
+
+    k = max(args.k)
+    print(f"\n{'配置':<18}{'MRR':>8}{f'R@{k}':>8}{f'nDCG@{k}':>9}{'p50(ms)':>10}{'p95(ms)':>10}")
+    for name, metrics in results["configs"].items():
+        print(f"{name:<18}{metrics['mrr']:>8.3f}{metrics[f'recall@{k}']:>8.3f}{metrics[f'ndcg@{k}']:>9.3f}"
+              f"{metrics['p50_ms']:>10.1f}{metrics['p95_ms']:>10.1f}")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="检索质量与速度评估")
+    parser.add_argument("--csv", type=Path, default=DEFAULT_CSV, help="简历数据集CSV")
+    parser.add_argument("--synthetic", type=int, default=0, help="改用指定行数的合成数据集")
+    parser.add_argument("--queries", type=Path, help="标注查询集JSON，缺省时按类别生成弱标注")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--configs", nargs="+", choices=list(RETRIEVER_CONFIGS), default=list(RETRIEVER_CONFIGS))
+    parser.add_argument("--embedder", choices=["hf", "hash"], default="hf")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "eval.json")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[eval] 结果已写入 {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+本地 OpenAI 兼容的假大模型服务，用于在不访问付费服务的情况下压测 /api/score。
+
+支持可配置的延迟分布、按比例注入 429 / 5xx 错误，并根据提示词中的候选人ID返回格式正确的评分JSON。
+
+用法:
+    python -m benchmarks.fake_llm_server --port 9009 --latency lognormal --median-ms 800 --rate-429 0.05
+    # 后端指向该服务
+    Gemini_Base_Url=http://127.0.0.1:9009/v1 Gemini_Api_Key=fake Gemini_Model_Name=fake-scorer python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.stubs import canned_scoring_response
+
+
+@dataclass
+class FakeLLMSettings:
+    latency: str = "lognormal"  # fixed | uniform | lognormal
+    median_ms: float = 800.0  # fixed/lognormal 的中位延迟
+    min_ms: float = 200.0  # uniform 下限
+    max_ms: float = 2000.0  # uniform 上限
+    sigma: float = 0.5  # lognormal 形状参数，越大长尾越明显
+    rate_429: float = 0.0  # 注入 429 的比例
+    rate_5xx: float = 0.0  # 注入 503 的比例
+    retry_after_s: int = 1
+    chunk_chars: int = 32  # 流式输出时每块的字符数
+    seed: int = 0
+    stats: Dict[str, int] = field(default_factory=lambda: {"requests": 0, "ok": 0, "429": 0, "5xx": 0})
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+        self.lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        """按配置的分布采样一次延迟（秒）"""
+        with self.lock:
+            if self.latency == "fixed":
+                ms = self.median_ms
+            elif self.latency == "uniform":
+                ms = self.rng.uniform(self.min_ms, self.max_ms)
+            else:
+                ms = self.median_ms * self.rng.lognormvariate(0.0, self.sigma)
+        return ms / 1000
+
+    def sample_error(self) -> int:
+        """按比例决定本次请求是否注入错误，返回状态码（0 表示正常）"""
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.rate_5xx:
+            return 503
+        return 0
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+
+def _prompt_text(body: Dict[str, Any]) -> str:
+    messages = body.get("messages") or []
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+        parts.append(str(content or ""))
+    return "\n".join(parts)
+
+
+def create_fake_llm_app(settings: FakeLLMSettings) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI-compatible LLM")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake-scorer", "object": "model", "owned_by": "local"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return dict(settings.stats)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        settings.count("requests")
+        await asyncio.sleep(settings.sample_latency())
+
+        status = settings.sample_error()
+        if status == 429:
+            settings.count("429")
+            return JSONResponse(
+                status_code=429,
+                headers={"Retry-After": str(settings.retry_after_s)},
+                content={"error": {"message": "Rate limit exceeded", "type": "rate_limit_error", "code": 429}},
+            )
+        if status:
+            settings.count("5xx")
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": "Service unavailable", "type": "server_error", "code": status}},
+            )
+
+        settings.count("ok")
+        model = body.get("model") or "fake-scorer"
+        content = canned_scoring_response(_prompt_text(body))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        usage = {"prompt_tokens": len(_prompt_text(body)) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        async def events():
+            def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for start in range(0, len(content), settings.chunk_chars):
+                yield chunk({"content": content[start:start + settings.chunk_chars]})
+                await asyncio.sleep(0)
+            yield chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容假大模型服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9009)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--median-ms", type=float, default=800.0)
+    parser.add_argument("--min-ms", type=float, default=200.0)
+    parser.add_argument("--max-ms", type=float, default=2000.0)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    settings = FakeLLMSettings(
+        latency=args.latency, median_ms=args.median_ms, min_ms=args.min_ms, max_ms=args.max_ms,
+        sigma=args.sigma, rate_429=args.rate_429, rate_5xx=args.rate_5xx,
+        retry_after_s=args.retry_after, seed=args.seed,
+    )
+    print(f"[fake-llm] 运行在 http://{args.host}:{args.port}/v1 ({args.latency}, 429={args.rate_429}, "
+          f"5xx={args.rate_5xx})")
+    uvicorn.run(create_fake_llm_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+/api/score 压测工具：按目标 QPS 开环发压（请求按泊松或固定间隔发出，不等待前一个请求返回），
+统计实际吞吐、延迟分位数与状态码分布，用于测量并发上限、重试行为和长尾延迟。
+
+用法（配合 benchmarks.fake_llm_server）:
+    python -m benchmarks.loadgen --url http://127.0.0.1:8000 --qps 5 --duration 60 --out benchmarks/results/load.json
+
+验证准入控制时，同时运行一个突发的批量压测和一个低 QPS 的交互压测，对比后者的延迟
+（优先级由后端判定，交互压测需携带与后端 ADMISSION_FRONTEND_TOKEN 一致的前端密钥）:
+    python -m benchmarks.loadgen --qps 20 &
+    python -m benchmarks.loadgen --qps 0.5 --frontend-token "$ADMISSION_FRONTEND_TOKEN"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from benchmarks.bench_pipeline import percentiles
+from benchmarks.synthetic import BENCH_QUERIES
+
+# 与前端岗位模板对应的岗位名称
+_JOB_TITLES = ["高级数据科学家", "产品经理", "前端工程师", "Java开发工程师", "测试工程师", "运维工程师"]
+
+
+def build_payload(i: int, top_n: int, same_payload: bool) -> Dict[str, Any]:
+    """same_payload 模拟多人同时打开同一岗位模板的突发流量"""
+    if same_payload:
+        i = 0
+    return {
+        "job_title": _JOB_TITLES[i % len(_JOB_TITLES)],
+        "requirements": BENCH_QUERIES[i % len(BENCH_QUERIES)],
+        "top_n": top_n,
+    }
+
+
+def run_load(url: str, qps: float, duration_s: float, top_n: int = 5, timeout_s: float = 300.0,
+             max_in_flight: int = 256, arrival: str = "poisson", same_payload: bool = False,
+             seed: int = 0, frontend_token: Optional[str] = None) -> Dict[str, Any]:
+    """开环发压并汇总结果；给出 frontend_token 时以前端身份发请求，后端按 interactive 优先级处理"""
+    rng = random.Random(seed)
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=max_in_flight, pool_maxsize=max_in_flight)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    lock = threading.Lock()
+    latencies: List[float] = []
+    ok_latencies: List[float] = []
+    statuses: Counter = Counter()
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    dropped = 0
+
+    def call(i: int):
+        payload = build_payload(i, top_n, same_payload)
+        headers = {"X-Frontend-Token": frontend_token} if frontend_token else None
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{url.rstrip('/')}/api/score", json=payload, headers=headers, timeout=timeout_s)
+            status = str(response.status_code)
+        except requests.Timeout:
+            status = "timeout"
+        except requests.RequestException:
+            status = "error"
+        finally:
+            in_flight.release()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] += 1
+            if status == "200":
+                ok_latencies.append(elapsed)
+
+    started = time.perf_counter()
+    sent = 0
+    next_at = started
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        while next_at - started < duration_s:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # 达到在途上限时丢弃本次请求并计数，保持发压节奏不被慢请求拖住
+            if in_flight.acquire(blocking=False):
+                pool.submit(call, sent)
+                sent += 1
+            else:
+                dropped += 1
+            interval = rng.expovariate(qps) if arrival == "poisson" else 1.0 / qps
+            next_at += interval
+    elapsed = time.perf_counter() - started
+
+    return {
+        "target_qps": qps,
+        "duration_s": duration_s,
+        "sent": sent,
+        "dropped_client_side": dropped,
+        "achieved_rps": sent / elapsed if elapsed else 0.0,
+        "ok_rps": statuses.get("200", 0) / elapsed if elapsed else 0.0,
+        "statuses": dict(statuses),
+        "latency_all": percentiles(latencies),
+        "latency_ok": percentiles(ok_latencies),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="/api/score 开环压测")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--qps", type=float, nargs="+", default=[1.0], help="可给多个QPS逐级加压")
+    parser.add_argument("--duration", type=float, default=30.0, help="每个QPS级别的持续时间（秒）")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--arrival", choices=["poisson", "fixed"], default="poisson")
+    parser.add_argument("--same-payload", action="store_true", help="所有请求使用相同的岗位与要求")
+    parser.add_argument("--frontend-token", help="携带前端密钥（后端的 ADMISSION_FRONTEND_TOKEN），模拟 interactive 请求")
+    parser.add_argument("--out", type=Path, help="结果JSON输出路径")
+    args = parser.parse_args(argv)
+
+    levels = []
+    for qps in args.qps:
+        print(f"[load] 目标 {qps} QPS，持续 {args.duration}s ...")
+        result = run_load(args.url, qps, args.duration, args.top_n, args.timeout, args.max_in_flight,
+                          args.arrival, args.same_payload, frontend_token=args.frontend_token)
+        ok = result["latency_ok"]
+        print(f"[load]   实际 {result['achieved_rps']:.2f} req/s，成功 {result['ok_rps']:.2f} req/s，"
+              f"状态 {result['statuses']}，p50={ok.get('p50_ms', 0):.0f}ms p99={ok.get('p99_ms', 0):.0f}ms")
+        levels.append(result)
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps({"url": args.url, "levels": levels}, ensure_ascii=False, indent=2),
+                            encoding="utf-8")
+        print(f"[load] 结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
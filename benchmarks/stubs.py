@@ -0,0 +1,102 @@
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag_system.snippets import tokenize
+
+_CANDIDATE_ID_RE = re.compile(r"候选人\d+ \(ID: ([^,]+),")
+
+
+def _stable_score(key: str, low: float = 3.0, high: float = 9.5) -> float:
+    """按候选人ID生成确定性的分数，保证多次运行结果可比"""
+    digest = int(hashlib.md5(key.encode("utf-8")).hexdigest()[:8], 16)
+    return round(low + (high - low) * (digest / 0xFFFFFFFF), 1)
+
+
+def canned_scoring_response(prompt: str) -> str:
+    """根据评分提示词中的候选人ID生成格式正确的评分JSON数组"""
+    ids = _CANDIDATE_ID_RE.findall(prompt) or ["1"]
+    results = []
+    for candidate_id in ids:
+        overall = _stable_score(candidate_id)
+        results.append({
+            "candidate_id": candidate_id,
+            "technical_score": _stable_score(candidate_id + ":tech"),
+            "experience_score": _stable_score(candidate_id + ":exp"),
+            "overall_score": overall,
+            "years_experience": int(_stable_score(candidate_id + ":years", 0, 15)),
+            "skills": "Python,SQL,机器学习",
+            "strengths": "技能与岗位要求匹配",
+            "weaknesses": "项目经验描述较少",
+            "recommendation": "是" if overall >= 6 else "否",
+        })
+    return json.dumps(results, ensure_ascii=False, indent=2)
+
+
+class StubMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubChatModel:
+    """
+    本地桩大模型：实现 SimpleRAG 用到的 invoke/stream 接口，
+    按固定或随机延迟返回格式正确的评分结果，不访问任何远端服务。
+    """
+
+    def __init__(self, latency_s: float = 0.0, jitter_s: float = 0.0, chunk_size: int = 64,
+                 seed: Optional[int] = 0):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def _sleep(self):
+        delay = self.latency_s + (self.rng.uniform(0, self.jitter_s) if self.jitter_s else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def invoke(self, prompt: str, **kwargs) -> StubMessage:
+        self.calls += 1
+        self._sleep()
+        return StubMessage(canned_scoring_response(str(prompt)))
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[StubMessage]:
+        self.calls += 1
+        self._sleep()
+        text = canned_scoring_response(str(prompt))
+        for start in range(0, len(text), self.chunk_size):
+            yield StubMessage(text[start:start + self.chunk_size])
+
+
+class HashEmbeddings(Embeddings):
+    """
+    特征哈希嵌入：用于百万级合成数据的索引构建基准，
+    排除神经网络嵌入耗时后单独测量 FAISS/BM25 本身的开销。
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            h = int(hashlib.blake2b(token.encode("utf-8"), digest_size=4).hexdigest(), 16)
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,104 @@
+import csv
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+# 与 UpdatedResumeDataSet.csv 相同的类别，及各类别常见技能
+CATEGORY_SKILLS: Dict[str, List[str]] = {
+    "Data Science": ["Python", "pandas", "NumPy", "scikit-learn", "TensorFlow", "PyTorch", "SQL", "Spark",
+                     "NLP", "Deep Learning", "Statistics", "Tableau"],
+    "Java Developer": ["Java", "Spring Boot", "Hibernate", "Microservices", "MySQL", "Maven", "REST", "Kafka",
+                       "Docker", "JUnit"],
+    "Python Developer": ["Python", "Django", "Flask", "FastAPI", "PostgreSQL", "Redis", "Celery", "Docker",
+                         "AWS", "REST"],
+    "Web Designing": ["HTML", "CSS", "JavaScript", "React", "Vue.js", "Figma", "Photoshop", "Bootstrap",
+                      "Responsive Design", "Webpack"],
+    "HR": ["Recruitment", "Onboarding", "Payroll", "Employee Relations", "HRMS", "Training",
+           "Performance Management", "Communication"],
+    "Testing": ["Selenium", "Manual Testing", "JIRA", "Test Cases", "Automation", "Postman", "Regression",
+                "Agile", "SQL"],
+    "DevOps Engineer": ["Docker", "Kubernetes", "Jenkins", "Terraform", "AWS", "Ansible", "Linux", "CI/CD",
+                        "Prometheus", "Git"],
+    "Business Analyst": ["Requirement Gathering", "SQL", "Excel", "Power BI", "Stakeholder Management",
+                         "UML", "Agile", "Documentation"],
+    "Hadoop": ["Hadoop", "Hive", "Pig", "HDFS", "Spark", "Sqoop", "MapReduce", "HBase", "Scala"],
+    "Operations Manager": ["Operations", "Supply Chain", "Team Management", "Budgeting", "Process Improvement",
+                           "Vendor Management", "Excel"],
+}
+
+_TITLES = ["Engineer", "Senior Engineer", "Analyst", "Consultant", "Lead", "Manager", "Specialist"]
+_COMPANIES = ["Infosys", "TCS", "Wipro", "Accenture", "Capgemini", "Cognizant", "IBM", "Tech Mahindra"]
+_DEGREES = ["B.E. Computer Science", "B.Tech Information Technology", "MCA", "M.Sc Statistics", "MBA HR",
+            "B.Com", "M.Tech Data Science"]
+_PHRASES = [
+    "Worked closely with cross-functional teams to deliver projects on time.",
+    "Responsible for requirement analysis, design and implementation.",
+    "Mentored junior team members and conducted code reviews.",
+    "Improved process efficiency and reduced turnaround time.",
+    "Participated in client meetings and gathered business requirements.",
+    "Prepared documentation and status reports for stakeholders.",
+]
+
+
+def make_resume(rng: random.Random, category: str) -> str:
+    """生成一份与真实数据集风格相近的合成简历（技能列表 + 教育 + 若干段工作经历）"""
+    skills = rng.sample(CATEGORY_SKILLS[category], k=min(len(CATEGORY_SKILLS[category]), rng.randint(4, 8)))
+    years = rng.randint(0, 15)
+    parts = [
+        f"Skills * {' * '.join(skills)}",
+        f"Education Details {rng.choice(_DEGREES)} {rng.randint(2000, 2020)}",
+        f"Total experience {years} years.",
+    ]
+    for _ in range(rng.randint(1, 4)):
+        company = rng.choice(_COMPANIES)
+        title = f"{category} {rng.choice(_TITLES)}"
+        duration = rng.randint(6, 60)
+        used = ", ".join(rng.sample(skills, k=min(len(skills), 3)))
+        parts.append(
+            f"{title} - {company} Experience - {duration} months. Used {used}. "
+            + " ".join(rng.sample(_PHRASES, k=2))
+        )
+    return " ".join(parts)
+
+
+def iter_rows(n_rows: int, seed: int = 42, duplicate_ratio: float = 0.0) -> Iterator[Tuple[str, str]]:
+    """流式生成 (Category, Resume) 行；duplicate_ratio 比例的行为此前行的原样重复"""
+    rng = random.Random(seed)
+    categories = list(CATEGORY_SKILLS)
+    recent: List[Tuple[str, str]] = []
+    for _ in range(n_rows):
+        if recent and rng.random() < duplicate_ratio:
+            yield rng.choice(recent)
+            continue
+        category = rng.choice(categories)
+        row = (category, make_resume(rng, category))
+        if len(recent) < 1000:
+            recent.append(row)
+        yield row
+
+
+def write_corpus(path: Path, n_rows: int, seed: int = 42, duplicate_ratio: float = 0.0) -> Path:
+    """写出与 UpdatedResumeDataSet.csv 同结构的合成数据集（已存在则复用）"""
+    path = Path(path)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Category", "Resume"])
+        for row in iter_rows(n_rows, seed, duplicate_ratio):
+            writer.writerow(row)
+    return path
+
+
+# 基准测试查询：与前端岗位模板同类的中英文混合查询
+BENCH_QUERIES = [
+    "高级数据科学家 精通Python和机器学习库 有深度学习项目经验",
+    "Java Developer Spring Boot Microservices",
+    "前端工程师 精通Vue.js或React框架 熟悉Webpack",
+    "DevOps Kubernetes Docker CI/CD",
+    "HR Recruitment Payroll Employee Relations",
+    "Hadoop Spark Hive 大数据处理",
+    "自动化测试 Selenium JIRA",
+    "Business Analyst SQL Power BI requirement gathering",
+]
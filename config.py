@@ -1,6 +1,41 @@
 import os
 from dataclasses import dataclass, field
-from typing import List
+from typing import Any, Dict, List, Optional
+
+
+# 性能档位：在吞吐/延迟与效果之间取舍，可用环境变量 RAG_PROFILE 选择
+PERFORMANCE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # 低延迟：更小的检索池、更短的重排序与提示词输入
+    "latency": {
+        "retrieval_top_n": 10,
+        "rerank_max_chars": 256,
+        "snippet_max_chars": 600,
+        "max_input_tokens": 2000,
+        "temperature": 0.0,
+        "request_timeout": 60.0,
+    },
+    # 均衡：与历史硬编码参数一致
+    "balanced": {
+        "retrieval_top_n": 20,
+        "rerank_max_chars": 500,
+        "snippet_max_chars": 1200,
+        "max_input_tokens": 3000,
+        "temperature": 0.1,
+        "request_timeout": 300.0,
+    },
+    # 高质量：更大的检索池与更完整的简历上下文
+    "quality": {
+        "retrieval_top_n": 40,
+        "rerank_max_chars": 1000,
+        "snippet_max_chars": 2400,
+        "max_input_tokens": 6000,
+        "temperature": 0.1,
+        "request_timeout": 600.0,
+    },
+}
+
+# 评分方式：llm 调用大模型，local 使用本地特征评分（不依赖大模型）
+SCORING_MODES = ("llm", "local")
 
 
 @dataclass
@@ -11,17 +46,19 @@ class AgentConfig:
     qwen_base_url: str = "https://openrouter.ai/api/v1"
     gemini_base_url: str = "https://openrouter.ai/api/v1"
     gemini_api_key: str = ""
-    
+    qwen_api_key: str = ""
+
     # 模型名称（全部从环境变量覆盖）
     qwen_model_name: str = "qwen-max"
     qwen2_model_name: str = "qwen2.5-72b-instruct"
     gemini_model_name: str = "google/gemini-2.0-flash-exp:free"
 
     # 通用推理参数
-    temperature: float = 0.2
+    temperature: Optional[float] = None
     top_p: float = 0.9
     max_output_tokens: int = 512
-    max_input_tokens: int = 3000  # 添加最大输入token限制
+    max_input_tokens: Optional[int] = None  # 最大输入token限制
+    token_budget_margin: float = 0.15  # 提示词按本地分词器近似计数，预算预留的比例
     language: str = "zh"
 
     # 业务上下文
@@ -30,8 +67,317 @@ class AgentConfig:
         default_factory=lambda: ["技术能力", "产品经验", "业务理解", "沟通协作"]
     )
 
+    # 性能档位与检索参数：档位内的参数（retrieval_top_n 等）为 None 时在 __post_init__ 中取档位的值，显式传入的值优先
+    profile: str = "balanced"
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    cross_encoder_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    retrieval_top_n: Optional[int] = None  # 混合检索召回数量
+    ensemble_weights: List[float] = field(default_factory=lambda: [0.6, 0.4])  # [向量, BM25]
+    use_rerank: bool = True
+    rerank_max_chars: Optional[int] = None  # 交叉编码器输入的最大字符数
+    use_snippets: bool = True
+    snippet_max_chars: Optional[int] = None  # 查询相关段落摘要的最大字符数
+    dedupe: bool = True
+    request_timeout: Optional[float] = None  # 前端调用后端的超时（秒）
+    max_top_n: int = 50  # 单次请求允许返回的最大候选人数量
+    enable_ui: bool = True  # 是否在后端挂载 Gradio 前端；纯 API 部署可关闭以省去 gradio 的导入开销
+    warm_up: bool = True  # 启动时在后台加载模型、构建索引并预热，完成前 /health/ready 返回 503
+    coalesce_requests: bool = True  # 并发的相同 /api/score 请求只计算一次，结果共享
+    coalesce_max_waiters: int = 64  # 同时等待合并结果的请求总数上限，超出的请求各自执行（经准入控制排队或拒绝）
+    result_store_max_sets: int = 256  # 服务端结果集（翻页用）的数量上限，超出时淘汰最久未访问的
+    result_store_ttl_s: float = 1800.0  # 结果集超过该时间未访问即过期
+    semantic_cache: bool = True  # 相似岗位要求复用已有的逐候选人评分，只对新候选人调用大模型
+    semantic_cache_threshold: float = 0.95  # 规范化后岗位要求嵌入的余弦相似度阈值
+    semantic_cache_max_entries: int = 512
+    semantic_cache_ttl_s: float = 3600.0
+
+    # 索引粒度：person 每人一个文档；chunk 将简历切分为重叠片段分别嵌入，检索片段后按 person_id 聚合
+    index_mode: str = "person"
+    chunk_max_chars: int = 800  # 约等于嵌入模型 256 token 的截断长度
+    chunk_overlap_chars: int = 160
+    chunk_aggregation: str = "max"  # max：取最相关片段；sum：前 chunk_aggregation_top_k 个片段分数之和
+    chunk_aggregation_top_k: int = 3
+    chunk_fetch_factor: int = 4  # 片段级召回 retrieval_top_n * factor 个片段，聚合后仍有足够的候选人
+
+    # 大模型路由：按优先级列出供应商（gemini / qwen / qwen2），多于一个时启用对冲请求与故障转移
+    llm_providers: List[str] = field(default_factory=lambda: ["gemini"])
+    llm_hedge: bool = True
+    llm_hedge_delay_s: float = 8.0  # 首 token 延迟样本不足时的对冲等待，样本足够后取该供应商的 p95
+    llm_min_hedge_delay_s: float = 1.0
+    llm_cooldown_s: float = 30.0  # 429/5xx 后暂停使用该供应商的时间
+
+    # 推理后端：torch（sentence-transformers）或 onnx（ONNX Runtime，CPU 动态 int8 量化）
+    inference_backend: str = "torch"
+    onnx_quantize: bool = True
+    onnx_cache_dir: str = ".onnx_models"  # 导出的 ONNX 模型缓存目录
+    onnx_num_threads: int = 0  # ONNX Runtime 算子内线程数，0 表示自动
+
+    # 并发查询的微批处理：查询嵌入与交叉编码器在等待 max_wait_ms 或凑满 max_size 条输入后一次前向
+    micro_batch: bool = True
+    micro_batch_max_size: int = 64
+    micro_batch_max_wait_ms: float = 3.0
+
+    # 简历文件入库（POST /api/resumes、目录监听、批量导入）
+    ingest_store_path: str = "rag_system/ingested_resumes.csv"  # 入库简历的持久化CSV，启动时随数据集加载
+    ingest_watch_dir: str = ""  # 非空时轮询该目录中的新简历文件
+    ingest_poll_interval_s: float = 5.0
+    ingest_batch_size: int = 256  # 每批去重、嵌入并追加到索引的简历数
+    ingest_workers: int = 0  # 批量解析的进程数，0 表示CPU核数
+    ingest_max_file_mb: float = 10.0
+
+    # 候选人结构化档案（python -m rag_system.profiles 离线提取）：评分提示词附带档案，大模型不再重新推断年限与技能
+    use_profiles: bool = True
+    profiles_path: str = "rag_system/profiles.csv"
+
+    # 岗位要求解析（rag_system.requirements_parser）：精简检索查询与评分提示词中的要求，并按年限/类别硬过滤
+    parse_requirements: bool = True
+    requirement_filters: bool = True
+
+    # 评分方式：llm 调用大模型；local 使用本地特征评分（rag_system.local_ranker），请求可单独指定
+    scoring_mode: str = "llm"
+    local_ranker_path: str = "rag_system/local_ranker.json"  # 校准后的本地评分权重，不存在时使用默认权重
+
+    # 分片检索（rag_system.sharding）：非空时本进程不建索引，召回分发给各分片进程（host:port）后合并，再统一重排序
+    search_shards: List[str] = field(default_factory=list)
+    # 分片 RPC 的连接认证密钥，协调进程与分片进程需一致；没有默认值，使用分片检索时必须设置（随机生成的长字符串）
+    shard_authkey: str = ""
+    shard_timeout_s: float = 30.0  # 单个分片的召回超时，超时的分片本次跳过
+
+    # 准入控制（app.admission）：检索/重排序等 CPU 阶段与大模型评分阶段分别限制并发，
+    # 等待者按优先级（前端 interactive 先于 API batch）排队，队列满或排队超时返回 429。
+    # 优先级由服务端判定：同进程前端为 interactive，HTTP 请求一律为 batch，
+    # 除非携带与 admission_frontend_token 一致的 X-Frontend-Token 请求头（独立部署的前端）
+    admission_control: bool = True
+    admission_cpu_concurrency: int = 2
+    admission_llm_concurrency: int = 4
+    admission_interactive_queue: int = 8  # 每个阶段各优先级的等待队列上限
+    admission_batch_queue: int = 16
+    admission_max_wait_s: float = 30.0
+    admission_frontend_token: str = ""  # 独立部署前端的共享密钥，为空时 HTTP 请求都按 batch 处理
+
+    def __post_init__(self):
+        """校验配置，非法值在启动时即报错，而不是在请求中途失败"""
+        if self.profile not in PERFORMANCE_PROFILES:
+            raise ValueError(f"未知的性能档位: {self.profile}，可选: {', '.join(PERFORMANCE_PROFILES)}")
+        for name, value in PERFORMANCE_PROFILES[self.profile].items():
+            if getattr(self, name) is None:
+                setattr(self, name, value)
+        if len(self.ensemble_weights) != 2 or any(w < 0 for w in self.ensemble_weights) \
+                or sum(self.ensemble_weights) <= 0:
+            raise ValueError(f"ensemble_weights 需为两个非负数且和大于0: {self.ensemble_weights}")
+        if not 0.0 <= self.temperature <= 2.0:
+            raise ValueError(f"temperature 需在 [0, 2] 之间: {self.temperature}")
+        for name in ("retrieval_top_n", "rerank_max_chars", "snippet_max_chars",
+                     "max_input_tokens", "max_output_tokens", "max_top_n"):
+            if getattr(self, name) <= 0:
+                raise ValueError(f"{name} 必须为正数: {getattr(self, name)}")
+        if not 0.0 <= self.token_budget_margin < 1.0:
+            raise ValueError(f"token_budget_margin 需在 [0, 1) 之间: {self.token_budget_margin}")
+        if self.request_timeout <= 0:
+            raise ValueError(f"request_timeout 必须为正数: {self.request_timeout}")
+        if not self.llm_providers or any(p not in ("gemini", "qwen", "qwen2") for p in self.llm_providers):
+            raise ValueError(f"llm_providers 需为 gemini、qwen、qwen2 中的一个或多个: {self.llm_providers}")
+        if self.llm_hedge_delay_s <= 0 or self.llm_min_hedge_delay_s < 0 or self.llm_cooldown_s < 0:
+            raise ValueError("llm_hedge_delay_s 必须为正数，llm_min_hedge_delay_s、llm_cooldown_s 不能为负数")
+        if self.inference_backend not in ("torch", "onnx"):
+            raise ValueError(f"未知的推理后端: {self.inference_backend}，可选: torch, onnx")
+        if self.scoring_mode not in SCORING_MODES:
+            raise ValueError(f"未知的评分方式: {self.scoring_mode}，可选: {', '.join(SCORING_MODES)}")
+        if self.index_mode not in ("person", "chunk"):
+            raise ValueError(f"未知的索引粒度: {self.index_mode}，可选: person, chunk")
+        if self.chunk_aggregation not in ("max", "sum"):
+            raise ValueError(f"未知的片段聚合方式: {self.chunk_aggregation}，可选: max, sum")
+        for name in ("chunk_max_chars", "chunk_aggregation_top_k", "chunk_fetch_factor"):
+            if getattr(self, name) <= 0:
+                raise ValueError(f"{name} 必须为正数: {getattr(self, name)}")
+        if not 0 <= self.chunk_overlap_chars < self.chunk_max_chars:
+            raise ValueError(f"chunk_overlap_chars 需在 [0, chunk_max_chars) 之间: {self.chunk_overlap_chars}")
+        if self.result_store_max_sets <= 0 or self.result_store_ttl_s <= 0:
+            raise ValueError("result_store_max_sets、result_store_ttl_s 必须为正数")
+        if not 0.0 < self.semantic_cache_threshold <= 1.0:
+            raise ValueError(f"semantic_cache_threshold 需在 (0, 1] 之间: {self.semantic_cache_threshold}")
+        if self.semantic_cache_max_entries <= 0 or self.semantic_cache_ttl_s <= 0:
+            raise ValueError("semantic_cache_max_entries、semantic_cache_ttl_s 必须为正数")
+        if self.micro_batch_max_size <= 0:
+            raise ValueError(f"micro_batch_max_size 必须为正数: {self.micro_batch_max_size}")
+        if self.micro_batch_max_wait_ms < 0:
+            raise ValueError(f"micro_batch_max_wait_ms 不能为负数: {self.micro_batch_max_wait_ms}")
+        if self.ingest_batch_size <= 0 or self.ingest_poll_interval_s <= 0 or self.ingest_max_file_mb <= 0:
+            raise ValueError("ingest_batch_size、ingest_poll_interval_s、ingest_max_file_mb 必须为正数")
+        if self.ingest_workers < 0:
+            raise ValueError(f"ingest_workers 不能为负数: {self.ingest_workers}")
+        for address in self.search_shards:
+            host, _, port = address.rpartition(":")
+            if not host or not port.isdigit():
+                raise ValueError(f"分片地址需为 host:port: {address}")
+        if self.admission_cpu_concurrency <= 0 or self.admission_llm_concurrency <= 0:
+            raise ValueError("admission_cpu_concurrency、admission_llm_concurrency 必须为正数")
+        if self.admission_interactive_queue < 0 or self.admission_batch_queue < 0:
+            raise ValueError("admission_interactive_queue、admission_batch_queue 不能为负数")
+        if self.admission_max_wait_s <= 0:
+            raise ValueError(f"admission_max_wait_s 必须为正数: {self.admission_max_wait_s}")
+        if self.search_shards and not self.shard_authkey:
+            raise ValueError("设置 search_shards 时必须同时设置 shard_authkey（SHARD_AUTHKEY）")
+        if self.coalesce_max_waiters < 0:
+            raise ValueError(f"coalesce_max_waiters 不能为负数: {self.coalesce_max_waiters}")
+        if self.search_shards and self.index_mode == "chunk":
+            raise ValueError("分片检索暂不支持片段级索引（INDEX_MODE=chunk）")
+        if self.shard_timeout_s <= 0:
+            raise ValueError(f"shard_timeout_s 必须为正数: {self.shard_timeout_s}")
+        if self.onnx_num_threads < 0:
+            raise ValueError(f"onnx_num_threads 不能为负数: {self.onnx_num_threads}")
+
+    def profile_summary(self) -> Dict[str, Any]:
+        """当前生效的性能参数（不含密钥），便于排查部署配置"""
+        return {
+            "profile": self.profile,
+            "embedding_model": self.embedding_model,
+            "cross_encoder_model": self.cross_encoder_model,
+            "retrieval_top_n": self.retrieval_top_n,
+            "ensemble_weights": list(self.ensemble_weights),
+            "use_rerank": self.use_rerank,
+            "rerank_max_chars": self.rerank_max_chars,
+            "use_snippets": self.use_snippets,
+            "snippet_max_chars": self.snippet_max_chars,
+            "dedupe": self.dedupe,
+            "index_mode": self.index_mode,
+            "chunk_max_chars": self.chunk_max_chars,
+            "chunk_aggregation": self.chunk_aggregation,
+            "max_input_tokens": self.max_input_tokens,
+            "token_budget_margin": self.token_budget_margin,
+            "temperature": self.temperature,
+            "request_timeout": self.request_timeout,
+            "max_top_n": self.max_top_n,
+            "enable_ui": self.enable_ui,
+            "warm_up": self.warm_up,
+            "coalesce_requests": self.coalesce_requests,
+            "coalesce_max_waiters": self.coalesce_max_waiters,
+            "semantic_cache": self.semantic_cache,
+            "semantic_cache_threshold": self.semantic_cache_threshold,
+            "use_profiles": self.use_profiles,
+            "scoring_mode": self.scoring_mode,
+            "parse_requirements": self.parse_requirements,
+            "requirement_filters": self.requirement_filters,
+            "search_shards": list(self.search_shards),
+            "admission_control": self.admission_control,
+            "admission_cpu_concurrency": self.admission_cpu_concurrency,
+            "admission_llm_concurrency": self.admission_llm_concurrency,
+            "llm_providers": list(self.llm_providers),
+            "llm_hedge": self.llm_hedge,
+            "inference_backend": self.inference_backend,
+            "onnx_quantize": self.onnx_quantize,
+            "micro_batch": self.micro_batch,
+            "micro_batch_max_size": self.micro_batch_max_size,
+            "micro_batch_max_wait_ms": self.micro_batch_max_wait_ms,
+        }
+
+
+def _env_value(name: str, cast) -> Optional[Any]:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return None
+    try:
+        return cast(value.strip())
+    except ValueError as e:
+        raise ValueError(f"环境变量 {name} 取值非法: {value}") from e
+
+
+def _to_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def _to_floats(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def _to_names(value: str) -> List[str]:
+    return [v.strip().lower() for v in value.split(",") if v.strip()]
+
+
+def _to_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+# 单项覆盖档位参数的环境变量：变量名 -> (字段名, 类型转换)
+_ENV_OVERRIDES = {
+    "HF_EMBEDDING_MODEL": ("embedding_model", str),
+    "CROSS_ENCODER_MODEL": ("cross_encoder_model", str),
+    "RAG_TOP_N": ("retrieval_top_n", int),
+    "RAG_ENSEMBLE_WEIGHTS": ("ensemble_weights", _to_floats),
+    "RAG_USE_RERANK": ("use_rerank", _to_bool),
+    "RAG_RERANK_MAX_CHARS": ("rerank_max_chars", int),
+    "RAG_USE_SNIPPETS": ("use_snippets", _to_bool),
+    "RAG_SNIPPET_MAX_CHARS": ("snippet_max_chars", int),
+    "RAG_DEDUPE": ("dedupe", _to_bool),
+    "MAX_INPUT_TOKENS": ("max_input_tokens", int),
+    "TOKEN_BUDGET_MARGIN": ("token_budget_margin", float),
+    "LLM_TEMPERATURE": ("temperature", float),
+    "REQUEST_TIMEOUT": ("request_timeout", float),
+    "MAX_TOP_N": ("max_top_n", int),
+    "ENABLE_UI": ("enable_ui", _to_bool),
+    "WARM_UP": ("warm_up", _to_bool),
+    "COALESCE_REQUESTS": ("coalesce_requests", _to_bool),
+    "COALESCE_MAX_WAITERS": ("coalesce_max_waiters", int),
+    "RESULT_STORE_MAX_SETS": ("result_store_max_sets", int),
+    "RESULT_STORE_TTL": ("result_store_ttl_s", float),
+    "SEMANTIC_CACHE": ("semantic_cache", _to_bool),
+    "SEMANTIC_CACHE_THRESHOLD": ("semantic_cache_threshold", float),
+    "SEMANTIC_CACHE_MAX_ENTRIES": ("semantic_cache_max_entries", int),
+    "SEMANTIC_CACHE_TTL": ("semantic_cache_ttl_s", float),
+    "USE_PROFILES": ("use_profiles", _to_bool),
+    "PROFILES_PATH": ("profiles_path", str),
+    "SCORING_MODE": ("scoring_mode", str),
+    "PARSE_REQUIREMENTS": ("parse_requirements", _to_bool),
+    "REQUIREMENT_FILTERS": ("requirement_filters", _to_bool),
+    "LOCAL_RANKER_PATH": ("local_ranker_path", str),
+    "SEARCH_SHARDS": ("search_shards", _to_list),
+    "SHARD_AUTHKEY": ("shard_authkey", str),
+    "SHARD_TIMEOUT": ("shard_timeout_s", float),
+    "ADMISSION_CONTROL": ("admission_control", _to_bool),
+    "ADMISSION_CPU_CONCURRENCY": ("admission_cpu_concurrency", int),
+    "ADMISSION_LLM_CONCURRENCY": ("admission_llm_concurrency", int),
+    "ADMISSION_INTERACTIVE_QUEUE": ("admission_interactive_queue", int),
+    "ADMISSION_BATCH_QUEUE": ("admission_batch_queue", int),
+    "ADMISSION_MAX_WAIT": ("admission_max_wait_s", float),
+    "ADMISSION_FRONTEND_TOKEN": ("admission_frontend_token", str),
+    "LLM_PROVIDERS": ("llm_providers", _to_names),
+    "LLM_HEDGE": ("llm_hedge", _to_bool),
+    "LLM_HEDGE_DELAY": ("llm_hedge_delay_s", float),
+    "LLM_MIN_HEDGE_DELAY": ("llm_min_hedge_delay_s", float),
+    "LLM_COOLDOWN": ("llm_cooldown_s", float),
+    "INFERENCE_BACKEND": ("inference_backend", str),
+    "ONNX_QUANTIZE": ("onnx_quantize", _to_bool),
+    "ONNX_CACHE_DIR": ("onnx_cache_dir", str),
+    "ONNX_NUM_THREADS": ("onnx_num_threads", int),
+    "MICRO_BATCH": ("micro_batch", _to_bool),
+    "MICRO_BATCH_MAX_SIZE": ("micro_batch_max_size", int),
+    "MICRO_BATCH_MAX_WAIT_MS": ("micro_batch_max_wait_ms", float),
+    "INDEX_MODE": ("index_mode", str),
+    "CHUNK_MAX_CHARS": ("chunk_max_chars", int),
+    "CHUNK_OVERLAP_CHARS": ("chunk_overlap_chars", int),
+    "CHUNK_AGGREGATION": ("chunk_aggregation", str),
+    "CHUNK_AGGREGATION_TOP_K": ("chunk_aggregation_top_k", int),
+    "CHUNK_FETCH_FACTOR": ("chunk_fetch_factor", int),
+    "INGEST_STORE_PATH": ("ingest_store_path", str),
+    "INGEST_WATCH_DIR": ("ingest_watch_dir", str),
+    "INGEST_POLL_INTERVAL": ("ingest_poll_interval_s", float),
+    "INGEST_BATCH_SIZE": ("ingest_batch_size", int),
+    "INGEST_WORKERS": ("ingest_workers", int),
+    "INGEST_MAX_FILE_MB": ("ingest_max_file_mb", float),
+}
+
 
 def get_config() -> AgentConfig:
+    # 单项环境变量覆盖性能档位的参数，未覆盖的参数由 AgentConfig 按档位填充
+    profile = os.getenv("RAG_PROFILE") or "balanced"
+    if profile not in PERFORMANCE_PROFILES:
+        raise ValueError(f"未知的性能档位 RAG_PROFILE={profile}，可选: {', '.join(PERFORMANCE_PROFILES)}")
+    tuning = {}
+    for env_name, (field_name, cast) in _ENV_OVERRIDES.items():
+        value = _env_value(env_name, cast)
+        if value is not None:
+            tuning[field_name] = value
+
     # 优先使用环境变量中的配置
     cfg = AgentConfig(
         api_key=os.getenv("OPENROUTER_API_KEY") or os.getenv("Gemini_Api_Key") or "",
@@ -41,15 +387,20 @@ def get_config() -> AgentConfig:
         gemini_model_name=os.getenv("Gemini_Model_Name") or "google/gemini-2.0-flash-exp:free",
         qwen_model_name=os.getenv("Qwen_Model_name") or "qwen-max",
         qwen2_model_name=os.getenv("Qwen2_Model_Name") or "qwen2.5-72b-instruct",
+        qwen_api_key=os.getenv("Qwen_Api_Key") or "",
+        qwen_base_url=os.getenv("Qwen_Base_Url") or "https://openrouter.ai/api/v1",
         language=os.getenv("LANGUAGE") or "zh",
+        profile=profile,
+        **tuning,
     )
-    
+
     # 记录关键配置供调试
     print(f"[config] Using API Key: {'Yes' if cfg.api_key else 'No'}")
     print(f"[config] Using Base URL: {cfg.base_url}")
     print(f"[config] Using Model: {cfg.gemini_model_name}")
-    
+    print(f"[config] Using Profile: {cfg.profile}")
+
     if not cfg.api_key:
         print("[config] Warning: No API key found in environment variables")
-        
-    return cfg
\ No newline at end of file
+
+    return cfg
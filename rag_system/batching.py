@@ -0,0 +1,195 @@
+"""
+并发请求的动态微批处理。
+
+多个 /api/score 请求各自以很小的批次调用交叉编码器和查询嵌入，CPU 利用率很低。
+MicroBatcher 在模型前排队：最多等待 max_wait_ms 或凑满 max_batch 条输入后做一次批量前向，
+再把结果按顺序分发回各个等待的调用方。模型调用在单个工作线程中执行，批内可使用全部算子线程。
+"""
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class _Pending:
+    __slots__ = ("items", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result: Optional[List[Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    收集并发提交的输入，合并为一次 batch_fn 调用。
+
+    batch_fn 接收输入列表并返回等长的结果序列；单个请求的输入多于 max_batch 时单独成批，不拆分。
+    max_wait_ms=0 时不额外等待，只合并模型忙碌期间排队的请求。
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Sequence[Any]], max_batch: int = 64,
+                 max_wait_ms: float = 3.0, name: str = "batcher"):
+        if max_batch <= 0:
+            raise ValueError(f"max_batch 必须为正数: {max_batch}")
+        if max_wait_ms < 0:
+            raise ValueError(f"max_wait_ms 不能为负数: {max_wait_ms}")
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000
+        self.name = name
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # 指标
+        self._requests = 0
+        self._items = 0
+        self._batches = 0
+        self._max_queue_depth = 0
+        self._largest_batch = 0
+        self._errors = 0
+        self._waits: deque = deque(maxlen=2048)  # 最近请求的排队等待（秒）
+        self._batch_sizes: deque = deque(maxlen=2048)
+
+        self._worker = threading.Thread(target=self._run, name=f"{name}-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, items: Sequence[Any]) -> List[Any]:
+        """提交一组输入并阻塞等待结果"""
+        items = list(items)
+        if not items:
+            return []
+        pending = _Pending(items)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name} 已关闭")
+            self._queue.append(pending)
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            self._cond.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self) -> List[_Pending]:
+        """取出一批请求：从第一个请求入队起最多等待 max_wait，或凑满 max_batch 条输入"""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            batch = [self._queue.popleft()]
+            size = len(batch[0].items)
+            deadline = batch[0].enqueued_at + self.max_wait_s
+            while size < self.max_batch:
+                if self._queue:
+                    if size + len(self._queue[0].items) > self.max_batch:
+                        break
+                    pending = self._queue.popleft()
+                    batch.append(pending)
+                    size += len(pending.items)
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or self._closed:
+                    break
+                self._cond.wait(remaining)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            started = time.perf_counter()
+            inputs = [item for pending in batch for item in pending.items]
+            try:
+                outputs = list(self.batch_fn(inputs))
+                if len(outputs) != len(inputs):
+                    raise RuntimeError(f"{self.name}: batch_fn 返回 {len(outputs)} 个结果，期望 {len(inputs)} 个")
+                offset = 0
+                for pending in batch:
+                    pending.result = outputs[offset:offset + len(pending.items)]
+                    offset += len(pending.items)
+            except BaseException as e:  # noqa: BLE001 - 异常交还给每个调用方
+                for pending in batch:
+                    pending.error = e
+                with self._cond:
+                    self._errors += 1
+            with self._cond:
+                self._batches += 1
+                self._items += len(inputs)
+                self._largest_batch = max(self._largest_batch, len(inputs))
+                self._batch_sizes.append(len(inputs))
+                self._waits.extend(started - pending.enqueued_at for pending in batch)
+            for pending in batch:
+                pending.done.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        """批处理与排队指标"""
+        with self._cond:
+            waits = sorted(self._waits)
+            sizes = list(self._batch_sizes)
+            result = {
+                "requests": self._requests,
+                "items": self._items,
+                "batches": self._batches,
+                "errors": self._errors,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_queue_depth,
+                "largest_batch": self._largest_batch,
+                "avg_batch_items": statistics.fmean(sizes) if sizes else 0.0,
+                "avg_requests_per_batch": self._requests / self._batches if self._batches else 0.0,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_s * 1000,
+            }
+        if waits:
+            result["queue_wait_p50_ms"] = waits[len(waits) // 2] * 1000
+            result["queue_wait_p99_ms"] = waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000
+        return result
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout=5)
+
+
+class BatchedCrossEncoder:
+    """交叉编码器的微批包装，predict 接口与 CrossEncoder.predict 相同"""
+
+    def __init__(self, cross_encoder, max_batch: int = 64, max_wait_ms: float = 3.0):
+        self.cross_encoder = cross_encoder
+        self.batcher = MicroBatcher(self._predict_batch, max_batch, max_wait_ms, name="cross-encoder")
+
+    def _predict_batch(self, pairs: List[Any]):
+        # 模型内部按自身 batch_size 再拆分会抵消合并效果，这里让一次前向覆盖整个批次
+        return self.cross_encoder.predict(pairs, batch_size=max(32, len(pairs)))
+
+    def predict(self, pairs, **kwargs) -> np.ndarray:
+        return np.asarray(self.batcher.submit(pairs))
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    查询嵌入的微批包装；建索引时的 embed_documents 本身已是批量调用，直接透传。
+    合并后的查询通过 embed_documents 编码，要求底层模型对查询和文档使用相同的编码方式。
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch: int = 64, max_wait_ms: float = 3.0):
+        self.embeddings = embeddings
+        self.batcher = MicroBatcher(self.embeddings.embed_documents, max_batch, max_wait_ms, name="query-embedding")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.submit([text])[0]
@@ -0,0 +1,114 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rag_system.snippets import tokenize
+
+SIMHASH_BITS = 64
+# 64位指纹分为4段，每段16位；汉明距离<=3的两个指纹至少有一段完全相同（抽屉原理）
+_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """去重前的规范化：小写、合并空白"""
+    return _WHITESPACE_RE.sub(" ", (text or "").lower()).strip()
+
+
+def content_hash(text: str) -> str:
+    """规范化文本的内容哈希，用于识别完全重复的简历"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """基于词 shingle 的 64 位 SimHash 指纹，用于识别近似重复的简历"""
+    tokens = tokenize(normalize_text(text))
+    if len(tokens) >= shingle_size:
+        features = [" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+    else:
+        features = list(tokens)
+    if not features:
+        return 0
+
+    digests = b"".join(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features)
+    # 按位展开后逐位投票：该位为1的特征多于为0的特征，则指纹该位为1
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8), bitorder="little").reshape(-1, SIMHASH_BITS)
+    votes = bits.sum(axis=0) * 2 > len(features)
+    return int(np.packbits(votes, bitorder="little").view("<u8")[0])
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class Deduplicator:
+    """
+    入库去重：先按内容哈希识别完全重复，再按 SimHash 汉明距离识别近似重复。
+    每组重复只保留第一份作为规范文档，并记录被合并的文档ID。
+    """
+
+    def __init__(self, max_distance: int = 3):
+        if max_distance >= _BANDS:
+            raise ValueError(f"max_distance 必须小于 {_BANDS}，否则分段索引无法保证召回")
+        self.max_distance = max_distance
+        self.hashes: Dict[str, Any] = {}
+        self.fingerprints: Dict[Any, int] = {}
+        self.bands: List[Dict[int, List[Any]]] = [defaultdict(list) for _ in range(_BANDS)]
+        self.duplicates: Dict[Any, List[Any]] = defaultdict(list)
+
+    def _find_near_duplicate(self, fingerprint: int) -> Optional[Any]:
+        seen = set()
+        for band, table in enumerate(self.bands):
+            key = (fingerprint >> (band * _BAND_BITS)) & _BAND_MASK
+            for doc_id in table.get(key, ()):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if hamming_distance(fingerprint, self.fingerprints[doc_id]) <= self.max_distance:
+                    return doc_id
+        return None
+
+    def find(self, text: str) -> Tuple[Optional[Any], str]:
+        """查找已登记的重复文档（不登记），返回值同 add"""
+        canonical = self.hashes.get(content_hash(text))
+        if canonical is not None:
+            return canonical, "exact"
+        canonical = self._find_near_duplicate(simhash(text))
+        return (canonical, "near") if canonical is not None else (None, "")
+
+    def add(self, doc_id, text: str) -> Tuple[Optional[Any], str]:
+        """
+        登记一份文档。
+
+        Returns:
+            (canonical_id, 重复类型)：若为重复文档，返回其归并到的规范文档ID以及 "exact"/"near"；
+            否则返回 (None, "")，该文档成为新的规范文档。
+        """
+        digest = content_hash(text)
+        canonical = self.hashes.get(digest)
+        if canonical is not None:
+            self.duplicates[canonical].append(doc_id)
+            return canonical, "exact"
+
+        fingerprint = simhash(text)
+        canonical = self._find_near_duplicate(fingerprint)
+        if canonical is not None:
+            self.hashes[digest] = canonical
+            self.duplicates[canonical].append(doc_id)
+            return canonical, "near"
+
+        self.hashes[digest] = doc_id
+        self.fingerprints[doc_id] = fingerprint
+        for band, table in enumerate(self.bands):
+            table[(fingerprint >> (band * _BAND_BITS)) & _BAND_MASK].append(doc_id)
+        return None, ""
+
+    @property
+    def removed_count(self) -> int:
+        return sum(len(ids) for ids in self.duplicates.values())
@@ -0,0 +1,178 @@
+"""嵌入模型与交叉编码器的 ONNX Runtime 推理后端（CPU，动态 int8 量化）"""
+import argparse
+import os
+import platform
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+INFERENCE_BACKENDS = ("torch", "onnx")
+
+FEATURE_EXTRACTION = "feature-extraction"
+TEXT_CLASSIFICATION = "text-classification"
+
+
+def _model_dir(cache_dir: str, model_name: str, quantize: bool) -> Path:
+    suffix = "int8" if quantize else "fp32"
+    return Path(cache_dir) / f"{model_name.replace('/', '__')}-{suffix}"
+
+
+def _onnx_file(model_dir: Path, quantize: bool) -> Path:
+    return model_dir / ("model_quantized.onnx" if quantize else "model.onnx")
+
+
+def _quantization_config():
+    """按 CPU 指令集选择动态量化配置（激活值运行时量化，无需校准数据）"""
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        flags = ""
+    if "avx512_vnni" in flags:
+        return AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+
+def export_onnx(model_name: str, task: str, cache_dir: str, quantize: bool = True) -> Path:
+    """从 HuggingFace checkpoint 导出 ONNX 模型（可选动态 int8 量化），已导出时直接复用"""
+    model_dir = _model_dir(cache_dir, model_name, quantize)
+    onnx_file = _onnx_file(model_dir, quantize)
+    if onnx_file.exists():
+        return onnx_file
+
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTModelForSequenceClassification, ORTQuantizer
+    from transformers import AutoTokenizer
+
+    print(f"[onnx] 正在导出 {model_name} -> {model_dir}")
+    model_cls = ORTModelForFeatureExtraction if task == FEATURE_EXTRACTION else ORTModelForSequenceClassification
+    model = model_cls.from_pretrained(model_name, export=True)
+    model.save_pretrained(model_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+    if quantize:
+        quantizer = ORTQuantizer.from_pretrained(model_dir)
+        quantizer.quantize(save_dir=model_dir, quantization_config=_quantization_config())
+        print(f"[onnx] 已完成动态 int8 量化: {onnx_file}")
+    return onnx_file
+
+
+class _OnnxModel:
+    """ONNX Runtime 会话 + fast tokenizer 的公共部分"""
+
+    def __init__(self, onnx_file: Path, num_threads: int = 0, max_length: int = 512):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(str(onnx_file), sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_file.parent)
+        self.max_length = max_length
+        self.onnx_file = onnx_file
+
+    def _run(self, encoded) -> List[np.ndarray]:
+        feed = {}
+        for name in self.input_names:
+            if name in encoded:
+                feed[name] = encoded[name].astype(np.int64)
+            elif name == "token_type_ids":
+                feed[name] = np.zeros_like(encoded["input_ids"], dtype=np.int64)
+        return self.session.run(None, feed)
+
+
+class OnnxEmbeddings(_OnnxModel, Embeddings):
+    """句向量：token 向量按 attention mask 平均池化后做 L2 归一化（与 all-MiniLM-L6-v2 的池化方式一致）"""
+
+    def __init__(self, onnx_file: Path, num_threads: int = 0, max_length: int = 256, batch_size: int = 32):
+        super().__init__(onnx_file, num_threads, max_length)
+        self.batch_size = batch_size
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length,
+                                 return_tensors="np")
+        outputs = self._run(encoded)
+        if "sentence_embedding" in self.output_names:
+            vectors = outputs[self.output_names.index("sentence_embedding")]
+        else:
+            tokens = outputs[0]
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            vectors = (tokens * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        batches = [self._embed_batch(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return np.vstack(batches)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+
+class OnnxCrossEncoder(_OnnxModel):
+    """交叉编码器：单输出模型按 sigmoid 输出相关度，与 CrossEncoder.predict 的默认激活一致"""
+
+    def __init__(self, onnx_file: Path, num_threads: int = 0, max_length: int = 512, batch_size: int = 32):
+        super().__init__(onnx_file, num_threads, max_length)
+        self.batch_size = batch_size
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        batch_size = batch_size or self.batch_size
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            encoded = self.tokenizer([p[0] for p in batch], [p[1] for p in batch], padding=True,
+                                     truncation=True, max_length=self.max_length, return_tensors="np")
+            logits = self._run(encoded)[0]
+            if logits.ndim == 2 and logits.shape[1] == 1:
+                logits = 1.0 / (1.0 + np.exp(-logits[:, 0]))
+            scores.append(logits)
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+
+def create_onnx_embeddings(cfg) -> OnnxEmbeddings:
+    onnx_file = export_onnx(cfg.embedding_model, FEATURE_EXTRACTION, cfg.onnx_cache_dir, cfg.onnx_quantize)
+    return OnnxEmbeddings(onnx_file, num_threads=cfg.onnx_num_threads)
+
+
+def create_onnx_cross_encoder(cfg) -> OnnxCrossEncoder:
+    onnx_file = export_onnx(cfg.cross_encoder_model, TEXT_CLASSIFICATION, cfg.onnx_cache_dir, cfg.onnx_quantize)
+    return OnnxCrossEncoder(onnx_file, num_threads=cfg.onnx_num_threads)
+
+
+def main(argv: Optional[List[str]] = None):
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description="导出 ONNX 推理模型")
+    parser.add_argument("--export", action="store_true", help="导出配置中的嵌入模型和交叉编码器")
+    parser.add_argument("--no-quantize", action="store_true", help="只导出 fp32 模型")
+    parser.add_argument("--cache-dir", help="覆盖配置中的 onnx_cache_dir")
+    args = parser.parse_args(argv)
+
+    cfg = get_config()
+    cache_dir = args.cache_dir or cfg.onnx_cache_dir
+    quantize = cfg.onnx_quantize and not args.no_quantize
+    if not args.export:
+        parser.print_help()
+        return
+    for model_name, task in ((cfg.embedding_model, FEATURE_EXTRACTION), (cfg.cross_encoder_model, TEXT_CLASSIFICATION)):
+        onnx_file = export_onnx(model_name, task, cache_dir, quantize)
+        print(f"[onnx] {model_name}: {onnx_file} ({os.path.getsize(onnx_file) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
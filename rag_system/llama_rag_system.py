@@ -1,72 +1,242 @@
-import warnings
-from plistlib import loads
-
-import pandas as pd
-from typing import List, Dict, Optional, Any
+import heapq
 import os
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Any, Tuple
 
 from dotenv import load_dotenv
-from langchain_classic.retrievers import EnsembleRetriever, ContextualCompressionRetriever
-from langchain_classic.retrievers.document_compressors import LLMChainExtractor
-from langchain_community.vectorstores import FAISS
-from llama_index.core.indices import vector_store
 
 load_dotenv()
 
-# LlamaIndex相关导入
-from llama_index.core import Document, Settings
-from llama_index.core.node_parser import SentenceSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from openai import OpenAI
-from langchain_community.retrievers import BM25Retriever
-
-# 混合检索相关导入
-from llama_index.core.retrievers import QueryFusionRetriever
-from llama_index.core.schema import NodeWithScore, TextNode
-
-# 交叉编码器相关导入
-from sentence_transformers import CrossEncoder
-import numpy as np
+# pandas、langchain、FAISS、sentence_transformers（以及 torch）均在用到时才导入：
+# 仅导入本模块不会加载任何模型或重量级依赖，/health 等轻量接口可以秒级启动
+from config import AgentConfig, get_config
+from rag_system.token_budget import budget_candidate_texts, fit_requirements, prompt_tokens
+from rag_system.snippets import PassageIndex, split_chunks
+from rag_system.dedup import Deduplicator, content_hash
+from rag_system.output_parser import IncrementalScoreParser, match_scores_to_candidates
+from rag_system.profiles import ProfileStore, extract_profile_rules, format_profile
+from rag_system.llm_router import provider_settings
 
 # 忽略一些警告
 warnings.filterwarnings("ignore")
 
 
+# search 支持的检索模式
+RETRIEVAL_MODES = ("ensemble", "bm25", "vector")
+
+
+def _chunk_prefix(category: str) -> str:
+    """文档内容的类别前缀，片段模式下每个片段都会带上"""
+    return f"Category: {category}\n\n"
+
+
+# 启动预热使用的合成查询（中英文混合，覆盖常见岗位）
+WARM_UP_QUERIES = (
+    "高级数据科学家 精通Python和机器学习库",
+    "Java Developer Spring Boot Microservices",
+    "前端工程师 熟悉Vue.js或React框架",
+)
+
+# 评分提示词中的评估要求与输出格式（固定部分）
+SCORING_INSTRUCTIONS = """
+## 评估要求：
+请为每位候选人提供以下评估（使用中文）：
+1. 技术能力匹配度 (0-10分)
+2. 经验匹配度 (0-10分)
+3. 综合评分 (0-10分)
+4. 工作经验年限 (直接给出数字，如：5)
+5. 核心技能 (用逗号分隔的关键技能，如：Python,机器学习,数据分析)
+6. 主要优势 (1-2点)
+7. 主要不足 (1-2点)
+8. 是否推荐 (是/否)
+    
+## 输出格式（严格按照以下JSON格式输出，不要添加其他内容）：
+[
+  {
+    "candidate_id": "候选人ID（与上文括号中的 ID 一致）",
+    "technical_score": 技术能力分数(0-10),
+    "experience_score": 经验匹配分数(0-10),
+    "overall_score": 综合评分(0-10),
+    "years_experience": 工作经验年限,
+    "skills": "核心技能(逗号分隔)",
+    "strengths": "主要优势",
+    "weaknesses": "主要不足",
+    "recommendation": "是否推荐(是/否)"
+  }
+]
+"""
+
+# 所有候选人都有预先提取的档案时使用：年限与技能直接取自档案，大模型只做与岗位相关的判断
+SCORING_INSTRUCTIONS_WITH_PROFILES = """
+## 评估要求：
+候选人的工作年限、技能、学历已在“档案”中给出，请直接据此判断，无需重新提取。
+请为每位候选人提供以下评估（使用中文）：
+1. 技术能力匹配度 (0-10分)
+2. 经验匹配度 (0-10分)
+3. 综合评分 (0-10分)
+4. 主要优势 (1-2点)
+5. 主要不足 (1-2点)
+6. 是否推荐 (是/否)
+
+## 输出格式（严格按照以下JSON格式输出，不要添加其他内容）：
+[
+  {
+    "candidate_id": "候选人ID（与上文括号中的 ID 一致）",
+    "technical_score": 技术能力分数(0-10),
+    "experience_score": 经验匹配分数(0-10),
+    "overall_score": 综合评分(0-10),
+    "strengths": "主要优势",
+    "weaknesses": "主要不足",
+    "recommendation": "是否推荐(是/否)"
+  }
+]
+"""
+
+
+class _ReadWriteLock:
+    """读写锁：检索并发读，在线追加简历时短暂独占（写者优先，避免持续检索导致写者饥饿）"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class NoLLM:
+    """不调用大模型的实例（分片进程、本地批量评分）使用，避免创建大模型客户端"""
+
+    def invoke(self, *args, **kwargs):
+        raise RuntimeError("该实例不调用大模型")
+
+    stream = invoke
+
 
 class SimpleRAG:
     #初始化
-    def __init__(self, csv_file_path: str, top_n: int = 20):
+    def __init__(self, csv_file_path: str, top_n: Optional[int] = None, cfg: Optional[AgentConfig] = None,
+                 llm: Any = None, embeddings: Any = None, extra_csv_paths: Optional[List[str]] = None,
+                 shard: Optional[Tuple[int, int]] = None, load_index: bool = True):
         """
         初始化简化的RAG系统（完全使用LangChain）
+
+        Args:
+            csv_file_path: 简历数据CSV路径
+            top_n: 混合检索召回数量，默认取配置中的 retrieval_top_n
+            cfg: 性能配置，默认读取环境变量（见 config.get_config）
+            llm / embeddings: 可注入自定义组件（如基准测试中的本地桩模型），默认按配置创建
+            extra_csv_paths: 追加加载的CSV（如在线入库保存的简历），不存在时忽略
+            shard: (分片序号, 分片数)，只加载行号对分片数取模等于该序号的简历（ID 仍为全局行号），
+                供分片进程使用（见 rag_system.sharding）
+            load_index: 为 False 时不加载数据、不建索引也不创建嵌入模型，只用于重排序与评分（见 app.bulk_score）
         """
+        self.cfg = cfg or get_config()
         self.csv_file_path = csv_file_path
-        self.top_n = top_n
+        self.extra_csv_paths = list(extra_csv_paths or [])
+        self.top_n = top_n or self.cfg.retrieval_top_n
+        if shard is not None and not 0 <= shard[0] < shard[1]:
+            raise ValueError(f"分片序号需在 [0, {shard[1]}) 之间: {shard[0]}")
+        self.shard = shard
+        self.load_index = load_index
+        # 配置了分片地址时本进程不建索引，检索分发给各分片进程
+        self.shard_search = None
+        if self.cfg.search_shards and shard is None:
+            from rag_system.sharding import ShardedSearch
+            self.shard_search = ShardedSearch(self.cfg.search_shards, self.cfg.shard_authkey,
+                                              timeout_s=self.cfg.shard_timeout_s,
+                                              weights=self.cfg.ensemble_weights)
+        self.max_input_tokens = self.cfg.max_input_tokens
+        self.use_snippets = self.cfg.use_snippets
         self.documents = []
+        # 实际进入向量/BM25索引的文档：person 模式即 documents，chunk 模式为各简历的重叠片段
+        self.index_mode = self.cfg.index_mode
+        self.index_documents = []
+        # 段落级索引：用于在重排序和大模型评分前抽取与查询相关的简历片段
+        self.passage_index = PassageIndex()
+        # 入库去重器：按内容哈希与 SimHash 合并重复简历
+        self.deduplicator = Deduplicator() if self.cfg.dedupe else None
         self.retriever = None
+        self.vectorstore = None
+        self.vector_retriever = None
+        self.bm25_retriever = None
+        # 在线追加简历时：写者互斥（去重状态、ID分配），读写锁保证检索不会看到追加到一半的索引
+        self._ingest_lock = threading.Lock()
+        self._index_lock = _ReadWriteLock()
+        self._doc_by_id: Dict[Any, Any] = {}
+        self._next_id = 0
+        # 预先提取的候选人档案：文档ID -> 档案（见 rag_system.profiles）
+        self.profile_store = ProfileStore(self.cfg.profiles_path) if self.cfg.use_profiles else None
+        self.profiles: Dict[Any, Dict[str, Any]] = {}
         self.cross_encoder = None
-
-        # 获取API配置
-        self.api_key = os.getenv("Gemini_Api_Key")
-        self.base_url = os.getenv("Gemini_Base_Url")
-        self.model_name =os.getenv("Gemini_Model_Name") 
+        self._cross_encoder_loaded = False
+        self._cross_encoder_lock = threading.Lock()
+        self.llm = llm
+        self.embeddings = embeddings
+        # 各初始化阶段耗时（秒），用于基准测试和启动排查
+        self.timings: Dict[str, float] = {}
+
+        # 获取API配置：取自 cfg 中首选供应商的设置，调用方传入的配置优先于环境变量
+        provider = provider_settings(self.cfg, self.cfg.llm_providers[0])
+        self.api_key = provider["api_key"]
+        self.base_url = provider["base_url"]
+        self.model_name = provider["model"]
 
         if not self.api_key:
             print("警告: 未找到API Key，将使用本地模型")
-            print("请设置 OPENAI_API_KEY 环境变量或通过 .env 文件设置")
-            print("示例: OPENAI_API_KEY=sk-your-key-here")
+            print("请设置 Gemini_Api_Key（或 OPENROUTER_API_KEY）环境变量或通过 .env 文件设置")
+            print("示例: Gemini_Api_Key=sk-your-key-here")
 
         # 初始化组件
-        self._init_components()
-        self._load_data()
-        self._build_retriever()
+        self._timed("init_components_s", self._init_components)
+        if self.shard_search is None and load_index:
+            self._timed("load_data_s", self._load_data)
+            self._timed("build_retriever_s", self._build_retriever)
+        elif self.shard_search is not None:
+            print(f"分片检索模式: {len(self.cfg.search_shards)} 个分片 ({', '.join(self.cfg.search_shards)})")
+
+    def _timed(self, name: str, step):
+        start = time.perf_counter()
+        step()
+        self.timings[name] = time.perf_counter() - start
         
     def _init_components(self):
         """初始化必要的组件"""
         try:
             # 初始化LLM
             llm_kwargs = {
-                "temperature": 0.1,
+                "temperature": self.cfg.temperature,
                 "model_name": self.model_name
             }
 
@@ -75,96 +245,256 @@ class SimpleRAG:
                 if self.base_url:
                     llm_kwargs["openai_api_base"] = self.base_url
 
-            self.llm = ChatOpenAI(**llm_kwargs)
+            if self.llm is None and len(self.cfg.llm_providers) > 1:
+                # 多个供应商：对冲请求 + 故障转移
+                from rag_system.llm_router import create_llm_router
+                self.llm = create_llm_router(self.cfg)
+                print(f"大模型路由: {', '.join(self.cfg.llm_providers)}（对冲请求: {'开启' if self.cfg.llm_hedge else '关闭'}）")
+            if self.llm is None:
+                from langchain_openai import ChatOpenAI
+                self.llm = ChatOpenAI(**llm_kwargs)
+
+            # 初始化嵌入模型：默认直接使用 HuggingFace 模型（无需本地服务）；不建索引时不需要
+            if self.embeddings is None and self.load_index:
+                self.embeddings = self._create_embeddings()
+            if self.cfg.micro_batch and self.embeddings is not None:
+                # 并发请求的查询嵌入合并为一次前向
+                from rag_system.batching import BatchedEmbeddings
+                self.embeddings = BatchedEmbeddings(
+                    self.embeddings, self.cfg.micro_batch_max_size, self.cfg.micro_batch_max_wait_ms
+                )
 
-            # 初始化嵌入模型：默认直接使用 HuggingFace 模型（无需本地服务）
-            hf_model = os.getenv("HF_EMBEDDING_MODEL") or "sentence-transformers/all-MiniLM-L6-v2"
-            try:
-                self.embeddings = HuggingFaceEmbeddings(model_name=hf_model)
-                print(f"[embedding] 使用 HuggingFace 模型: {hf_model}")
-            except Exception as hf_exc:
-                import traceback
-                print(f"[embedding] HuggingFaceEmbeddings 初始化失败: {repr(hf_exc)}")
-                traceback.print_exc()
-                # 可选远端回退：仅当显式开启 USE_REMOTE_EMBEDDING
-                use_remote = (os.getenv("USE_REMOTE_EMBEDDING") or "").lower() == "true"
-                if not use_remote:
-                    raise
-                embedding_model = os.getenv("EMBEDDING_MODEL_NAME") or "text-embedding-3-small"
-                try:
-                    embedding_kwargs = {"model": embedding_model}
-                    if self.api_key:
-                        embedding_kwargs["openai_api_key"] = self.api_key
-                        if self.base_url:
-                            embedding_kwargs["openai_api_base"] = self.base_url
-                    self.embeddings = OpenAIEmbeddings(**embedding_kwargs)
-                    print(f"[embedding] 回退使用远端嵌入模型: {embedding_model}")
-                except Exception as embed_exc:
-                    print(f"[embedding] 远端嵌入初始化仍失败: {repr(embed_exc)}")
-                    traceback.print_exc()
-                    raise
-                
-            # 尝试初始化交叉编码器（可选）
-            try:
-                self.cross_encoder = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
-                print("交叉编码器初始化成功")
-            except Exception as e:
-                print(f"交叉编码器初始化失败，将不使用重排序: {e}")
-                self.cross_encoder = None
+            # 交叉编码器在首次重排序（或启动预热）时再加载，见 load_cross_encoder
 
         except Exception as e:
             print(f"初始化组件失败: {e}")
             raise
             
+    def load_cross_encoder(self):
+        """加载交叉编码器（只尝试一次），失败时返回 None，重排序退化为检索顺序"""
+        if self._cross_encoder_loaded:
+            return self.cross_encoder
+        with self._cross_encoder_lock:
+            if not self._cross_encoder_loaded:
+                start = time.perf_counter()
+                if self.cfg.inference_backend == "onnx":
+                    try:
+                        from rag_system.inference_backends import create_onnx_cross_encoder
+                        self.cross_encoder = create_onnx_cross_encoder(self.cfg)
+                        print(f"交叉编码器初始化成功（ONNX）: {self.cross_encoder.onnx_file}")
+                    except Exception as e:
+                        print(f"ONNX 交叉编码器初始化失败，回退到 PyTorch: {e}")
+                if self.cross_encoder is None:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                        self.cross_encoder = CrossEncoder(self.cfg.cross_encoder_model)
+                        print(f"交叉编码器初始化成功: {self.cfg.cross_encoder_model}")
+                    except Exception as e:
+                        print(f"交叉编码器初始化失败，将不使用重排序: {e}")
+                        self.cross_encoder = None
+                if self.cross_encoder is not None and self.cfg.micro_batch:
+                    from rag_system.batching import BatchedCrossEncoder
+                    self.cross_encoder = BatchedCrossEncoder(
+                        self.cross_encoder, self.cfg.micro_batch_max_size, self.cfg.micro_batch_max_wait_ms
+                    )
+                self.timings["load_cross_encoder_s"] = time.perf_counter() - start
+                self._cross_encoder_loaded = True
+        return self.cross_encoder
+
+    def warm_up(self, queries=WARM_UP_QUERIES, top_k: int = 5) -> float:
+        """
+        启动预热：加载交叉编码器和分词器，并用合成查询跑通检索与重排序，
+        让嵌入模型和交叉编码器的首次推理开销发生在接流量之前。返回预热耗时（秒）。
+        """
+        start = time.perf_counter()
+        use_rerank = self.cfg.use_rerank
+        if use_rerank:
+            self.load_cross_encoder()
+        prompt_tokens(SCORING_INSTRUCTIONS, self.max_input_tokens)  # 加载离线分词器
+        for query in queries:
+            results = self.search(query, top_k=top_k, use_rerank=False)
+            if use_rerank and results:
+                self._rerank_results(query, results, top_k)
+        self.timings["warm_up_s"] = time.perf_counter() - start
+        print(f"预热完成，用时 {self.timings['warm_up_s']:.2f}s")
+        return self.timings["warm_up_s"]
+
+    def _create_embeddings(self):
+        """创建嵌入模型，HuggingFace 模型加载失败时按需回退到远端嵌入"""
+        hf_model = self.cfg.embedding_model
+        if self.cfg.inference_backend == "onnx":
+            try:
+                from rag_system.inference_backends import create_onnx_embeddings
+                embeddings = create_onnx_embeddings(self.cfg)
+                print(f"[embedding] 使用 ONNX 模型: {embeddings.onnx_file}")
+                return embeddings
+            except Exception as onnx_exc:
+                print(f"[embedding] ONNX 嵌入初始化失败，回退到 PyTorch: {repr(onnx_exc)}")
+        try:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            embeddings = HuggingFaceEmbeddings(model_name=hf_model)
+            print(f"[embedding] 使用 HuggingFace 模型: {hf_model}")
+            return embeddings
+        except Exception as hf_exc:
+            import traceback
+            print(f"[embedding] HuggingFaceEmbeddings 初始化失败: {repr(hf_exc)}")
+            traceback.print_exc()
+            # 可选远端回退：仅当显式开启 USE_REMOTE_EMBEDDING
+            use_remote = (os.getenv("USE_REMOTE_EMBEDDING") or "").lower() == "true"
+            if not use_remote:
+                raise
+            embedding_model = os.getenv("EMBEDDING_MODEL_NAME") or "text-embedding-3-small"
+            try:
+                embedding_kwargs = {"model": embedding_model}
+                if self.api_key:
+                    embedding_kwargs["openai_api_key"] = self.api_key
+                    if self.base_url:
+                        embedding_kwargs["openai_api_base"] = self.base_url
+                from langchain_openai import OpenAIEmbeddings
+                embeddings = OpenAIEmbeddings(**embedding_kwargs)
+                print(f"[embedding] 回退使用远端嵌入模型: {embedding_model}")
+                return embeddings
+            except Exception as embed_exc:
+                print(f"[embedding] 远端嵌入初始化仍失败: {repr(embed_exc)}")
+                traceback.print_exc()
+                raise
+
+    @staticmethod
+    def _format_content(category: str, resume: str, extra: Optional[Dict[str, Any]] = None) -> str:
+        """文档内容 - 每个人的完整信息"""
+        content = _chunk_prefix(category)
+        content += f"Resume: {resume}"
+        for col, value in (extra or {}).items():
+            content += f"\n{col}: {value}"
+        return content
+
+    def _make_document(self, idx: int, category: str, content: str, duplicate_kinds: Dict[str, int],
+                       source: str = ""):
+        """去重并创建文档，同时写入段落索引；重复简历返回 None。source 为入库文件名，只记入元数据"""
+        # 入库去重：完全重复/近似重复的简历合并到第一份，不再重复embedding和评分
+        if self.deduplicator is not None:
+            canonical, kind = self.deduplicator.add(idx, content)
+            if canonical is not None:
+                duplicate_kinds[kind] = duplicate_kinds.get(kind, 0) + 1
+                return None
+        doc = self._new_document(idx, category, content, source)
+        self._register_document(doc)
+        return doc
+
+    @staticmethod
+    def _new_document(idx: int, category: str, content: str, source: str = ""):
+        from langchain_core.documents import Document
+
+        # 创建文档对象 - 每个人对应一个独立的文档
+        doc = Document(
+            page_content=content,
+            metadata={
+                "id": idx,
+                "category": category,
+                "row_index": idx,
+                "person_id": idx,  # 明确标识这是一个人
+                "chunk_type": "person",  # 标识chunk类型为个人
+                "duplicate_count": 0,
+                "duplicate_ids": [],
+            }
+        )
+        if source:
+            doc.metadata["source"] = source
+        return doc
+
+    def _register_document(self, doc):
+        """登记到按ID查找表与段落索引"""
+        self._doc_by_id[doc.metadata["id"]] = doc
+        if self.use_snippets:
+            self.passage_index.add(doc.metadata["id"], doc.page_content)
+
     #从csv数据中加载
     def _load_data(self):
         """加载CSV数据 - 按行进行chunk和embedding"""
-        print(f"正在加载数据: {self.csv_file_path}")
+        paths = [self.csv_file_path] + [p for p in self.extra_csv_paths if os.path.exists(p)]
+        print(f"正在加载数据: {', '.join(paths)}")
 
         try:
-            # 读取CSV文件
-            df = pd.read_csv(self.csv_file_path)
+            import pandas as pd
+
+            # 读取CSV文件（主数据集 + 在线入库的简历），行号连续编号作为ID
+            df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
             print(f"成功读取 {len(df)} 行数据（每个人对应一行）")
+            next_id = len(df)
+            if self.shard is not None:
+                # 按行号取模分片；去重只在分片内进行
+                df = df.iloc[self.shard[0]::self.shard[1]]
+                print(f"分片 {self.shard[0]}/{self.shard[1]}: 加载其中 {len(df)} 行")
+            known_profiles = self.profile_store.load() if self.profile_store is not None else {}
 
             # 转换为文档格式 - 每行对应一个文档
-            from langchain_core.documents import Document
-
             documents = []
+            duplicate_kinds: Dict[str, int] = {}
             for idx, row in df.iterrows():
-                # 创建文档内容 - 每个人的完整信息
-                content = f"Category: {row.get('Category', 'Unknown')}\n\n"
-                content += f"Resume: {row.get('Resume', 'No resume information')}"
-
-                # 如果有其他列，也添加到内容中
-                for col in df.columns:
-                    if col not in ['Category', 'Resume'] and col in row:
-                        content += f"\n{col}: {row[col]}"
-
-                # 创建文档对象 - 每个人对应一个独立的文档
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        "id": idx,
-                        "category": row.get('Category', 'Unknown'),
-                        "row_index": idx,
-                        "person_id": idx,  # 明确标识这是一个人
-                        "chunk_type": "person"  # 标识chunk类型为个人
-                    }
-                )
+                category = row.get('Category', 'Unknown')
+                # 如果有其他列，也添加到内容中（入库文件名 Source 不参与检索和去重）
+                extra = {col: row[col] for col in df.columns
+                         if col not in ['Category', 'Resume', 'Source'] and col in row and pd.notna(row[col])}
+                content = self._format_content(category, row.get('Resume', 'No resume information'), extra)
+                source = row['Source'] if 'Source' in row and pd.notna(row['Source']) else ""
+
+                doc = self._make_document(idx, category, content, duplicate_kinds, source)
+                if doc is None:
+                    continue
                 documents.append(doc)
-                
+                profile = known_profiles.get(content_hash(row.get('Resume', '')))
+                if profile is not None:
+                    self.profiles[idx] = profile
+
                 # 打印每个文档的信息
                 if idx < 5:  # 只打印前5个作为示例
-                    print(f"文档 {idx}: 类别={row.get('Category', 'Unknown')}, 内容长度={len(content)}")
+                    print(f"文档 {idx}: 类别={category}, 内容长度={len(content)}")
+            self._next_id = next_id
+
+            if self.deduplicator is not None:
+                for doc in documents:
+                    duplicate_ids = self.deduplicator.duplicates.get(doc.metadata["id"], [])
+                    doc.metadata["duplicate_count"] = len(duplicate_ids)
+                    doc.metadata["duplicate_ids"] = list(duplicate_ids)
+                print(f"去重完成: 合并 {self.deduplicator.removed_count} 份重复简历 "
+                      f"(完全重复 {duplicate_kinds.get('exact', 0)}, 近似重复 {duplicate_kinds.get('near', 0)})")
 
             self.documents = documents
             print(f"成功创建 {len(self.documents)} 个文档（每个人对应一个文档）")
+            if self.use_snippets:
+                print(f"段落索引构建完成: {len(self.passage_index)} 个段落")
+            if self.profile_store is not None:
+                print(f"候选人档案: {len(self.profiles)}/{len(documents)} 份简历已有档案")
             print(f"文档元数据示例: {documents[0].metadata if documents else '无文档'}")
 
         except Exception as e:
             print(f"加载数据失败: {e}")
             raise
             
+    def _fetch_k(self, unit_count: int) -> int:
+        """检索器召回数量；片段模式下多召回一些片段，按人聚合后仍有 top_n 位候选人"""
+        k = self.top_n * self.cfg.chunk_fetch_factor if self.index_mode == "chunk" else self.top_n
+        return max(1, min(k, unit_count))
+
+    def _index_units(self, documents: List[Any]) -> List[Any]:
+        """返回进入检索索引的文档：person 模式原样返回，chunk 模式把每份简历切分为重叠片段"""
+        if self.index_mode != "chunk":
+            return documents
+        from langchain_core.documents import Document
+
+        units = []
+        for doc in documents:
+            prefix = _chunk_prefix(doc.metadata["category"])
+            body = doc.page_content[len(prefix):] if doc.page_content.startswith(prefix) else doc.page_content
+            chunks = split_chunks(body, self.cfg.chunk_max_chars, self.cfg.chunk_overlap_chars) or [body]
+            for i, chunk in enumerate(chunks):
+                # 每个片段都带上类别，片段元数据沿用所属简历的 id / person_id
+                units.append(Document(
+                    page_content=prefix + chunk,
+                    metadata={**doc.metadata, "chunk_type": "chunk", "chunk_index": i, "chunk_count": len(chunks)},
+                ))
+        return units
+
     #建好检索器
     def _build_retriever(self):
         """构建检索器 - 按行进行embedding"""
@@ -178,55 +508,192 @@ class SimpleRAG:
             print(f"第一个文档内容预览: {self.documents[0].page_content[:200]}...")
             print(f"第一个文档元数据: {self.documents[0].metadata}")
 
+            from langchain_classic.retrievers import EnsembleRetriever
+            from langchain_community.retrievers import BM25Retriever
+            from langchain_community.vectorstores import FAISS
+
+            self.index_documents = self._index_units(self.documents)
+            if self.index_mode == "chunk":
+                print(f"片段级索引: {len(self.documents)} 份简历切分为 {len(self.index_documents)} 个片段")
+
             # 为混合检索准备统一的k，至少为1
-            k = max(1, min(self.top_n, len(self.documents)))
+            k = self._fetch_k(len(self.index_documents))
 
             # 1. 构建向量检索器 - 每个文档独立embedding
             print("正在构建向量索引（按行embedding）...")
             vectorstore = FAISS.from_documents(
-                documents=self.documents,
+                documents=self.index_documents,
                 embedding=self.embeddings
             )
             vector_retriever = vectorstore.as_retriever(
                 search_kwargs={"k": k}
             )
+            self.vectorstore = vectorstore
+            self.vector_retriever = vector_retriever
             print("向量索引构建完成")
 
             # 2. 构建BM25检索器 - 每个文档独立索引
             print("正在构建BM25检索器（按行索引）...")
             bm25_retriever = BM25Retriever.from_documents(
-                self.documents
+                self.index_documents
             )
             bm25_retriever.k = k
+            self.bm25_retriever = bm25_retriever
             print("BM25检索器构建完成")
 
             # 3. 组合检索器
             self.retriever = EnsembleRetriever(
                 retrievers=[vector_retriever, bm25_retriever],
-                weights=[0.6, 0.4]
+                weights=list(self.cfg.ensemble_weights)
             )
 
             print("混合检索器构建完成")
-            print(f"检索器配置: 向量检索器k={min(8, len(self.documents))}, BM25检索器k={min(8, len(self.documents))}")
+            print(f"检索器配置: 向量检索器k={k}, BM25检索器k={k}, 权重={list(self.cfg.ensemble_weights)}")
 
         except Exception as e:
             print(f"构建检索器失败: {e}")
             # 回退到BM25
-            self.retriever = BM25Retriever.from_documents(self.documents)
-            self.retriever.k = min(8, len(self.documents))
+            from langchain_community.retrievers import BM25Retriever
+            self.index_documents = self._index_units(self.documents)
+            self.retriever = BM25Retriever.from_documents(self.index_documents)
+            self.retriever.k = self._fetch_k(len(self.index_documents))
+            self.bm25_retriever = self.retriever
+            self.vector_retriever = None
             print("回退到BM25检索器")
             
+    #在线追加简历
+    def add_documents(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        向在线索引追加简历，无需重启服务。
+
+        Args:
+            records: {"category", "resume", 可选 "source"} 字典列表
+
+        Returns:
+            {"added", "duplicates", "documents", "accepted"}：新增文档数、被去重合并的份数、
+            索引中的文档总数，以及被收录（未判为重复）的 records 下标
+
+        先完成去重判断、嵌入和 BM25 重建（都不修改索引状态），成功后再在写锁内一并登记去重指纹、
+        文档、档案并分配ID：嵌入失败时不留下“已见过但未入索引”的简历，重新上传不会被误判为重复。
+        文档ID只分配给被收录的简历，与调用方落盘的行顺序一致，重启后ID不变；
+        被合并的重复简历不落盘、不分配ID，在 duplicate_ids 中记为入库文件名。
+        """
+        from langchain_classic.retrievers import EnsembleRetriever
+        from langchain_community.retrievers import BM25Retriever
+
+        if self.shard is not None or self.shard_search is not None:
+            raise ValueError("分片检索模式不支持在线追加简历，请写入数据文件后重启分片进程")
+
+        with self._ingest_lock:
+            # 1. 去重判断：与已入库文档比较，再与本批中更早的简历比较；此时不登记
+            batch_dedup = Deduplicator(self.deduplicator.max_distance) if self.deduplicator is not None else None
+            contents = []
+            accepted = []
+            duplicate_kinds: Dict[str, int] = {}
+            for position, record in enumerate(records):
+                category = record.get("category") or "Unknown"
+                content = self._format_content(category, record["resume"])
+                contents.append(content)
+                if batch_dedup is not None:
+                    canonical, kind = self.deduplicator.find(content)
+                    if canonical is None:
+                        canonical, kind = batch_dedup.add(position, content)
+                    if canonical is not None:
+                        duplicate_kinds[kind] = duplicate_kinds.get(kind, 0) + 1
+                        continue
+                accepted.append(position)
+
+            stats = {"added": len(accepted), "duplicates": sum(duplicate_kinds.values()), "accepted": accepted}
+            if not accepted:
+                stats["documents"] = len(self.documents)
+                return stats
+
+            # 2. 只为被收录的简历分配ID并创建文档；嵌入、BM25 重建与档案提取在写锁外完成，失败时没有任何状态改变
+            first_id = self._next_id
+            ids = {position: first_id + i for i, position in enumerate(accepted)}
+            new_docs = [self._new_document(ids[position], records[position].get("category") or "Unknown",
+                                           contents[position], records[position].get("source", ""))
+                        for position in accepted]
+            new_units = self._index_units(new_docs)
+            texts = [doc.page_content for doc in new_units]
+            vectors = self.embeddings.embed_documents(texts) if self.vectorstore is not None else None
+            documents = self.documents + new_docs
+            index_documents = self.index_documents + new_units
+            bm25_retriever = BM25Retriever.from_documents(index_documents)
+            bm25_retriever.k = self._fetch_k(len(index_documents))
+            # 入库时即用规则提取档案（无需大模型）
+            profile_rows = []
+            if self.profile_store is not None:
+                profile_rows = [(content_hash(records[position]["resume"]),
+                                 extract_profile_rules(records[position]["resume"]), "rules")
+                                for position in accepted]
+
+            # 3. 写锁内追加向量、替换检索器，并登记去重指纹、文档、档案与ID
+            with self._index_lock.write():
+                if self.vectorstore is not None:
+                    self.vectorstore.add_embeddings(list(zip(texts, vectors)),
+                                                    metadatas=[doc.metadata for doc in new_units])
+                    self.retriever = EnsembleRetriever(
+                        retrievers=[self.vector_retriever, bm25_retriever],
+                        weights=list(self.cfg.ensemble_weights)
+                    )
+                else:
+                    self.retriever = bm25_retriever
+                self.bm25_retriever = bm25_retriever
+                self.documents = documents
+                self.index_documents = index_documents
+                self._next_id = first_id + len(accepted)
+                for doc in new_docs:
+                    self._register_document(doc)
+                for doc, (_, profile, _) in zip(new_docs, profile_rows):
+                    self.profiles[doc.metadata["id"]] = profile
+
+                if self.deduplicator is not None:
+                    for position, content in enumerate(contents):
+                        self.deduplicator.add(ids.get(position, records[position].get("source") or "ingest"), content)
+                    # 被合并的重复简历记到已有文档上
+                    if duplicate_kinds:
+                        for canonical_id, duplicate_ids in self.deduplicator.duplicates.items():
+                            canonical = self._doc_by_id.get(canonical_id)
+                            if canonical is not None and len(duplicate_ids) != canonical.metadata["duplicate_count"]:
+                                canonical.metadata["duplicate_count"] = len(duplicate_ids)
+                                canonical.metadata["duplicate_ids"] = list(duplicate_ids)
+
+            if profile_rows:
+                self.profile_store.append(profile_rows)
+
+        stats["documents"] = len(documents)
+        print(f"在线追加简历: 新增 {stats['added']}，去重合并 {stats['duplicates']}，当前文档 {stats['documents']}")
+        return stats
+
+    #交叉编码器的输入文本
+    def _rerank_text(self, doc: Dict) -> str:
+        """有段落摘要时使用“类别 + 摘要”，否则退回简历开头（限制文本长度）"""
+        max_chars = self.cfg.rerank_max_chars
+        if doc.get("snippet"):
+            return f"Category: {doc['category']}\n{doc['snippet']}"[:max_chars]
+        return doc["content"][:max_chars]
+
+    def rerank_scores(self, query: str, documents: List[Dict]) -> Optional[List[float]]:
+        """交叉编码器对每位候选人打分（不排序）；交叉编码器不可用时返回 None"""
+        if not documents or self.load_cross_encoder() is None:
+            return None
+        return [float(score) for score in
+                self.cross_encoder.predict([(query, self._rerank_text(doc)) for doc in documents])]
+
     #用cross encoder对结果精排序
     def _rerank_results(self, query: str, documents: List[Dict], top_k: int = 5) -> List[Dict]:
         """使用交叉编码器重排序结果"""
-        if not self.cross_encoder or len(documents) <= 1:
+        if len(documents) <= 1 or self.load_cross_encoder() is None:
             return documents[:top_k]
 
         try:
             print(f"使用交叉编码器对 {len(documents)} 个结果进行重排序...")
 
-            # 准备输入
-            pairs = [(query, doc["content"][:500]) for doc in documents]  # 限制文本长度
+            # 准备输入：优先使用与查询相关的段落摘要，而不是简历开头
+            pairs = [(query, self._rerank_text(doc)) for doc in documents]
+            avg_chars = sum(len(p[1]) for p in pairs) / len(pairs)
+            print(f"重排序输入平均长度: {avg_chars:.0f} 字符")
 
             # 计算分数
             scores = self.cross_encoder.predict(pairs)
@@ -255,15 +722,153 @@ class SimpleRAG:
             print(f"重排序失败: {e}")
             return documents[:top_k]
             
+    #片段级检索结果按人聚合
+    def _aggregate_chunks(self, chunks: List[Any]):
+        """
+        按 person_id 聚合片段：片段得分取排名倒数 1/(rank+1)，候选人得分为最高片段分（max）
+        或前 chunk_aggregation_top_k 个片段分之和（sum）。
+
+        Returns:
+            (按得分排序的简历文档, {id: {"chunk_score", "matched_chunks", "snippet"}})
+        """
+        top_k = self.cfg.chunk_aggregation_top_k
+        grouped: Dict[Any, List[tuple]] = {}
+        for rank, chunk in enumerate(chunks):
+            grouped.setdefault(chunk.metadata["person_id"], []).append((1.0 / (rank + 1), chunk))
+
+        ranked = []
+        for person_id, hits in grouped.items():
+            if self.cfg.chunk_aggregation == "max":
+                score = hits[0][0]
+            else:
+                score = sum(hit_score for hit_score, _ in hits[:top_k])
+            ranked.append((score, person_id, hits[:top_k]))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+
+        documents, info = [], {}
+        for score, person_id, hits in ranked:
+            doc = self._doc_by_id.get(person_id) or hits[0][1]
+            prefix = _chunk_prefix(doc.metadata["category"])
+            # 命中片段按原文顺序拼接为摘要
+            texts = [chunk.page_content[len(prefix):] for _, chunk in
+                     sorted(hits, key=lambda hit: hit[1].metadata.get("chunk_index", 0))]
+            documents.append(doc)
+            info[person_id] = {
+                "chunk_score": score,
+                "matched_chunks": len(grouped[person_id]),
+                "snippet": " ... ".join(texts)[:self.cfg.snippet_max_chars],
+            }
+        return documents, info
+
     #执行检索和重排序
-    def search(self, query: str, top_k: int = 5, use_rerank: bool = True) -> List[Dict]:
+    def _get_retriever(self, mode: str):
+        """按检索模式选择检索器：ensemble（混合）、bm25、vector"""
+        if mode == "ensemble":
+            return self.retriever
+        if mode == "bm25":
+            retriever = self.bm25_retriever
+        elif mode == "vector":
+            retriever = self.vector_retriever
+        else:
+            raise ValueError(f"未知的检索模式: {mode}（可选 {', '.join(RETRIEVAL_MODES)}）")
+        if retriever is None:
+            raise ValueError(f"检索模式 {mode} 不可用（检索器构建失败）")
+        return retriever
+
+    def retrieve_candidates(self, query: str, mode: str = "ensemble") -> List[Dict]:
+        """
+        在本进程的索引上召回并格式化候选人（不重排序），检索分数按排名递减。
+        """
+        # 执行检索（在线追加简历时等待索引替换完成）
+        with self._index_lock.read():
+            retrieved_docs = self._get_retriever(mode).invoke(query)
+
+        if not retrieved_docs:
+            return []
+
+        print(f"检索到 {len(retrieved_docs)} 个结果")
+
+        # 打印检索到的原始结果
+        print("\n=== 检索器返回的原始结果 ===")
+        for i, doc in enumerate(retrieved_docs):
+            print(f"\n--- 结果 {i+1} ---")
+            print(f"ID: {doc.metadata.get('id', 'N/A')}")
+            print(f"类别: {doc.metadata.get('category', 'Unknown')}")
+            print(f"行索引: {doc.metadata.get('row_index', 'N/A')}")
+            print(f"内容预览: {doc.page_content[:200]}...")
+            print("-" * 50)
+
+        return self._format_candidates(retrieved_docs, query)
+
+    def _format_candidates(self, retrieved_docs: List[Any], query: str) -> List[Dict]:
+        """把检索到的文档格式化为候选人字典（片段模式下先按人聚合），检索分数按排名递减"""
+        formatted_results = []
+        if self.index_mode == "chunk":
+            retrieved_docs, chunk_info = self._aggregate_chunks(retrieved_docs)
+        for i, doc in enumerate(retrieved_docs):
+            result = {
+                "id": doc.metadata.get("id", i),
+                "category": doc.metadata.get("category", "Unknown"),
+                "content": doc.page_content,
+                "duplicate_count": doc.metadata.get("duplicate_count", 0),
+                "duplicate_ids": doc.metadata.get("duplicate_ids", []),
+                "retrieval_score": 1.0 - (i * 0.1),  # 简单递减分数
+                "preview": doc.page_content[:150] + "..." if len(doc.page_content) > 150 else doc.page_content
+            }
+            profile = self.profiles.get(result["id"])
+            if profile is not None:
+                result["profile"] = profile
+            if self.index_mode == "chunk":
+                # 命中的片段即与查询相关的内容，长简历不必整份送入重排序和大模型
+                result.update(chunk_info[result["id"]])
+            elif self.use_snippets:
+                # 与查询最相关的段落，供重排序和大模型评分使用
+                result["snippet"] = self.passage_index.snippet(
+                    result["id"], query, max_chars=self.cfg.snippet_max_chars
+                )
+            formatted_results.append(result)
+        return formatted_results
+
+    def retrieve_scored(self, query: str, mode: str = "ensemble", k: Optional[int] = None) -> List[Dict]:
+        """
+        分片召回：返回本分片各检索器前 k 名的候选人，附带原始分数 vector_distance（FAISS L2 距离）和
+        bm25_score，未进入某检索器前 k 名时对应分数为 None。协调进程据此重建全局排名（见 rag_system.sharding）。
+        """
+        if self.index_mode == "chunk":
+            raise ValueError("分片召回暂不支持片段级索引（INDEX_MODE=chunk）")
+        self._get_retriever(mode)  # 校验检索模式可用
+        k = max(1, k or self.top_n)
+        docs: Dict[Any, Any] = {}
+        scores: Dict[Any, Dict[str, float]] = {}
+        with self._index_lock.read():
+            if mode != "bm25" and self.vector_retriever is not None:
+                for doc, distance in self.vectorstore.similarity_search_with_score(query, k=k):
+                    docs.setdefault(doc.metadata["id"], doc)
+                    scores.setdefault(doc.metadata["id"], {})["vector_distance"] = float(distance)
+            if mode != "vector":
+                bm25 = self.bm25_retriever
+                raw = bm25.vectorizer.get_scores(bm25.preprocess_func(query))
+                for index in heapq.nlargest(k, range(len(raw)), key=raw.__getitem__):
+                    doc = bm25.docs[index]
+                    docs.setdefault(doc.metadata["id"], doc)
+                    scores.setdefault(doc.metadata["id"], {})["bm25_score"] = float(raw[index])
+
+        formatted_results = self._format_candidates(list(docs.values()), query)
+        for result in formatted_results:
+            result["vector_distance"] = scores[result["id"]].get("vector_distance")
+            result["bm25_score"] = scores[result["id"]].get("bm25_score")
+        return formatted_results
+
+    def search(self, query: str, top_k: Optional[int] = 5, use_rerank: Optional[bool] = None,
+               mode: str = "ensemble") -> List[Dict]:
         """
         搜索相关文档
 
         Args:
             query: 查询语句
-            top_k: 返回结果数量
-            use_rerank: 是否使用重排序
+            top_k: 返回结果数量，None 时返回重排序后的整个召回池
+            use_rerank: 是否使用重排序，默认取配置中的 use_rerank
+            mode: 检索模式，ensemble / bm25 / vector，用于评估各检索器的效果与速度
 
         Returns:
             搜索结果列表
@@ -271,43 +876,27 @@ class SimpleRAG:
         if not query or not query.strip():
             raise ValueError("查询语句不能为空")
 
-        if not self.retriever:
+        if not self.retriever and self.shard_search is None:
             raise ValueError("检索器未初始化")
 
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"未知的检索模式: {mode}（可选 {', '.join(RETRIEVAL_MODES)}）")
+
         print(f"搜索: '{query}'")
+        if use_rerank is None:
+            use_rerank = self.cfg.use_rerank
 
         try:
-            # 执行检索
-            retrieved_docs = self.retriever.invoke(query)
+            if self.shard_search is not None:
+                # 分片模式：各分片并行召回后合并为全局候选池，重排序只在本进程做一次
+                formatted_results = self.shard_search.search(query, self.top_n, mode)
+            else:
+                formatted_results = self.retrieve_candidates(query, mode)
 
-            if not retrieved_docs:
+            if not formatted_results:
                 print("未找到相关结果")
                 return []
 
-            print(f"检索到 {len(retrieved_docs)} 个结果")
-            
-            # 打印检索到的原始结果
-            print("\n=== 检索器返回的原始结果 ===")
-            for i, doc in enumerate(retrieved_docs):
-                print(f"\n--- 结果 {i+1} ---")
-                print(f"ID: {doc.metadata.get('id', 'N/A')}")
-                print(f"类别: {doc.metadata.get('category', 'Unknown')}")
-                print(f"行索引: {doc.metadata.get('row_index', 'N/A')}")
-                print(f"内容预览: {doc.page_content[:200]}...")
-                print("-" * 50)
-
-            # 格式化结果
-            formatted_results = []
-            for i, doc in enumerate(retrieved_docs):
-                result = {
-                    "id": doc.metadata.get("id", i),
-                    "category": doc.metadata.get("category", "Unknown"),
-                    "content": doc.page_content,
-                    "retrieval_score": 1.0 - (i * 0.1),  # 简单递减分数
-                    "preview": doc.page_content[:150] + "..." if len(doc.page_content) > 150 else doc.page_content
-                }
-                formatted_results.append(result)
-
             # 打印格式化后的检索结果
             print("\n=== 格式化后的检索结果 ===")
             for i, result in enumerate(formatted_results):
@@ -324,7 +913,7 @@ class SimpleRAG:
                 print("\n=== 开始重排序 ===")
                 final_results = self._rerank_results(query, formatted_results, top_k)
             else:
-                print(f"\n=== 跳过重排序，直接返回前 {top_k} 个结果 ===")
+                print(f"\n=== 跳过重排序，直接返回前 {top_k or len(formatted_results)} 个结果 ===")
                 final_results = formatted_results[:top_k]
 
             # 打印最终结果
@@ -351,7 +940,8 @@ class SimpleRAG:
             return []
             
     #让大模型对候选人进行评分
-    def score_candidates(self, query: str, requirements: str, top_k: int = 5) -> List[Dict]:
+    def score_candidates(self, query: str, requirements: str, top_k: int = 5,
+                         max_input_tokens: Optional[int] = None) -> List[Dict]:
         """
         对候选人进行评分
     
@@ -359,18 +949,71 @@ class SimpleRAG:
             query: 查询语句
             requirements: 岗位要求
             top_k: 候选人数量
+            max_input_tokens: 提示词token上限，默认使用初始化时的配置
     
         Returns:
             评分结果列表，每个元素包含结构化信息
         """
         # 检索候选人
-        candidates = self.search(query, top_k=top_k, use_rerank=True)
+        candidates = self.search(query, top_k=top_k)
     
         if not candidates:
             return []
-    
-        # 构建提示词
-        prompt = f"""
+
+        return self.score_retrieved(requirements, candidates, max_input_tokens)
+
+    #对已检索的候选人调用大模型评分
+    def score_retrieved(self, requirements: str, candidates: List[Dict],
+                        max_input_tokens: Optional[int] = None, max_retries: int = 1) -> List[Dict]:
+        """
+        对给定候选人调用大模型评分。
+        流式解析输出，解析失败或缺失的候选人单独重新请求（最多 max_retries 次），
+        不会因为个别候选人的输出格式问题而整体重新生成。
+        """
+        # 本地分词器与大模型的分词器不同，计数只是近似值，预算按 token_budget_margin 留出余量
+        budget = int((max_input_tokens or self.max_input_tokens) * (1 - self.cfg.token_budget_margin))
+        requirements = fit_requirements(requirements, budget)
+
+        scored: Dict[int, Dict] = {}
+        pending = list(range(len(candidates)))
+        last_error = ""
+        for attempt in range(max_retries + 1):
+            subset = [candidates[i] for i in pending]
+            prompt = self._build_scoring_prompt(requirements, subset, budget)
+            try:
+                print("正在评估候选人..." if attempt == 0 else f"重新评估 {len(subset)} 位解析失败的候选人...")
+                parsed, result_text = self._stream_scores(prompt)
+                print(f"评估完成，成功解析 {len(parsed)}/{len(subset)} 位候选人")
+            except Exception as e:
+                print(f"评估失败: {e}")
+                last_error = f"评估失败: {e}"
+                break
+
+            for local_index, score_result in match_scores_to_candidates(parsed, subset).items():
+                scored[pending[local_index]] = score_result
+            pending = [i for i in pending if i not in scored]
+            if not pending:
+                break
+            last_error = result_text
+
+        results = []
+        for i, candidate in enumerate(candidates):
+            score_result = scored.get(i) or self._default_score(i, last_error)
+            profile = candidate.get("profile")
+            if profile and not score_result.get("score_failed"):
+                # 年限与技能以档案为准，提示词中已不再要求大模型输出
+                if score_result.get("years_experience") in (None, "") and profile.get("years_experience") is not None:
+                    score_result["years_experience"] = profile["years_experience"]
+                if not score_result.get("skills") and profile.get("skills"):
+                    score_result["skills"] = ",".join(profile["skills"])
+            score_result["candidate_info"] = candidate
+            results.append(score_result)
+        return results
+
+    #构建评分提示词
+    def _build_scoring_prompt(self, requirements: str, candidates: List[Dict], budget: int) -> str:
+        """构建评分提示词，并按相关性在token预算内分配每位候选人的简历篇幅"""
+        header = f"""
 你是一个专业的HR专家，请根据以下岗位要求对候选人进行评估。
     
 ## 岗位要求：
@@ -378,106 +1021,91 @@ class SimpleRAG:
     
 ## 候选人信息：
 """
-    
-        for i, candidate in enumerate(candidates, 1):
+        profile_lines = [format_profile(c["profile"]) if c.get("profile") else "" for c in candidates]
+        instructions = SCORING_INSTRUCTIONS_WITH_PROFILES if candidates and all(profile_lines) \
+            else SCORING_INSTRUCTIONS
+        # 档案行计入固定部分，剩余预算再分配给简历正文
+        fixed = header + instructions + "\n".join(f"档案: {line}" for line in profile_lines if line)
+        resume_texts = budget_candidate_texts(fixed, candidates, budget, text_key="snippet")
+
+        prompt = header
+        for i, (candidate, resume_text) in enumerate(zip(candidates, resume_texts), 1):
             prompt += f"\n候选人{i} (ID: {candidate['id']}, 类别: {candidate['category']}):\n"
             prompt += f"匹配度: {candidate.get('rerank_score', candidate.get('retrieval_score', 0)):.3f}\n"
-            prompt += f"简历信息:\n{candidate['content']}\n"
+            if profile_lines[i - 1]:
+                prompt += f"档案: {profile_lines[i - 1]}\n"
+            prompt += f"简历信息:\n{resume_text}\n"
             prompt += "-" * 50 + "\n"
-    
-        prompt += """
-## 评估要求：
-请为每位候选人提供以下评估（使用中文）：
-1. 技术能力匹配度 (0-10分)
-2. 经验匹配度 (0-10分)
-3. 综合评分 (0-10分)
-4. 工作经验年限 (直接给出数字，如：5)
-5. 核心技能 (用逗号分隔的关键技能，如：Python,机器学习,数据分析)
-6. 主要优势 (1-2点)
-7. 主要不足 (1-2点)
-8. 是否推荐 (是/否)
-    
-## 输出格式（严格按照以下JSON格式输出，不要添加其他内容）：
-[
-  {
-    "candidate_id": "候选人编号",
-    "technical_score": 技术能力分数(0-10),
-    "experience_score": 经验匹配分数(0-10),
-    "overall_score": 综合评分(0-10),
-    "years_experience": 工作经验年限,
-    "skills": "核心技能(逗号分隔)",
-    "strengths": "主要优势",
-    "weaknesses": "主要不足",
-    "recommendation": "是否推荐(是/否)"
-  }
-]
-"""
-    
-        # 调用LLM
+        prompt += instructions
+        print(f"提示词长度: {prompt_tokens(prompt, budget)} tokens（预算 {budget}）")
+        return prompt
+
+    #流式调用大模型并增量解析
+    def _stream_scores(self, prompt: str):
+        """流式读取模型输出，每个候选人对象闭合后立即解析；返回 (评分列表, 原始输出)"""
+        parser = IncrementalScoreParser()
+        parsed: List[Dict] = []
+        chunks: List[str] = []
         try:
-            print("正在评估候选人...")
-            response = self.llm.invoke(prompt)
-            result_text = response.content if hasattr(response, 'content') else str(response)
-            print("评估完成")
-            
-            # 尝试解析JSON结果
-            import json
-            import re
-            
-            # 提取JSON部分
-            json_match = re.search(r'\[[\s\S]*\]', result_text)
-            if json_match:
-                json_text = json_match.group(0)
-                try:
-                    parsed_result = json.loads(json_text)
-                    # 将候选人信息与评分结果关联
-                    for i, candidate_result in enumerate(parsed_result):
-                        if i < len(candidates):
-                            candidate_result['candidate_info'] = candidates[i]
-                    return parsed_result
-                except json.JSONDecodeError:
-                    print(f"JSON解析失败: {json_text}")
-                    pass
-            
-            # 如果解析失败，返回原始文本和候选人信息
-            return [{
-                "candidate_id": f"候选人{i+1}",
-                "technical_score": 0,
-                "experience_score": 0,
-                "overall_score": 0,
-                "years_experience": "未知",
-                "skills": "未知",
-                "strengths": result_text,
-                "weaknesses": "",
-                "recommendation": "否",
-                "candidate_info": candidate
-            } for i, candidate in enumerate(candidates)]
-    
+            for chunk in self.llm.stream(prompt):
+                text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                chunks.append(text)
+                parsed.extend(parser.feed(text))
         except Exception as e:
-            print(f"评估失败: {e}")
-            # 返回默认结果
-            return [{
-                "candidate_id": f"候选人{i+1}",
-                "technical_score": 0,
-                "experience_score": 0,
-                "overall_score": 0,
-                "years_experience": "未知",
-                "skills": "未知",
-                "strengths": f"评估失败: {e}",
-                "weaknesses": "",
-                "recommendation": "否",
-                "candidate_info": candidate
-            } for i, candidate in enumerate(candidates)]
+            # 输出中途断开：保留已解析的候选人，缺失的由 score_retrieved 重试
+            if not parsed:
+                raise
+            print(f"模型输出中途失败（{e}），已解析 {len(parsed)} 位候选人")
+            return parsed, "".join(chunks)
+        parsed.extend(parser.close())
+        if parser.failed:
+            print(f"有 {len(parser.failed)} 个评分对象无法解析: {parser.failed[:2]}")
+        return parsed, "".join(chunks)
+
+    @staticmethod
+    def _default_score(index: int, reason: str) -> Dict:
+        """评分失败时的默认结果"""
+        return {
+            "candidate_id": f"候选人{index+1}",
+            "technical_score": 0,
+            "experience_score": 0,
+            "overall_score": 0,
+            "years_experience": "未知",
+            "skills": "未知",
+            "strengths": reason,
+            "weaknesses": "",
+            "recommendation": "否",
+            "score_failed": True,  # 标记为默认结果，缓存不会复用
+        }
 
     #简单的系统信息
+    def batching_metrics(self) -> Dict[str, Any]:
+        """微批处理的排队与批大小指标（未启用时为空）"""
+        metrics = {}
+        for name, component in (("query_embedding", self.embeddings), ("cross_encoder", self.cross_encoder)):
+            batcher = getattr(component, "batcher", None)
+            if batcher is not None:
+                metrics[name] = batcher.metrics()
+        return metrics
+
+    def llm_metrics(self) -> Dict[str, Any]:
+        """大模型路由的各供应商延迟与故障转移指标（未启用路由时为空）"""
+        metrics = getattr(self.llm, "metrics", None)
+        return metrics() if callable(metrics) else {}
+
     def get_system_info(self) -> Dict:
         """获取系统信息"""
         return {
             "documents_count": len(self.documents),
             "has_retriever": self.retriever is not None,
             "has_cross_encoder": self.cross_encoder is not None,
+            "passages_count": len(self.passage_index),
+            "duplicates_removed": self.deduplicator.removed_count if self.deduplicator else 0,
             "has_api_key": bool(self.api_key),
-            "model": self.model_name
+            "model": self.model_name,
+            "performance": self.cfg.profile_summary(),
+            "timings": dict(self.timings),
+            "shards": self.shard_search.metrics() if self.shard_search is not None else None,
         }
 
 
@@ -511,6 +1139,7 @@ def quick_test():
                 'Machine learning engineer with 6 years experience in TensorFlow, PyTorch, and MLOps. Published papers in top conferences.'
             ]
         }
+        import pandas as pd
         df = pd.DataFrame(test_data)
         df.to_csv(test_file, index=False)
         print(f"创建测试文件: {test_file}")
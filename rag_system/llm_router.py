@@ -0,0 +1,302 @@
+"""
+多个大模型供应商之间的对冲请求与故障转移。
+
+SimpleRAG 只通过 stream(prompt) 调用大模型，LLMRouter 实现同一接口：
+- 按健康状态和首 token 延迟对供应商排序，优先使用最快的健康供应商；
+- 首选供应商超过对冲等待（该供应商首 token 延迟 p95，样本不足时取配置值）仍未返回时，
+  向下一个供应商发出同样的请求，先返回首 token 的一方胜出，另一方被取消；
+- 429、5xx、超时和连接错误视为可重试：该供应商进入冷却期，请求转给下一个供应商。
+  其他错误（如 400）换供应商也不会成功，不再发起新的请求；已发出的对冲请求仍可胜出，全部结束后才抛出。
+
+胜出方开始输出后不再切换供应商（已输出的内容无法撤回）。流中途出错时记入该供应商的失败并进入冷却期，
+再抛给调用方：score_retrieved 保留已解析的候选人，对缺失的候选人重试时会避开该供应商。
+"""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+# 配置中可选的供应商名称
+LLM_PROVIDERS = ("gemini", "qwen", "qwen2")
+
+_DONE = object()
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """429 / 5xx / 超时 / 连接错误可以换供应商重试"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    name = type(error).__name__.lower()
+    if "timeout" in name or "connection" in name:
+        return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "rate-limit" in text
+
+
+class _Provider:
+    """单个供应商：模型客户端、首 token 延迟样本与冷却状态"""
+
+    def __init__(self, name: str, llm: Any, cooldown_s: float = 30.0, window: int = 200):
+        self.name = name
+        self.llm = llm
+        self.cooldown_s = cooldown_s
+        self.latencies: deque = deque(maxlen=window)  # 首 token 延迟（秒）
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.wins = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def record_failure(self, retryable: bool):
+        self.errors += 1
+        if retryable:
+            # 连续失败时冷却期翻倍，最长 8 倍
+            self.consecutive_failures += 1
+            self.cooldown_until = time.monotonic() + self.cooldown_s * min(8, 2 ** (self.consecutive_failures - 1))
+
+    def record_success(self, first_token_s: float):
+        self.wins += 1
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.latencies.append(first_token_s)
+
+
+class _Attempt:
+    """在后台线程中向一个供应商发起流式请求；首 token 或失败通过 signals 通知调度方"""
+
+    def __init__(self, provider: _Provider, prompt: Any, signals: queue.Queue, kwargs: Dict[str, Any]):
+        self.provider = provider
+        self.started = time.perf_counter()
+        self.first_token_s: Optional[float] = None
+        self.chunks: queue.Queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(prompt, signals, kwargs),
+                                        name=f"llm-{provider.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, prompt, signals: queue.Queue, kwargs):
+        answered = False
+        stream = None
+        try:
+            stream = self.provider.llm.stream(prompt, **kwargs)
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    break
+                if not answered:
+                    answered = True
+                    self.first_token_s = time.perf_counter() - self.started
+                    signals.put((self, None))
+                self.chunks.put(chunk)
+            if not answered and not self.cancelled.is_set():
+                self.first_token_s = time.perf_counter() - self.started
+                signals.put((self, None))
+            self.chunks.put(_DONE)
+        except BaseException as e:  # noqa: BLE001 - 交给调度方决定换供应商还是抛出
+            if answered:
+                self.chunks.put(e)
+            else:
+                signals.put((self, e))
+        finally:
+            # 关闭生成器以释放底层 HTTP 连接（被取消的请求不再继续读取）
+            close = getattr(stream, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:  # noqa: BLE001
+                    pass
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class LLMRouter:
+    """
+    对冲与故障转移的大模型路由，stream 接口与 ChatOpenAI.stream 相同。
+
+    Args:
+        providers: [(名称, 模型客户端)]，按配置优先级排列
+        hedge: 是否在首选供应商迟迟不返回时向下一个供应商发出对冲请求
+        hedge_delay_s: 首 token 延迟样本不足时的对冲等待
+        min_hedge_delay_s: 对冲等待下限，避免 p95 很小时频繁发出重复请求
+        min_samples: 使用 p95 作为对冲等待所需的最少样本数
+        cooldown_s: 可重试错误后的冷却时间
+    """
+
+    def __init__(self, providers: List[tuple], hedge: bool = True, hedge_delay_s: float = 8.0,
+                 min_hedge_delay_s: float = 1.0, min_samples: int = 10, cooldown_s: float = 30.0):
+        if not providers:
+            raise ValueError("至少需要一个大模型供应商")
+        self.providers = [_Provider(name, llm, cooldown_s) for name, llm in providers]
+        self.hedge = hedge
+        self.hedge_delay_s = hedge_delay_s
+        self.min_hedge_delay_s = min_hedge_delay_s
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self.hedged_requests = 0
+        self.failovers = 0
+
+    def _ranked(self) -> List[_Provider]:
+        """健康的供应商在前，各组内按首 token 延迟中位数升序（无样本的保持配置顺序）"""
+        now = time.monotonic()
+        with self._lock:
+            order = {id(p): i for i, p in enumerate(self.providers)}
+
+            def key(p: _Provider):
+                p50 = p.quantile(0.5) if len(p.latencies) >= self.min_samples else None
+                return (not p.healthy(now), p50 if p50 is not None else float("inf"), order[id(p)])
+
+            return sorted(self.providers, key=key)
+
+    def _hedge_delay(self, provider: _Provider) -> float:
+        with self._lock:
+            if len(provider.latencies) >= self.min_samples:
+                return max(self.min_hedge_delay_s, provider.quantile(0.95))
+        return self.hedge_delay_s
+
+    def stream(self, prompt: Any, **kwargs) -> Iterator[Any]:
+        candidates = self._ranked()
+        signals: queue.Queue = queue.Queue()
+        active: List[_Attempt] = []
+        last_error: Optional[BaseException] = None
+        fatal_error: Optional[BaseException] = None  # 不可重试的错误：不再发起新请求
+        hedged = False
+
+        def launch() -> bool:
+            if not candidates or fatal_error is not None:
+                return False
+            provider = candidates.pop(0)
+            with self._lock:
+                provider.requests += 1
+            active.append(_Attempt(provider, prompt, signals, kwargs))
+            return True
+
+        launch()
+        winner: Optional[_Attempt] = None
+        while winner is None:
+            can_hedge = self.hedge and not hedged and fatal_error is None and candidates and len(active) == 1
+            timeout = max(0.0, self._hedge_delay(active[0].provider) - (time.perf_counter() - active[0].started)) \
+                if can_hedge else None
+            try:
+                attempt, error = signals.get(timeout=timeout)
+            except queue.Empty:
+                # 首选供应商超过对冲等待仍未返回首 token，向下一个供应商发出同样的请求
+                hedged = True
+                with self._lock:
+                    self.hedged_requests += 1
+                print(f"[llm] {active[0].provider.name} 超过对冲等待，同时请求 {candidates[0].name}")
+                launch()
+                continue
+            if attempt not in active:
+                continue
+            if error is None:
+                winner = attempt
+                break
+            active.remove(attempt)
+            retryable = is_retryable_error(error)
+            with self._lock:
+                attempt.provider.record_failure(retryable)
+            last_error = error
+            if not retryable:
+                fatal_error = fatal_error or error
+            if not active:
+                if not launch():
+                    raise fatal_error or last_error
+                with self._lock:
+                    self.failovers += 1
+                print(f"[llm] {attempt.provider.name} 请求失败（{error}），转到 {active[0].provider.name}")
+
+        # 取消落败的请求，只有胜出方计入延迟样本
+        with self._lock:
+            winner.provider.record_success(winner.first_token_s)
+            for other in active:
+                if other is not winner:
+                    other.provider.cancelled += 1
+        for other in active:
+            if other is not winner:
+                other.cancel()
+
+        try:
+            while True:
+                item = winner.chunks.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    with self._lock:
+                        winner.provider.record_failure(is_retryable_error(item))
+                    raise item
+                yield item
+        finally:
+            winner.cancel()
+
+    def invoke(self, prompt: Any, **kwargs) -> Any:
+        """非流式调用：合并流式输出的文本（同样经过对冲与故障转移）"""
+        chunks = list(self.stream(prompt, **kwargs))
+        if not chunks:
+            return None
+        merged = chunks[0]
+        for chunk in chunks[1:]:
+            merged = merged + chunk
+        return merged
+
+    def metrics(self) -> Dict[str, Any]:
+        """各供应商的请求数、胜出数、错误数、首 token 延迟与冷却状态"""
+        now = time.monotonic()
+        with self._lock:
+            providers = {}
+            for p in self.providers:
+                p50, p95 = p.quantile(0.5), p.quantile(0.95)
+                providers[p.name] = {
+                    "requests": p.requests,
+                    "wins": p.wins,
+                    "errors": p.errors,
+                    "cancelled": p.cancelled,
+                    "healthy": p.healthy(now),
+                    "cooldown_remaining_s": max(0.0, p.cooldown_until - now),
+                    "first_token_p50_ms": p50 * 1000 if p50 is not None else None,
+                    "first_token_p95_ms": p95 * 1000 if p95 is not None else None,
+                }
+            return {"hedged_requests": self.hedged_requests, "failovers": self.failovers, "providers": providers}
+
+
+def provider_settings(cfg, name: str) -> Dict[str, str]:
+    """按供应商名称取模型、接口地址和密钥"""
+    if name == "gemini":
+        return {"model": cfg.gemini_model_name, "base_url": cfg.gemini_base_url,
+                "api_key": cfg.gemini_api_key or cfg.api_key}
+    if name in ("qwen", "qwen2"):
+        model = cfg.qwen_model_name if name == "qwen" else cfg.qwen2_model_name
+        return {"model": model, "base_url": cfg.qwen_base_url, "api_key": cfg.qwen_api_key or cfg.api_key}
+    raise ValueError(f"未知的大模型供应商: {name}，可选: {', '.join(LLM_PROVIDERS)}")
+
+
+def create_llm_router(cfg) -> LLMRouter:
+    """按 cfg.llm_providers 为每个供应商创建 ChatOpenAI 客户端"""
+    from langchain_openai import ChatOpenAI
+
+    providers = []
+    for name in cfg.llm_providers:
+        settings = provider_settings(cfg, name)
+        llm = ChatOpenAI(
+            model_name=settings["model"],
+            openai_api_key=settings["api_key"] or None,
+            openai_api_base=settings["base_url"],
+            temperature=cfg.temperature,
+            max_retries=0,  # 由路由负责换供应商重试，SDK 内部的退避重试会拖慢故障转移
+        )
+        providers.append((name, llm))
+    return LLMRouter(providers, hedge=cfg.llm_hedge, hedge_delay_s=cfg.llm_hedge_delay_s,
+                     min_hedge_delay_s=cfg.llm_min_hedge_delay_s, cooldown_s=cfg.llm_cooldown_s)
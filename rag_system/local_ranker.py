@@ -0,0 +1,304 @@
+"""
+不调用大模型的本地评分：由检索/重排序信号和简历特征线性组合出 0-10 分。
+
+特征（每位候选人）：
+- 交叉编码器分数（sigmoid 后），未重排序时使用检索分数；
+- 岗位要求中技能词的覆盖率，按必备/加分权重与 BM25 的 IDF 加权（常见技能权重低，稀缺技能权重高）；
+- 工作年限与岗位要求年限之比（取自候选人档案，没有档案时用规则提取）；
+- 岗位名称与候选人类别的匹配程度。
+
+技术能力、经验匹配、综合评分各对应一组线性权重。默认权重为人工设定；
+用 `python -m rag_system.local_ranker --calibrate` 在一批候选人上以大模型评分为目标拟合权重，
+并在留出的查询上报告误差与排序相关性，校准结果写入 LOCAL_RANKER_PATH，服务启动时自动加载。
+
+全部计算都是正则匹配与矩阵乘法，单核每秒可评分数千位候选人，适合大批量初筛与大模型不可用时的降级。
+
+用法:
+    python -m rag_system.local_ranker --calibrate --per-query 10
+    python -m rag_system.local_ranker --calibrate --stub --embedder hash
+"""
+import argparse
+import json
+import math
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from rag_system.profiles import SKILL_ALIASES, extract_years
+from rag_system.requirements_parser import analyze_requirements
+
+FEATURE_NAMES = ("cross_encoder", "skill_overlap", "years_fit", "category_match", "bias")
+TARGETS = ("technical_score", "experience_score", "overall_score")
+
+# 默认权重：行对应 FEATURE_NAMES，列对应 TARGETS；各特征取值在 [0, 1]，满分约为 10
+DEFAULT_WEIGHTS = np.array([
+    [3.0, 1.5, 2.5],   # cross_encoder
+    [5.0, 1.5, 3.5],   # skill_overlap
+    [0.5, 5.0, 2.0],   # years_fit
+    [1.0, 1.5, 1.5],   # category_match
+    [0.5, 0.5, 0.5],   # bias
+])
+
+# 未能判断工作年限时的年限特征
+_UNKNOWN_YEARS_FIT = 0.3
+_WORD_RE = re.compile(r"[a-z0-9+#.]+|[一-鿿]+")
+
+_ALIASES_BY_SKILL: Dict[str, List[str]] = {}
+for _alias, _skill in SKILL_ALIASES.items():
+    _ALIASES_BY_SKILL.setdefault(_skill, []).append(_alias)
+
+
+@lru_cache(maxsize=1024)
+def _skill_pattern(skill: str) -> re.Pattern:
+    aliases = sorted(set(_ALIASES_BY_SKILL.get(skill, []) + [skill.lower()]), key=len, reverse=True)
+    return re.compile(r"(?<![A-Za-z0-9.+#])(?:" + "|".join(re.escape(a) for a in aliases) + r")(?![A-Za-z0-9+#])", re.I)
+
+
+def bm25_idf(df: int, n: int) -> float:
+    return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+
+def skill_idf_table(texts: Iterable[str], skills: Sequence[str]) -> Dict[str, float]:
+    """流式统计技能的文档频率并换算为 IDF（只遍历一次，不保留文本）"""
+    patterns = {skill: _skill_pattern(skill) for skill in skills}
+    counts = dict.fromkeys(patterns, 0)
+    n = 0
+    for text in texts:
+        n += 1
+        for skill, pattern in patterns.items():
+            if pattern.search(text):
+                counts[skill] += 1
+    return {skill: bm25_idf(df, n) for skill, df in counts.items()}
+
+
+def _sigmoid(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, x))))
+
+
+def _category_match(job_title: str, category: str) -> float:
+    title, category = (job_title or "").casefold(), (category or "").casefold()
+    if not title or not category:
+        return 0.0
+    if category in title or title in category:
+        return 1.0
+    title_words, category_words = set(_WORD_RE.findall(title)), set(_WORD_RE.findall(category))
+    if not title_words or not category_words:
+        return 0.0
+    return len(title_words & category_words) / len(category_words)
+
+
+class LocalRanker:
+    """
+    基于特征的本地评分器，输出结构与 SimpleRAG.score_retrieved 相同。
+
+    Args:
+        weights: (特征数, 3) 的权重矩阵，默认 DEFAULT_WEIGHTS
+        corpus: 返回当前全部简历（文本或 Document）的函数，用于计算技能词的 IDF；为 None 时各技能等权
+        idf_table: 预先统计的技能 -> IDF（如批量评分时流式统计全库），优先于 corpus
+    """
+
+    def __init__(self, weights: Optional[np.ndarray] = None, corpus: Optional[Callable[[], Sequence[Any]]] = None,
+                 idf_table: Optional[Dict[str, float]] = None):
+        weights = DEFAULT_WEIGHTS if weights is None else np.asarray(weights, dtype=float)
+        if weights.shape != (len(FEATURE_NAMES), len(TARGETS)):
+            raise ValueError(f"权重矩阵形状需为 {(len(FEATURE_NAMES), len(TARGETS))}: {weights.shape}")
+        self.weights = weights
+        self.corpus = corpus
+        self.idf_table = idf_table
+        self.calibrated = weights is not DEFAULT_WEIGHTS
+        self._idf: Dict[str, float] = {}
+        self._idf_size = -1
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, corpus: Optional[Callable[[], Sequence[Any]]] = None,
+             idf_table: Optional[Dict[str, float]] = None) -> "LocalRanker":
+        """读取校准后的权重；文件不存在时使用默认权重"""
+        if not Path(path).exists():
+            return cls(corpus=corpus, idf_table=idf_table)
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(np.array(data["weights"], dtype=float), corpus=corpus, idf_table=idf_table)
+
+    def save(self, path: str, report: Optional[Dict[str, Any]] = None):
+        data = {"features": list(FEATURE_NAMES), "targets": list(TARGETS), "weights": self.weights.tolist()}
+        if report:
+            data["report"] = report
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def idf(self, skill: str) -> float:
+        """BM25 形式的 IDF；语料变化（在线入库）后重新计算"""
+        if self.idf_table is not None and skill in self.idf_table:
+            return self.idf_table[skill]
+        if self.corpus is None:
+            return 1.0
+        with self._lock:
+            texts = self.corpus()
+            if len(texts) != self._idf_size:
+                self._idf, self._idf_size = {}, len(texts)
+            if skill not in self._idf:
+                pattern = _skill_pattern(skill)
+                df = sum(1 for item in texts if pattern.search(getattr(item, "page_content", item)))
+                self._idf[skill] = bm25_idf(df, len(texts))
+            return self._idf[skill]
+
+    def features(self, job_title: str, requirements: str, candidates: List[Dict[str, Any]]):
+        """返回 (特征矩阵, 岗位技能, 每位候选人命中的技能, 每位候选人的年限)"""
+        analysis = analyze_requirements(job_title, requirements)
+        skill_weights = analysis.skill_weights
+        skills = list(skill_weights)
+        weights = np.array([self.idf(s) * skill_weights[s] for s in skills]) if skills else np.zeros(0)
+        min_years = analysis.min_years
+
+        rows, matched_lists, years_list = [], [], []
+        for candidate in candidates:
+            text = candidate.get("content") or candidate.get("snippet") or ""
+            profile = candidate.get("profile") or {}
+            known = {s.casefold() for s in profile.get("skills", [])}
+            hits = [s.casefold() in known or bool(_skill_pattern(s).search(text)) for s in skills]
+            matched_lists.append([s for s, hit in zip(skills, hits) if hit])
+            skill_overlap = float(weights[np.array(hits)].sum() / weights.sum()) if skills and weights.sum() > 0 else 0.0
+
+            years = profile.get("years_experience")
+            if years is None:
+                years = extract_years(text)
+            years_list.append(years)
+            if years is None:
+                years_fit = _UNKNOWN_YEARS_FIT
+            else:
+                years_fit = min(1.0, years / min_years) if min_years else min(1.0, years / 10.0)
+
+            if candidate.get("rerank_score") is not None:
+                relevance = _sigmoid(float(candidate["rerank_score"]))
+            else:
+                relevance = min(1.0, max(0.0, float(candidate.get("retrieval_score", 0.0))))
+            rows.append([relevance, skill_overlap, years_fit, _category_match(job_title, candidate.get("category")), 1.0])
+        return np.array(rows, dtype=float).reshape(-1, len(FEATURE_NAMES)), skills, matched_lists, years_list
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        return np.clip(features @ self.weights, 0.0, 10.0)
+
+    def score(self, job_title: str, requirements: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """对候选人评分，返回与大模型评分相同的字段（附 candidate_info）"""
+        if not candidates:
+            return []
+        features, skills, matched_lists, years_list = self.features(job_title, requirements, candidates)
+        scores = self.predict(features)
+        results = []
+        for candidate, row, matched, years in zip(candidates, scores, matched_lists, years_list):
+            missing = [s for s in skills if s not in matched]
+            technical, experience, overall = (round(float(v), 1) for v in row)
+            results.append({
+                "candidate_id": candidate.get("id"),
+                "technical_score": technical,
+                "experience_score": experience,
+                "overall_score": overall,
+                "years_experience": years if years is not None else "未知",
+                "skills": ",".join(matched or (candidate.get("profile") or {}).get("skills", [])[:5]),
+                "strengths": f"匹配技能: {', '.join(matched)}" if matched else "无明显匹配的技能",
+                "weaknesses": f"缺少: {', '.join(missing)}" if missing else "",
+                "recommendation": "是" if overall >= 6.0 else "否",
+                "scoring_mode": "local",
+                "candidate_info": candidate,
+            })
+        return results
+
+    def fit(self, features: np.ndarray, targets: np.ndarray, ridge: float = 0.1):
+        """以大模型评分为目标做岭回归，拟合每个评分维度的权重"""
+        if len(features) < len(FEATURE_NAMES):
+            raise ValueError(f"校准样本过少: {len(features)}")
+        gram = features.T @ features + ridge * np.eye(features.shape[1])
+        self.weights = np.linalg.solve(gram, features.T @ targets)
+        self.calibrated = True
+        return self
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) < 2:
+        return 0.0
+    ra, rb = np.argsort(np.argsort(a)), np.argsort(np.argsort(b))
+    if ra.std() == 0 or rb.std() == 0:
+        return 0.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def evaluate(ranker: LocalRanker, features: np.ndarray, targets: np.ndarray) -> Dict[str, float]:
+    """与大模型评分相比的平均绝对误差，以及综合评分的 Spearman 相关系数"""
+    predicted = ranker.predict(features)
+    report = {f"mae_{name}": float(np.abs(predicted[:, i] - targets[:, i]).mean()) for i, name in enumerate(TARGETS)}
+    report["spearman_overall"] = _spearman(predicted[:, 2], targets[:, 2])
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    import contextlib
+    import io
+
+    from config import get_config
+
+    cfg = get_config()
+    parser = argparse.ArgumentParser(description="以大模型评分校准本地评分器的权重")
+    parser.add_argument("--calibrate", action="store_true", help="以大模型评分为目标拟合权重")
+    parser.add_argument("--queries", default="benchmarks/queries.json", help="校准用的查询集（JSON，需含 query 字段）")
+    parser.add_argument("--per-query", type=int, default=10, help="每个查询评分的候选人数")
+    parser.add_argument("--holdout", type=float, default=0.25, help="留出用于评估的查询比例")
+    parser.add_argument("--out", default=cfg.local_ranker_path, help="校准结果路径，默认 LOCAL_RANKER_PATH")
+    parser.add_argument("--stub", action="store_true", help="使用本地桩模型代替真实大模型（演练流程）")
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model", help="hash 使用本地哈希嵌入")
+    args = parser.parse_args(argv)
+    if not args.calibrate:
+        parser.print_help()
+        return
+
+    from rag_system.llama_rag_system import SimpleRAG
+
+    llm = embeddings = None
+    if args.stub:
+        from benchmarks.stubs import StubChatModel
+        llm = StubChatModel()
+    if args.embedder == "hash":
+        from benchmarks.stubs import HashEmbeddings
+        embeddings = HashEmbeddings()
+    queries = [item["query"] for item in json.loads(Path(args.queries).read_text(encoding="utf-8"))]
+    with contextlib.redirect_stdout(io.StringIO()):
+        rag = SimpleRAG("rag_system/UpdatedResumeDataSet.csv", cfg=cfg, llm=llm, embeddings=embeddings,
+                        extra_csv_paths=[cfg.ingest_store_path])
+    ranker = LocalRanker(corpus=lambda: rag.documents)
+
+    # 按查询划分训练与留出集，避免同一查询的候选人同时出现在两边
+    split = max(1, int(len(queries) * (1 - args.holdout)))
+    samples: Dict[str, List[np.ndarray]] = {"train_x": [], "train_y": [], "test_x": [], "test_y": []}
+    for i, query in enumerate(queries):
+        with contextlib.redirect_stdout(io.StringIO()):
+            candidates = rag.search(query, top_k=args.per_query)
+            scored = [r for r in rag.score_retrieved(query, candidates) if not r.get("score_failed")]
+        if not scored:
+            continue
+        features, *_ = ranker.features(query, query, [r["candidate_info"] for r in scored])
+        targets = np.array([[float(r[t]) for t in TARGETS] for r in scored])
+        part = "train" if i < split else "test"
+        samples[f"{part}_x"].append(features)
+        samples[f"{part}_y"].append(targets)
+        print(f"[local-ranker] {i + 1}/{len(queries)} {query[:30]}: {len(scored)} 位候选人")
+
+    if not samples["train_x"] or not samples["test_x"]:
+        raise SystemExit("没有可用的大模型评分样本，无法校准")
+    train_x, train_y = np.vstack(samples["train_x"]), np.vstack(samples["train_y"])
+    test_x, test_y = np.vstack(samples["test_x"]), np.vstack(samples["test_y"])
+    baseline = evaluate(LocalRanker(), test_x, test_y)
+    ranker.fit(train_x, train_y)
+    calibrated = evaluate(ranker, test_x, test_y)
+    report = {"train_samples": len(train_x), "test_samples": len(test_x), "default": baseline, "calibrated": calibrated}
+    for name, stats in (("默认权重", baseline), ("校准后", calibrated)):
+        print(f"[local-ranker] {name}: 综合评分 MAE={stats['mae_overall_score']:.2f}，"
+              f"Spearman={stats['spearman_overall']:.3f}（留出 {len(test_x)} 位候选人）")
+    ranker.save(args.out, report)
+    print(f"[local-ranker] 权重已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import ast
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# 评分结果中必须能解析出的字段
+SCORE_FIELDS = ("technical_score", "experience_score", "overall_score")
+
+_CODE_FENCE_RE = re.compile(r"```(?:json)?")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_FULLWIDTH_COMMA_RE = re.compile(r'(["\d\]}]|true|false|null)\s*，\s*(?=")')
+_FULLWIDTH_COLON_RE = re.compile(r'"\s*：\s*')
+_SMART_QUOTE_KEY_RE = re.compile(r'[“”]([A-Za-z_]+)[“”]\s*:')
+_MISSING_COMMA_RE = re.compile(r'(["\d\]}]|true|false|null)(\s*\n\s*)(?=")')
+_SCORE_UNIT_RE = re.compile(r':\s*(-?\d+(?:\.\d+)?)\s*(?:分|/\s*10)')
+_PY_LITERAL_RE = re.compile(r':\s*(True|False|None)\b')
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def repair_json_text(text: str) -> str:
+    """修复大模型输出中常见的JSON缺陷：代码块标记、尾逗号、全角标点、缺失逗号、分数单位、Python字面量"""
+    text = _CODE_FENCE_RE.sub("", text).strip()
+    text = _SMART_QUOTE_KEY_RE.sub(r'"\1":', text)
+    text = _FULLWIDTH_COLON_RE.sub('": ', text)
+    text = _FULLWIDTH_COMMA_RE.sub(r"\1, ", text)
+    text = _SCORE_UNIT_RE.sub(r": \1", text)
+    text = _PY_LITERAL_RE.sub(lambda m: ": " + _PY_LITERALS[m.group(1)], text)
+    text = _MISSING_COMMA_RE.sub(r"\1,\2", text)
+    text = _TRAILING_COMMA_RE.sub(r"\1", text)
+    return text
+
+
+def _to_score(value: Any) -> Optional[float]:
+    """将分数字段转换为0-10之间的浮点数，无法转换时返回 None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return max(0.0, min(10.0, float(value)))
+    match = re.search(r"-?\d+(?:\.\d+)?", str(value))
+    if not match:
+        return None
+    return max(0.0, min(10.0, float(match.group(0))))
+
+
+def normalize_score_object(obj: Any) -> Optional[Dict[str, Any]]:
+    """校验并规整单个候选人的评分对象，缺少必需分数时返回 None"""
+    if not isinstance(obj, dict):
+        return None
+    result = dict(obj)
+    for field in SCORE_FIELDS:
+        score = _to_score(result.get(field))
+        if score is None:
+            return None
+        result[field] = score
+    if isinstance(result.get("skills"), list):
+        result["skills"] = ",".join(str(s) for s in result["skills"])
+    return result
+
+
+def parse_object(text: str) -> Optional[Dict[str, Any]]:
+    """解析单个JSON对象，失败时依次尝试修复和按Python字面量解析"""
+    for candidate in (text, repair_json_text(text)):
+        try:
+            return normalize_score_object(json.loads(candidate))
+        except (json.JSONDecodeError, ValueError):
+            pass
+    try:
+        literal = repair_json_text(text)
+        for py, js in _PY_LITERALS.items():
+            literal = re.sub(rf"\b{js}\b", py, literal)
+        return normalize_score_object(ast.literal_eval(literal))
+    except (ValueError, SyntaxError):
+        return None
+
+
+class IncrementalScoreParser:
+    """
+    流式增量解析评分输出：随模型输出逐块 feed，
+    每当一个顶层候选人对象闭合就立即解析并返回，不必等待整个数组生成完毕。
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.obj_start: Optional[int] = None
+        self.failed: List[str] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """追加一段输出，返回本次新解析出的完整对象"""
+        self.buffer += chunk or ""
+        completed: List[Dict[str, Any]] = []
+        while self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                if self.depth == 0:
+                    self.obj_start = self.pos
+                self.depth += 1
+            elif ch == "}" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    self._emit(self.buffer[self.obj_start:self.pos + 1], completed)
+            self.pos += 1
+
+        # 没有未闭合对象时丢弃已消费的内容，保持缓冲区有界
+        if self.depth == 0:
+            self.buffer = ""
+            self.pos = 0
+        return completed
+
+    def close(self) -> List[Dict[str, Any]]:
+        """输出结束：尝试补全被截断的最后一个对象"""
+        completed: List[Dict[str, Any]] = []
+        if self.depth > 0 and self.obj_start is not None:
+            tail = self.buffer[self.obj_start:]
+            if self.in_string:
+                tail += '"'
+            self._emit(tail + "}" * self.depth, completed)
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.obj_start = None
+        return completed
+
+    def _emit(self, text: str, completed: List[Dict[str, Any]]):
+        obj = parse_object(text)
+        if obj is None:
+            self.failed.append(text)
+        else:
+            completed.append(obj)
+
+
+def parse_scores(text: str) -> List[Dict[str, Any]]:
+    """一次性解析完整输出（非流式场景）"""
+    parser = IncrementalScoreParser()
+    return parser.feed(text) + parser.close()
+
+
+def match_scores_to_candidates(parsed: List[Dict[str, Any]], candidates: List[Dict]) -> Dict[int, Dict[str, Any]]:
+    """
+    将解析出的评分对象对应到候选人下标：先按 candidate_id 与候选人ID匹配，再按“候选人N”编号匹配。
+    无法匹配或重复的对象直接丢弃（不按输出顺序补位，以免把一位候选人的评分记到另一位名下），
+    缺失的候选人由调用方重新请求。
+    """
+    by_id = {str(c.get("id")): i for i, c in enumerate(candidates)}
+    assigned: Dict[int, Dict[str, Any]] = {}
+
+    for obj in parsed:
+        raw_id = str(obj.get("candidate_id", "")).strip()
+        index = by_id.get(raw_id)
+        if index is None:
+            id_match = re.search(r"ID[:：]?\s*(\S+?)[)）]?$", raw_id)
+            if id_match:
+                index = by_id.get(id_match.group(1))
+        if index is None:
+            num_match = re.fullmatch(r"候选人\s*(\d+)", raw_id)
+            if num_match and 0 < int(num_match.group(1)) <= len(candidates):
+                index = int(num_match.group(1)) - 1
+        if index is not None and index not in assigned:
+            assigned[index] = obj
+    return assigned
@@ -0,0 +1,346 @@
+"""候选人结构化档案：工作年限、规范化技能、最高学历、职位名称（离线提取，按简历文本哈希存储）"""
+import argparse
+import csv
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from rag_system.dedup import content_hash
+
+PROFILE_COLUMNS = ["content_hash", "years_experience", "skills", "education", "titles", "extractor"]
+_LIST_SEP = "; "
+
+# 技能别名 -> 规范名称（小写匹配）
+SKILL_ALIASES: Dict[str, str] = {
+    "python": "Python", "java": "Java", "javascript": "JavaScript", "js": "JavaScript",
+    "typescript": "TypeScript", "c++": "C++", "c#": "C#", ".net": ".NET", "asp.net": ".NET", "php": "PHP",
+    "sql": "SQL", "mysql": "MySQL", "sql server": "SQL Server", "sqlserver": "SQL Server", "oracle": "Oracle",
+    "postgresql": "PostgreSQL", "mongodb": "MongoDB", "cassandra": "Cassandra", "hbase": "HBase",
+    "machine learning": "机器学习", "deep learning": "深度学习", "nlp": "NLP",
+    "natural language processing": "NLP", "computer vision": "计算机视觉", "opencv": "OpenCV",
+    "tensorflow": "TensorFlow", "keras": "Keras", "pytorch": "PyTorch", "scikit-learn": "scikit-learn",
+    "sklearn": "scikit-learn", "pandas": "Pandas", "numpy": "NumPy", "data analysis": "数据分析",
+    "statistics": "统计学", "tableau": "Tableau", "power bi": "Power BI", "excel": "Excel",
+    "hadoop": "Hadoop", "spark": "Spark", "pyspark": "Spark", "hive": "Hive", "kafka": "Kafka",
+    "aws": "AWS", "azure": "Azure", "gcp": "GCP", "docker": "Docker", "kubernetes": "Kubernetes",
+    "jenkins": "Jenkins", "git": "Git", "linux": "Linux", "devops": "DevOps", "ansible": "Ansible",
+    "spring": "Spring", "spring boot": "Spring", "hibernate": "Hibernate", "microservices": "微服务",
+    "django": "Django", "flask": "Flask", "node.js": "Node.js", "nodejs": "Node.js", "react": "React",
+    "reactjs": "React", "angular": "Angular", "angularjs": "Angular", "vue": "Vue.js", "vue.js": "Vue.js",
+    "jquery": "jQuery", "html": "HTML", "css": "CSS", "android": "Android", "ios": "iOS",
+    "selenium": "Selenium", "manual testing": "手工测试", "automation testing": "自动化测试",
+    "sap": "SAP", "salesforce": "Salesforce", "blockchain": "区块链", "etl": "ETL",
+    "informatica": "Informatica", "photoshop": "Photoshop", "autocad": "AutoCAD",
+    "机器学习": "机器学习", "深度学习": "深度学习", "数据分析": "数据分析", "微服务": "微服务",
+}
+
+# 学历关键词（按级别从高到低）
+_EDUCATION_LEVELS: List[Tuple[str, re.Pattern]] = [
+    ("博士", re.compile(r"\b(?:ph\.?\s?d|doctorate)\b|博士", re.I)),
+    # 缩写须带点或为连写形式（B.E. / BTech），避免 "will be"、"contact me" 之类的普通英文被误判
+    ("硕士", re.compile(r"\b(?:m\.\s?tech|mtech|m\.\s?e\.?|mba|mca|m\.\s?sc|msc|m\.\s?com|mcom|pgdm|"
+                      r"master'?s?\s+(?:of|in|degree))(?![a-z])|硕士|研究生", re.I)),
+    ("本科", re.compile(r"\b(?:b\.\s?tech|btech|b\.\s?e\.?|bca|bba|b\.\s?sc|bsc|b\.\s?com|bcom|bachelor'?s?)(?![a-z])"
+                      r"|(?-i:\bBE)(?=\s+in\s|\s*\()|本科|学士", re.I)),
+    ("专科", re.compile(r"\bdiploma\b|专科|大专", re.I)),
+]
+
+_TITLE_RE = re.compile(
+    r"\b((?:senior|sr\.?|junior|jr\.?|lead|principal|associate|assistant)?\s*"
+    r"(?:software|data|web|java|python|devops|test|qa|network|database|business|hr|sales|mechanical|"
+    r"civil|electrical|operations|project|product)?\s*"
+    r"(?:engineer|developer|scientist|analyst|manager|consultant|architect|tester|designer|administrator|"
+    r"executive|officer|lead))\b",
+    re.I,
+)
+# 工作年限表述：数字两侧不能紧邻其他数字（排除“2016年7月-2019年6月”中的年份），并且需要时长语境——
+# “N+ years”、单位后紧跟“以上/经验/工作/experience”，或前面不远处有“经验/工作年限/experience”
+_YEARS_UNIT = r"(?:years?|yrs?|年)"
+_YEARS_NUM = r"(?<![\d.])(\d{1,2}(?:\.\d)?)(?![\d.])"
+_YEARS_RE = re.compile(
+    rf"{_YEARS_NUM}\s*(?:\+\s*{_YEARS_UNIT}|{_YEARS_UNIT}(?=\s*(?:及|或)?\s*(?:以上|经验|工作|of\s+(?:\w+\s+)?experience|experience|exp\b)))"
+    rf"|(?:经验|工作年限|experience|exp\.?)\s*(?:of|[:：-])?\s*(?:about|around|over|约|超过)?\s*{_YEARS_NUM}\s*\+?\s*{_YEARS_UNIT}",
+    re.I,
+)
+_SKILL_MONTHS_RE = re.compile(r"([A-Za-z][\w .#+/-]{0,40}?)\s*-\s*Exprience\s*-\s*(\d+)\s*months", re.I)
+_MONTHS_RE = re.compile(r"Expe?rience\s*-\s*(\d+)\s*months", re.I)
+_SKILL_TERMS_RE = re.compile(
+    r"(?<![A-Za-z0-9.+#])(" + "|".join(sorted((re.escape(k) for k in SKILL_ALIASES), key=len, reverse=True)) + r")(?![A-Za-z0-9+#])",
+    re.I,
+)
+
+
+def normalize_skills(skills: Iterable[str], limit: int = 20) -> List[str]:
+    """别名映射到规范名称，去重并保持出现顺序"""
+    result: List[str] = []
+    seen = set()
+    for skill in skills:
+        name = " ".join(str(skill).split()).strip(" -,.;")
+        if not name:
+            continue
+        name = SKILL_ALIASES.get(name.lower(), name)
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            result.append(name)
+        if len(result) >= limit:
+            break
+    return result
+
+
+def match_skills(text: str, limit: int = 20) -> List[str]:
+    """文本中出现的已知技能（规范名称）"""
+    return normalize_skills(_SKILL_TERMS_RE.findall(str(text)), limit)
+
+
+def extract_years(text: str) -> Optional[float]:
+    """工作年限：取明确的“N years / N年”表述与技能明细中最长月数的较大者，无法判断时为 None"""
+    text = str(text)
+    years = [float(a or b) for a, b in _YEARS_RE.findall(text) if 0 < float(a or b) <= 50]
+    months = [int(m) for m in _MONTHS_RE.findall(text)]
+    if months:
+        years.append(round(max(months) / 12, 1))
+    return max(years) if years else None
+
+
+def extract_profile_rules(text: str) -> Dict[str, Any]:
+    """本地规则提取档案（不调用大模型）"""
+    text = str(text)
+    skill_months = _SKILL_MONTHS_RE.findall(text)
+    # 技能：先取“Skill Details”中的条目，再补充正文中出现的已知技能
+    skills = normalize_skills([name for name, _ in skill_months] + _SKILL_TERMS_RE.findall(text))
+    education = next((level for level, pattern in _EDUCATION_LEVELS if pattern.search(text)), "")
+    titles: List[str] = []
+    for match in _TITLE_RE.findall(text):
+        title = " ".join(match.split()).title()
+        if len(title.split()) >= 2 and title not in titles:
+            titles.append(title)
+        if len(titles) >= 5:
+            break
+    return {
+        "years_experience": extract_years(text),
+        "skills": skills,
+        "education": education,
+        "titles": titles,
+    }
+
+
+PROFILE_PROMPT = """
+请从以下每份简历中提取与岗位无关的客观信息，不要评价候选人。
+
+{resumes}
+
+## 输出格式（严格按照以下JSON数组输出，每份简历一个对象，不要添加其他内容）：
+[
+  {{
+    "candidate_id": "简历ID（与上文括号中的 ID 一致）",
+    "years_experience": 工作经验年限（数字，无法判断时为 null）,
+    "skills": ["技能1", "技能2"],
+    "education": "最高学历（博士/硕士/本科/专科，无法判断时为空字符串）",
+    "titles": ["担任过的职位名称"]
+  }}
+]
+"""
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    if isinstance(value, str):
+        return [v for v in re.split(r"[,，;；、]", value) if v.strip()]
+    return []
+
+
+def _parse_llm_profiles(text: str) -> Dict[str, Dict[str, Any]]:
+    """解析大模型输出的档案数组，按 candidate_id 索引；无法解析时返回空"""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and item.get("candidate_id") is not None:
+            parsed[str(item["candidate_id"]).strip()] = item
+    return parsed
+
+
+def _merge_llm_profile(item: Optional[Dict[str, Any]], rules: Dict[str, Any]) -> Dict[str, Any]:
+    """大模型给出的有效字段优先，缺失或格式错误的字段用规则结果补齐"""
+    if not item:
+        return rules
+    profile = dict(rules)
+    try:
+        years = float(item.get("years_experience"))
+        if 0 <= years <= 50:
+            profile["years_experience"] = years
+    except (TypeError, ValueError):
+        pass
+    skills = normalize_skills(_as_list(item.get("skills")))
+    if skills:
+        profile["skills"] = skills
+    if isinstance(item.get("education"), str) and item["education"].strip():
+        profile["education"] = item["education"].strip()
+    titles = [t.strip() for t in _as_list(item.get("titles")) if t.strip()]
+    if titles:
+        profile["titles"] = titles[:5]
+    return profile
+
+
+def extract_profiles_llm(llm, texts: List[str], max_chars: int = 3000) -> List[Dict[str, Any]]:
+    """一次请求提取一批简历的档案"""
+    resumes = "\n".join(
+        f"候选人{i} (ID: {i}, 类别: -):\n{text[:max_chars]}\n" + "-" * 50 for i, text in enumerate(texts, 1)
+    )
+    response = llm.invoke(PROFILE_PROMPT.format(resumes=resumes))
+    parsed = _parse_llm_profiles(response.content if hasattr(response, "content") else str(response))
+    return [_merge_llm_profile(parsed.get(str(i)), extract_profile_rules(text)) for i, text in enumerate(texts, 1)]
+
+
+def format_profile(profile: Dict[str, Any], max_skills: int = 12) -> str:
+    """提示词中的紧凑档案行"""
+    parts = []
+    if profile.get("years_experience") is not None:
+        parts.append(f"经验 {profile['years_experience']:g} 年")
+    if profile.get("education"):
+        parts.append(f"学历 {profile['education']}")
+    if profile.get("skills"):
+        parts.append("技能 " + ", ".join(profile["skills"][:max_skills]))
+    if profile.get("titles"):
+        parts.append("职位 " + ", ".join(profile["titles"][:3]))
+    return "；".join(parts)
+
+
+class ProfileStore:
+    """档案文件：每列一个字段，列表字段以 "; " 连接；只追加，便于中断后续跑"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """content_hash -> 档案；文件不存在时为空"""
+        profiles: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return profiles
+        with self.path.open("r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                years = row.get("years_experience") or ""
+                profiles[row["content_hash"]] = {
+                    "years_experience": float(years) if years else None,
+                    "skills": [s for s in (row.get("skills") or "").split(_LIST_SEP) if s],
+                    "education": row.get("education") or "",
+                    "titles": [t for t in (row.get("titles") or "").split(_LIST_SEP) if t],
+                }
+        return profiles
+
+    def append(self, rows: List[Tuple[str, Dict[str, Any], str]]):
+        """追加 (content_hash, 档案, 提取方式)"""
+        if not rows:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            is_new = not self.path.exists() or self.path.stat().st_size == 0
+            with self.path.open("a", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                if is_new:
+                    writer.writerow(PROFILE_COLUMNS)
+                for key, profile, extractor in rows:
+                    years = profile.get("years_experience")
+                    writer.writerow([
+                        key, "" if years is None else years, _LIST_SEP.join(profile.get("skills", [])),
+                        profile.get("education", ""), _LIST_SEP.join(profile.get("titles", [])), extractor,
+                    ])
+
+
+def iter_resumes(csv_paths: List[str]) -> Iterable[str]:
+    """按顺序读取各CSV的 Resume 列（不存在的文件跳过）"""
+    import pandas as pd
+
+    for path in csv_paths:
+        if not Path(path).exists():
+            continue
+        for chunk in pd.read_csv(path, usecols=["Resume"], chunksize=2000):
+            for resume in chunk["Resume"].dropna():
+                yield str(resume)
+
+
+def run_extraction(resumes: Iterable[str], store: ProfileStore, extractor: str = "rules", llm=None,
+                   batch_size: int = 8, limit: Optional[int] = None) -> Dict[str, Any]:
+    """提取尚未有档案的简历（按文本哈希去重），每批完成后立即写入档案文件"""
+    done = set(store.load())
+    stats = {"skipped": 0, "extracted": 0, "batches": 0}
+    pending: Dict[str, str] = {}
+
+    def flush():
+        if not pending:
+            return
+        keys, texts = list(pending), list(pending.values())
+        if extractor == "llm":
+            profiles = extract_profiles_llm(llm, texts)
+        else:
+            profiles = [extract_profile_rules(text) for text in texts]
+        store.append([(key, profile, extractor) for key, profile in zip(keys, profiles)])
+        done.update(keys)
+        stats["extracted"] += len(keys)
+        stats["batches"] += 1
+        pending.clear()
+
+    for resume in resumes:
+        key = content_hash(resume)
+        if key in done or key in pending:
+            stats["skipped"] += 1
+            continue
+        if limit is not None and stats["extracted"] + len(pending) >= limit:
+            break
+        pending[key] = resume
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    from config import get_config
+
+    cfg = get_config()
+    parser = argparse.ArgumentParser(description="离线提取候选人结构化档案（可中断续跑）")
+    parser.add_argument("--csv", nargs="+", default=["rag_system/UpdatedResumeDataSet.csv", cfg.ingest_store_path],
+                        help="简历CSV（需包含 Resume 列），默认数据集与在线入库的简历")
+    parser.add_argument("--out", default=cfg.profiles_path, help="档案文件路径，默认 PROFILES_PATH")
+    parser.add_argument("--extractor", choices=["rules", "llm"], default="rules")
+    parser.add_argument("--batch-size", type=int, default=8, help="每次大模型请求包含的简历数")
+    parser.add_argument("--limit", type=int, help="本次最多提取的简历数")
+    parser.add_argument("--stub", action="store_true", help="使用本地桩模型代替真实大模型（测试流程与吞吐）")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="桩模型每次请求的延迟（秒）")
+    args = parser.parse_args(argv)
+
+    llm = None
+    if args.extractor == "llm":
+        if args.stub:
+            from benchmarks.stubs import StubChatModel
+            llm = StubChatModel(latency_s=args.stub_latency)
+        elif len(cfg.llm_providers) > 1:
+            from rag_system.llm_router import create_llm_router
+            llm = create_llm_router(cfg)
+        else:
+            from langchain_openai import ChatOpenAI
+            from rag_system.llm_router import provider_settings
+            settings = provider_settings(cfg, cfg.llm_providers[0])
+            llm = ChatOpenAI(model_name=settings["model"], openai_api_key=settings["api_key"] or None,
+                             openai_api_base=settings["base_url"], temperature=0.0)
+
+    start = time.perf_counter()
+    stats = run_extraction(iter_resumes(args.csv), ProfileStore(args.out), args.extractor, llm,
+                           args.batch_size, args.limit)
+    elapsed = time.perf_counter() - start
+    print(f"[profiles] 新提取 {stats['extracted']} 份（{stats['batches']} 批），跳过已有 {stats['skipped']} 份，"
+          f"用时 {elapsed:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
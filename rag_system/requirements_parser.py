@@ -0,0 +1,230 @@
+"""岗位要求的结构化解析：必备/加分技能（带权重）、最低工作年限、岗位类别提示"""
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from rag_system.profiles import match_skills
+
+# 加分项（nice-to-have）条目的标志
+_NICE_RE = re.compile(r"优先|加分|更佳|最好|nice[- ]to[- ]have|preferred|is a plus|\bplus\b|\bbonus\b", re.I)
+# 条目语气对应的技能权重
+_STRONG_RE = re.compile(r"精通|必须|深入|扎实|expert|strong|proficien|must|deep", re.I)
+_WEAK_RE = re.compile(r"了解|接触过|familiar|basic|exposure", re.I)
+# 最低年限：数字两侧不能紧邻其他数字（排除“2019年后毕业”之类的年份），并且需要经验语境——
+# “N+ 年”、单位后紧跟“以上/经验/工作/experience”，或单位前有“至少/不少于/at least/minimum”；区间“3-5年”取下限
+_YEARS_UNIT = r"(?:年|years?|yrs?)"
+_YEARS_NUM = r"(?<![\d.])(\d{1,2})(?:\s*[-~～至到]\s*\d{1,2})?(?![\d.])"
+_REQUIRED_YEARS_RE = re.compile(
+    rf"{_YEARS_NUM}\s*(?:\+\s*{_YEARS_UNIT}|{_YEARS_UNIT}(?=\s*(?:及|或)?\s*(?:以上|经验|工作|experience|of\s+experience)))"
+    rf"|(?:至少|不少于|不低于|at\s+least|minimum(?:\s+of)?)\s*{_YEARS_NUM}\s*\+?\s*{_YEARS_UNIT}",
+    re.I,
+)
+_ENUMERATOR_RE = re.compile(r"^\s*(?:[-*•·]|\(?\d+[.)、）]|[一二三四五六七八九十]+[、.])\s*")
+_HEADER_RE = re.compile(r"^(?:岗位|职位|要求|任职要求|岗位要求|job|requirements?)\s*[:：]\s*", re.I)
+
+MUST_WEIGHT = 1.0
+NICE_WEIGHT = 0.5
+
+# 数据集类别 -> 岗位名称或要求中的提示词（小写匹配）
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "Data Science": ["data scien", "数据科学", "数据挖掘", "算法工程师", "machine learning", "机器学习", "深度学习"],
+    "Java Developer": ["java developer", "java工程师", "java开发", "spring"],
+    "Python Developer": ["python developer", "python工程师", "python开发", "django", "flask"],
+    "Web Designing": ["web design", "前端", "frontend", "front-end", "ui设计", "网页设计", "react", "vue"],
+    "DevOps Engineer": ["devops", "运维", "kubernetes", "ci/cd", "sre"],
+    "Testing": ["测试", "testing", "qa", "tester"],
+    "Automation Testing": ["自动化测试", "automation test", "selenium"],
+    "Hadoop": ["hadoop", "大数据", "big data", "hive", "spark"],
+    "Business Analyst": ["business analyst", "业务分析", "需求分析"],
+    "ETL Developer": ["etl", "数据仓库", "data warehouse", "informatica"],
+    "Database": ["dba", "数据库管理", "database admin", "oracle dba"],
+    "DotNet Developer": [".net", "c#", "asp.net", "dotnet"],
+    "SAP Developer": ["sap", "abap", "hana"],
+    "Blockchain": ["blockchain", "区块链", "solidity", "ethereum"],
+    "Network Security Engineer": ["网络安全", "network security", "信息安全", "penetration", "渗透"],
+    "HR": ["hr", "人力资源", "招聘", "recruit", "payroll"],
+    "Sales": ["sales", "销售"],
+    "Operations Manager": ["operations manager", "运营经理", "供应链", "supply chain"],
+    "PMO": ["pmo", "项目管理", "project manag"],
+    "Mechanical Engineer": ["mechanical", "机械"],
+    "Civil Engineer": ["civil engineer", "土木", "建筑工程"],
+    "Electrical Engineering": ["electrical", "电气"],
+    "Advocate": ["advocate", "律师", "法务", "legal"],
+    "Arts": ["arts", "艺术", "美术", "painting"],
+    "Health and fitness": ["fitness", "健身", "health"],
+}
+_SHORT_KEYWORD_RE = {kw: re.compile(rf"(?<![a-z]){re.escape(kw)}(?![a-z])") for kws in CATEGORY_KEYWORDS.values()
+                     for kw in kws if len(kw) <= 4 and kw.isascii()}
+
+
+@dataclass
+class RequirementAnalysis:
+    """一段岗位要求的解析结果"""
+
+    job_title: str
+    must_have: Dict[str, float] = field(default_factory=dict)  # 技能 -> 权重
+    nice_to_have: Dict[str, float] = field(default_factory=dict)
+    min_years: Optional[float] = None
+    category_hints: List[str] = field(default_factory=list)
+    other: List[str] = field(default_factory=list)  # 未识别出技能的条目（软性要求等）
+
+    @property
+    def skill_weights(self) -> Dict[str, float]:
+        return {**self.nice_to_have, **self.must_have}
+
+    @property
+    def structured(self) -> bool:
+        """是否识别出技能；没有时精简查询与紧凑要求会丢失信息，调用方应使用原文"""
+        return bool(self.must_have or self.nice_to_have)
+
+    def query(self) -> str:
+        """检索查询：岗位名称 + 必备技能 + 加分技能 + 类别提示"""
+        parts = [self.job_title, *self.must_have, *self.nice_to_have, *self.category_hints]
+        return " ".join(dict.fromkeys(p for p in parts if p))
+
+    def compact(self) -> str:
+        """评分提示词中的紧凑要求"""
+        lines = [f"岗位: {self.job_title}"] if self.job_title else []
+        if self.must_have:
+            lines.append("必备技能: " + ", ".join(
+                f"{skill}（重点）" if weight > MUST_WEIGHT else skill for skill, weight in self.must_have.items()))
+        if self.nice_to_have:
+            lines.append("加分技能: " + ", ".join(self.nice_to_have))
+        if self.min_years is not None:
+            lines.append(f"最低工作年限: {self.min_years:g} 年")
+        if self.other:
+            lines.append("其他要求: " + "；".join(self.other))
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"must_have": dict(self.must_have), "nice_to_have": dict(self.nice_to_have),
+                "min_years": self.min_years, "category_hints": list(self.category_hints), "other": list(self.other)}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text or "").split()).casefold()
+
+
+def _keyword_hits(text: str) -> Dict[str, int]:
+    lowered = unicodedata.normalize("NFKC", text or "").casefold()
+    counts = {}
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        hits = sum(1 for kw in keywords
+                   if (_SHORT_KEYWORD_RE[kw].search(lowered) if kw in _SHORT_KEYWORD_RE else kw in lowered))
+        hits += 2 if category.casefold() in lowered else 0
+        if hits:
+            counts[category] = hits
+    return counts
+
+
+def category_hints(job_title: str, requirements: str) -> List[str]:
+    """提示的数据集类别，按命中的提示词数量降序；岗位名称中的命中计双倍"""
+    counts = _keyword_hits(requirements)
+    for category, hits in _keyword_hits(job_title).items():
+        counts[category] = counts.get(category, 0) + 2 * hits
+    return sorted(counts, key=lambda c: -counts[c])
+
+
+def parse_requirements(job_title: str, requirements: str) -> RequirementAnalysis:
+    """逐条解析岗位要求（不使用缓存，见 analyze_requirements）"""
+    analysis = RequirementAnalysis(job_title=(job_title or "").strip())
+    for skill in match_skills(job_title or ""):
+        analysis.must_have[skill] = MUST_WEIGHT
+    years = []
+    for raw in (requirements or "").splitlines():
+        line = _HEADER_RE.sub("", _ENUMERATOR_RE.sub("", raw)).strip()
+        if not line or _normalize(line) == _normalize(job_title):
+            continue
+        nice = bool(_NICE_RE.search(line))
+        if not nice:
+            # 加分项里的年限（如“5年以上经验优先”）不是硬性要求，不计入最低年限
+            years += [int(a or b) for a, b in _REQUIRED_YEARS_RE.findall(line) if 0 < int(a or b) <= 30]
+        skills = match_skills(line)
+        if not skills:
+            analysis.other.append(line)
+            continue
+        if nice:
+            for skill in skills:
+                if skill not in analysis.must_have:
+                    analysis.nice_to_have[skill] = NICE_WEIGHT
+            continue
+        weight = 1.5 if _STRONG_RE.search(line) else 0.7 if _WEAK_RE.search(line) else MUST_WEIGHT
+        for skill in skills:
+            analysis.nice_to_have.pop(skill, None)
+            analysis.must_have[skill] = max(weight, analysis.must_have.get(skill, 0.0))
+    analysis.min_years = float(max(years)) if years else None
+    analysis.category_hints = category_hints(job_title, requirements)[:3]
+    return analysis
+
+
+class _AnalysisCache:
+    """规范化要求文本的哈希 -> 解析结果（LRU），线程安全"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, RequirementAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, job_title: str, requirements: str) -> RequirementAnalysis:
+        key = hashlib.blake2b(f"{_normalize(job_title)}\n{_normalize(requirements)}".encode("utf-8"),
+                              digest_size=16).hexdigest()
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return analysis
+            self.misses += 1
+        analysis = parse_requirements(job_title, requirements)
+        with self._lock:
+            self._entries[key] = analysis
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0}
+
+
+_cache = _AnalysisCache()
+
+
+def analyze_requirements(job_title: str, requirements: str) -> RequirementAnalysis:
+    """解析岗位要求；相同（规范化后）的要求文本只解析一次。返回的对象为共享缓存，调用方不要修改"""
+    return _cache.get(job_title, requirements)
+
+
+def analysis_metrics() -> Dict[str, Any]:
+    return _cache.metrics()
+
+
+def apply_filters(candidates: List[Dict[str, Any]], analysis: RequirementAnalysis,
+                  keep_at_least: int) -> List[Dict[str, Any]]:
+    """
+    硬过滤：档案年限明确低于最低年限的候选人、已知类别不在提示范围内的候选人。
+    过滤后不足 keep_at_least 位时放宽该条件（保留原排序），避免要求写得过严时返回空结果。
+    """
+    filtered = candidates
+    # 类别比年限可靠（年限来自规则或大模型提取），先按类别过滤
+    if analysis.category_hints:
+        hinted = set(analysis.category_hints)
+        # 类别缺失或不在已知类别中（如在线上传的 "Unknown" 简历）时无法判断，与年限缺失一样保留
+        kept = [c for c in filtered if c.get("category") in hinted or c.get("category") not in CATEGORY_KEYWORDS]
+        if len(kept) >= keep_at_least:
+            filtered = kept
+    if analysis.min_years is not None:
+        kept = [c for c in filtered
+                if (c.get("profile") or {}).get("years_experience") is None
+                or c["profile"]["years_experience"] >= analysis.min_years]
+        if len(kept) >= keep_at_least:
+            filtered = kept
+    return filtered
@@ -0,0 +1,329 @@
+"""分片检索：各分片进程加载 1/N 简历的索引，协调进程并行召回、按原始分数合并后统一重排序"""
+import argparse
+import contextlib
+import dataclasses
+import heapq
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import AgentConfig, get_config
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"分片地址需为 host:port: {address}")
+    return host, int(port)
+
+
+def build_shard(csv_path: str, index: int, count: int, cfg: Optional[AgentConfig] = None,
+                embedder: str = "model", extra_csv_paths: Optional[List[str]] = None):
+    """构建一个分片的 SimpleRAG：只加载本分片的简历，不加载交叉编码器"""
+    from rag_system.llama_rag_system import NoLLM, SimpleRAG
+
+    cfg = dataclasses.replace(cfg or get_config(), use_rerank=False, search_shards=[], warm_up=False)
+    embeddings = None
+    if embedder == "hash":
+        from benchmarks.stubs import HashEmbeddings
+        embeddings = HashEmbeddings()
+    return SimpleRAG(csv_path, cfg=cfg, llm=NoLLM(), embeddings=embeddings,
+                     extra_csv_paths=extra_csv_paths, shard=(index, count))
+
+
+class ShardServer:
+    """
+    在一个分片的 SimpleRAG 上提供召回 RPC，每个连接一个线程。
+
+    请求为元组：("search", query, mode, k) -> 本分片各检索器前 k 名候选人及原始分数；("info",) -> 分片信息。
+    响应为 ("ok", 结果) 或 ("error", 错误信息)。
+    """
+
+    def __init__(self, rag, address: Tuple[str, int], authkey: bytes):
+        if not authkey:
+            raise ValueError("分片 RPC 必须设置认证密钥（SHARD_AUTHKEY），拒绝无认证服务")
+        self.rag = rag
+        self.address = address
+        self.authkey = authkey
+        self.listener: Optional[Listener] = None
+        self.requests = 0
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self._dispatch(message)))
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    def _dispatch(self, message: Tuple[Any, ...]) -> Any:
+        op = message[0]
+        if op == "search":
+            _, query, mode, k = message
+            self.requests += 1
+            return self.rag.retrieve_scored(query, mode, k)
+        if op == "info":
+            return {"shard": self.rag.shard, "documents": len(self.rag.documents),
+                    "requests": self.requests, "timings": dict(self.rag.timings)}
+        raise ValueError(f"未知的分片请求: {op}")
+
+    def serve_forever(self, ready=None):
+        self.listener = Listener(self.address, authkey=self.authkey)
+        if ready is not None:
+            ready.set()
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return
+            except Exception as e:  # 认证失败等，不影响其余连接
+                print(f"分片连接被拒绝: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+
+def run_shard(csv_path: str, index: int, count: int, address: Tuple[str, int], authkey: bytes,
+              cfg: Optional[AgentConfig] = None, embedder: str = "model",
+              extra_csv_paths: Optional[List[str]] = None, ready=None, verbose: bool = False):
+    """分片进程入口：构建本分片索引后开始服务（阻塞）。索引构建与检索的调试输出量很大，默认不打印"""
+    if not authkey:
+        raise ValueError("分片 RPC 必须设置认证密钥（SHARD_AUTHKEY），拒绝无认证服务")
+    with open(os.devnull, "w") as devnull:
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)
+        with output:
+            rag = build_shard(csv_path, index, count, cfg, embedder, extra_csv_paths)
+        print(f"分片 {index}/{count} 就绪: {len(rag.documents)} 份简历，监听 {address[0]}:{address[1]}", flush=True)
+        with output:
+            ShardServer(rag, address, authkey).serve_forever(ready)
+
+
+def start_local_shards(csv_path: str, count: int, cfg: Optional[AgentConfig] = None, embedder: str = "model",
+                       host: str = "127.0.0.1", base_port: int = 7100, authkey: Optional[bytes] = None,
+                       extra_csv_paths: Optional[List[str]] = None, timeout_s: float = 3600.0):
+    """
+    在本机启动 count 个分片进程（spawn），等待全部构建完索引后返回 (进程列表, 地址列表, 认证密钥)。
+    未指定 authkey 且未设置 SHARD_AUTHKEY 时生成随机密钥，连接分片时使用返回的密钥。
+    调用方负责在结束时 terminate 这些进程（见 stop_local_shards）。
+    """
+    import multiprocessing
+
+    cfg = cfg or get_config()
+    if authkey is None:
+        authkey = cfg.shard_authkey.encode("utf-8") if cfg.shard_authkey else secrets.token_bytes(32)
+    ctx = multiprocessing.get_context("spawn")
+    processes, addresses, events = [], [], []
+    for index in range(count):
+        address = (host, base_port + index)
+        ready = ctx.Event()
+        process = ctx.Process(target=run_shard, name=f"rag-shard-{index}", daemon=True,
+                              args=(csv_path, index, count, address, authkey, cfg, embedder, extra_csv_paths, ready))
+        process.start()
+        processes.append(process)
+        addresses.append(f"{host}:{base_port + index}")
+        events.append(ready)
+    deadline = time.monotonic() + timeout_s
+    for index, (process, ready) in enumerate(zip(processes, events)):
+        while not ready.wait(0.5):
+            if not process.is_alive() or time.monotonic() > deadline:
+                stop_local_shards(processes)
+                raise RuntimeError(f"分片 {index} 启动失败（退出码 {process.exitcode}）")
+    return processes, addresses, authkey
+
+
+def stop_local_shards(processes: Sequence[Any]):
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(timeout=5)
+
+
+class ShardClient:
+    """单个分片的连接池；超时或出错的连接直接丢弃，避免读到上一次请求的迟到响应"""
+
+    def __init__(self, address: str, authkey: bytes, timeout_s: float = 30.0):
+        self.address = address
+        self._address = parse_address(address)
+        self.authkey = authkey
+        self.timeout_s = timeout_s
+        self._pool: "queue.LifoQueue" = queue.LifoQueue()
+
+    def call(self, *message) -> Any:
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            conn.send(message)
+            if not conn.poll(self.timeout_s):
+                raise TimeoutError(f"分片 {self.address} 超过 {self.timeout_s:g}s 未响应")
+            status, payload = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+        self._pool.put(conn)
+        if status != "ok":
+            raise RuntimeError(f"分片 {self.address} 出错: {payload}")
+        return payload
+
+    def _connect(self):
+        """建立新连接（含认证握手）；Client 本身没有连接超时，放到线程中等待 timeout_s，分片宕机时不阻塞查询"""
+        result: "queue.Queue" = queue.Queue(maxsize=1)
+
+        def connect():
+            try:
+                result.put(("ok", Client(self._address, authkey=self.authkey)))
+            except BaseException as e:
+                result.put(("error", e))
+
+        threading.Thread(target=connect, name=f"shard-connect-{self.address}", daemon=True).start()
+        try:
+            status, payload = result.get(timeout=self.timeout_s)
+        except queue.Empty:
+            raise TimeoutError(f"连接分片 {self.address} 超过 {self.timeout_s:g}s") from None
+        if status != "ok":
+            raise payload
+        return payload
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def merge_scored(shard_results: Sequence[List[Dict[str, Any]]], pool_size: int,
+                 weights: Sequence[float] = (0.6, 0.4), c: int = 60) -> List[Dict[str, Any]]:
+    """按原始分数选出各检索器的全局前 pool_size 名，再按与 EnsembleRetriever 相同的加权 RRF 融合排序"""
+    candidates: Dict[Any, Dict[str, Any]] = {}
+    for results in shard_results:
+        for result in results:
+            candidates.setdefault(result["id"], result)
+    fused: Dict[Any, float] = {}
+    for (key, select), weight in zip((("vector_distance", heapq.nsmallest), ("bm25_score", heapq.nlargest)), weights):
+        hits = [result for result in candidates.values() if result.get(key) is not None]
+        for rank, result in enumerate(select(pool_size, hits, key=lambda r: r[key]), start=1):
+            fused[result["id"]] = fused.get(result["id"], 0.0) + weight / (rank + c)
+
+    merged = sorted((candidates[id_] for id_ in fused), key=lambda r: fused[r["id"]], reverse=True)
+    for i, result in enumerate(merged):
+        result.pop("vector_distance", None)
+        result.pop("bm25_score", None)
+        result["retrieval_score"] = 1.0 - (i * 0.1)  # 与单机检索相同的递减分数
+    return merged
+
+
+class ShardedSearch:
+    """
+    协调进程的分片召回：并行向各分片发起召回并合并为全局候选池，线程安全。
+    部分分片失败或超时时用其余分片的结果（记录在指标中），全部失败时抛出异常。
+    """
+
+    def __init__(self, addresses: Sequence[str], authkey: Any, timeout_s: float = 30.0,
+                 weights: Sequence[float] = (0.6, 0.4)):
+        if not addresses:
+            raise ValueError("至少需要一个分片地址")
+        if not authkey:
+            raise ValueError("连接分片需要认证密钥（SHARD_AUTHKEY）")
+        authkey = authkey.encode("utf-8") if isinstance(authkey, str) else authkey
+        self.clients = [ShardClient(address, authkey, timeout_s) for address in addresses]
+        self.weights = tuple(weights)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.clients) * 8, thread_name_prefix="shard-fanout")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.partial_results = 0
+        self.errors: Dict[str, int] = {}
+        self.fanout_s: List[float] = []
+
+    def search(self, query: str, pool_size: int, mode: str = "ensemble") -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        futures = [self._executor.submit(client.call, "search", query, mode, pool_size) for client in self.clients]
+        wait(futures)
+        shard_results, failed = [], []
+        for client, future in zip(self.clients, futures):
+            try:
+                shard_results.append(future.result())
+            except Exception as e:
+                print(f"分片 {client.address} 召回失败: {e}")
+                failed.append(client.address)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.requests += 1
+            self.partial_results += bool(failed)
+            for address in failed:
+                self.errors[address] = self.errors.get(address, 0) + 1
+            self.fanout_s = (self.fanout_s + [elapsed])[-1000:]
+        if len(failed) == len(self.clients):
+            raise RuntimeError(f"全部 {len(failed)} 个分片召回失败")
+        # 单检索器模式下只有一路分数，权重不影响排序
+        return merge_scored(shard_results, pool_size, self.weights if mode == "ensemble" else (1.0, 1.0))
+
+    def info(self) -> List[Dict[str, Any]]:
+        """各分片的文档数与请求数（逐个分片 RPC）"""
+        infos = []
+        for client in self.clients:
+            try:
+                infos.append({"address": client.address, **client.call("info")})
+            except Exception as e:
+                infos.append({"address": client.address, "error": str(e)})
+        return infos
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self.fanout_s)
+            return {
+                "shards": [client.address for client in self.clients],
+                "requests": self.requests,
+                "partial_results": self.partial_results,
+                "errors": dict(self.errors),
+                "fanout_p50_ms": ordered[len(ordered) // 2] * 1000 if ordered else None,
+                "fanout_p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000 if ordered else None,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for client in self.clients:
+            client.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="分片检索进程")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="加载一个分片并提供召回服务")
+    serve.add_argument("--csv", default="rag_system/UpdatedResumeDataSet.csv", help="简历数据CSV")
+    serve.add_argument("--extra-csv", action="append", default=[], help="追加加载的CSV（如在线入库的简历）")
+    serve.add_argument("--shard", type=int, required=True, help="分片序号，从 0 开始")
+    serve.add_argument("--shards", type=int, required=True, help="分片总数")
+    serve.add_argument("--host", default="127.0.0.1",
+                       help="监听地址；跨节点部署时只用内网地址，端口绝不能暴露到不受信任的网络")
+    serve.add_argument("--port", type=int, required=True)
+    serve.add_argument("--embedder", choices=["model", "hash"], default="model",
+                       help="hash 为特征哈希嵌入，仅用于基准测试")
+    serve.add_argument("--verbose", action="store_true", help="打印索引构建与检索的调试输出")
+    args = parser.parse_args(argv)
+
+    cfg = get_config()
+    if not 0 <= args.shard < args.shards:
+        parser.error(f"--shard 需在 [0, {args.shards}) 之间")
+    if not cfg.shard_authkey:
+        parser.error("未设置 SHARD_AUTHKEY：分片 RPC 使用 pickle，无认证时任何能连到端口的人都能执行任意代码，拒绝启动")
+    run_shard(args.csv, args.shard, args.shards, (args.host, args.port), cfg.shard_authkey.encode("utf-8"),
+              cfg, args.embedder, args.extra_csv, verbose=args.verbose)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+# 句子边界：中英文句末标点、换行，以及简历中常见的 " * " / "•" 项目符号
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[。！？!?；;])\s*|(?<=\.)\s+(?=[A-Z])|\n+|\s+[*•]\s+|\s{2,}")
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_CJK_RUN_RE = re.compile(r"[\u4e00-\u9fff]+")
+
+# BM25 参数
+_K1 = 1.2
+_B = 0.75
+
+
+@lru_cache(maxsize=1024)
+def tokenize(text: str) -> Tuple[str, ...]:
+    """英文按词（保留 c++、c#、node.js 等写法），中文按相邻二字切分"""
+    text = text.lower()
+    tokens = [w.rstrip(".") for w in _WORD_RE.findall(text)]
+    for run in _CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tuple(t for t in tokens if t)
+
+
+def split_sentences(text: str) -> List[str]:
+    """将简历切分为句子/条目"""
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text or "") if s and s.strip()]
+
+
+def split_passages(text: str, max_chars: int = 300) -> List[str]:
+    """将相邻句子合并为不超过 max_chars 的段落，过长的单句按字符切开"""
+    passages: List[str] = []
+    current = ""
+    for sentence in split_sentences(text):
+        while len(sentence) > max_chars:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        passages.append(current)
+    return passages
+
+
+def split_chunks(text: str, max_chars: int = 800, overlap_chars: int = 160) -> List[str]:
+    """
+    将长简历切分为相互重叠的片段（用于片段级嵌入）：按句子/条目累积到 max_chars，
+    下一片段以上一片段末尾不超过 overlap_chars 的句子开头，避免跨片段的信息被切断
+    """
+    units = split_passages(text, min(max_chars, 300))
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0
+    for unit in units:
+        if current and length + len(unit) > max_chars:
+            chunks.append(" ".join(current))
+            carried: List[str] = []
+            carried_length = 0
+            for previous in reversed(current):
+                if carried_length + len(previous) + 1 > overlap_chars:
+                    break
+                carried.insert(0, previous)
+                carried_length += len(previous) + 1
+            current, length = carried, carried_length
+        current.append(unit)
+        length += len(unit) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class PassageIndex:
+    """段落级索引：按 BM25 为候选人挑选与查询最相关的段落作为摘要"""
+
+    def __init__(self, max_passage_chars: int = 300):
+        self.max_passage_chars = max_passage_chars
+        self.passages: Dict[Any, List[str]] = {}
+        self.term_freqs: Dict[Any, List[Counter]] = {}
+        self.doc_freq: Counter = Counter()
+        self.total_passages = 0
+        self.total_length = 0
+
+    def add(self, doc_id, text: str):
+        """为一份简历建立段落索引（同一 doc_id 只索引一次）"""
+        if doc_id in self.passages:
+            return
+        passages = split_passages(text, self.max_passage_chars)
+        freqs = [Counter(tokenize(p)) for p in passages]
+        self.passages[doc_id] = passages
+        self.term_freqs[doc_id] = freqs
+        for tf in freqs:
+            self.doc_freq.update(tf.keys())
+            self.total_length += sum(tf.values())
+        self.total_passages += len(passages)
+
+    def __len__(self) -> int:
+        return self.total_passages
+
+    def _idf(self, term: str) -> float:
+        df = self.doc_freq.get(term, 0)
+        return math.log(1 + (self.total_passages - df + 0.5) / (df + 0.5))
+
+    def top_passages(self, doc_id, query: str, n: int = 3) -> List[Tuple[float, str]]:
+        """返回与查询最相关的 n 个段落（按相关性降序）"""
+        passages = self.passages.get(doc_id)
+        if not passages:
+            return []
+        query_terms = set(tokenize(query))
+        avg_len = self.total_length / max(1, self.total_passages)
+
+        scored = []
+        for position, (passage, tf) in enumerate(zip(passages, self.term_freqs[doc_id])):
+            length = sum(tf.values())
+            score = 0.0
+            for term in query_terms:
+                freq = tf.get(term, 0)
+                if freq:
+                    score += self._idf(term) * freq * (_K1 + 1) / (
+                        freq + _K1 * (1 - _B + _B * length / max(avg_len, 1e-9))
+                    )
+            # 分数相同时保留原文顺序
+            scored.append((score, -position, passage))
+        scored.sort(reverse=True)
+        return [(score, passage) for score, _, passage in scored[:n]]
+
+    def snippet(self, doc_id, query: str, max_chars: int = 1200, n: int = 5) -> str:
+        """拼接最相关的段落，按相关性降序排列，后续按长度截断时优先保留最相关的内容"""
+        parts: List[str] = []
+        length = 0
+        for _, passage in self.top_passages(doc_id, query, n):
+            if parts and length + len(passage) > max_chars:
+                break
+            parts.append(passage)
+            length += len(passage) + 5
+        return " ... ".join(parts)[:max_chars]
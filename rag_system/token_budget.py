@@ -0,0 +1,193 @@
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# 默认分词器：与嵌入模型相同，首次加载嵌入模型后即存在于本地缓存，可离线使用。
+# 它不是评分大模型的分词器，计数只是近似值，调用方需在预算中留出余量（见 AgentConfig.token_budget_margin）
+DEFAULT_TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# 每位候选人在提示词中的固定开销（编号、类别、分隔线等）
+CANDIDATE_OVERHEAD_TOKENS = 40
+# 每位候选人至少保留的简历token数
+MIN_CANDIDATE_TOKENS = 64
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """
+    加载离线分词器（只读本地缓存，不发起网络请求），结果缓存在进程内。
+
+    依次尝试 TOKENIZER_NAME、HF_EMBEDDING_MODEL 和默认模型；全部失败时返回 None，
+    此时使用按字符类别估算的启发式计数。TOKENIZER_NAME 设为评分大模型的分词器（已在本地缓存）时计数最接近实际。
+    """
+    names = [os.getenv("TOKENIZER_NAME"), os.getenv("HF_EMBEDDING_MODEL"), DEFAULT_TOKENIZER_NAME]
+    try:
+        from transformers import AutoTokenizer
+    except Exception as e:
+        print(f"[token] transformers 不可用，使用启发式token估算: {e}")
+        return None
+
+    for name in names:
+        if not name:
+            continue
+        try:
+            tokenizer = AutoTokenizer.from_pretrained(name, local_files_only=True)
+            if not getattr(tokenizer, "is_fast", False):
+                # 截断依赖 offset_mapping，只有 fast tokenizer 支持
+                continue
+            print(f"[token] 使用离线分词器: {name}")
+            return tokenizer
+        except Exception:
+            continue
+
+    print("[token] 未找到本地分词器，使用启发式token估算")
+    return None
+
+
+def _char_cost(ch: str) -> float:
+    """启发式估算单个字符的token开销：中日韩字符约1个token，其余约4个字符1个token"""
+    if _CJK_RE.match(ch):
+        return 1.0
+    return 0.25
+
+
+def _estimate_tokens(text: str) -> int:
+    cjk = len(_CJK_RE.findall(text))
+    return int(math.ceil(cjk + (len(text) - cjk) / 4))
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """估算文本的token数（按离线分词器计数，与大模型的实际计数有偏差；带缓存，同一份简历只计数一次）"""
+    if not text:
+        return 0
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return _estimate_tokens(text)
+    return len(tokenizer(text, add_special_tokens=False, truncation=False)["input_ids"])
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = "") -> str:
+    """
+    将文本截断到不超过 max_tokens 个token，截断时追加 suffix。
+    按原文字符偏移截断，不会改变原文的大小写或空白。
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    # 为截断标记预留token，保证结果整体不超过上限；放不下截断标记时不加
+    suffix_tokens = count_tokens(suffix)
+    if suffix_tokens < max_tokens:
+        max_tokens -= suffix_tokens
+    else:
+        suffix = ""
+
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        cost = 0.0
+        cut = 0
+        for i, ch in enumerate(text):
+            cost += _char_cost(ch)
+            if cost > max_tokens:
+                break
+            cut = i + 1
+    else:
+        offsets = tokenizer(
+            text, add_special_tokens=False, truncation=False, return_offsets_mapping=True
+        )["offset_mapping"]
+        cut = offsets[max_tokens - 1][1]
+    return text[:cut] + suffix
+
+
+def _relevance_weights(scores: List[float]) -> List[float]:
+    """将相关性分数（重排序分数可能为负）归一化后做softmax，作为分配预算的权重"""
+    if not scores:
+        return []
+    low, high = min(scores), max(scores)
+    if high - low < 1e-9:
+        return [1.0] * len(scores)
+    return [math.exp(2.0 * (s - low) / (high - low)) for s in scores]
+
+
+def allocate_budget(needs: List[int], weights: List[float], available: int) -> List[int]:
+    """
+    按权重把 available 个token分给各候选人（注水法）：
+    需求小于份额的候选人拿满，多出的预算按权重再分给其余候选人。
+    """
+    alloc = [0] * len(needs)
+    active = [i for i, need in enumerate(needs) if need > 0]
+    remaining = max(0, available)
+
+    while active and remaining > 0:
+        weight_sum = sum(weights[i] for i in active)
+        shares = {i: remaining * weights[i] / weight_sum for i in active}
+        satisfied = [i for i in active if needs[i] - alloc[i] <= shares[i]]
+        if not satisfied:
+            for i in active:
+                alloc[i] += int(shares[i])
+            break
+        for i in satisfied:
+            remaining -= needs[i] - alloc[i]
+            alloc[i] = needs[i]
+            active.remove(i)
+    return alloc
+
+
+def budget_candidate_texts(
+    fixed_text: str,
+    candidates: List[Dict],
+    max_input_tokens: int,
+    text_key: str = "content",
+    overhead_tokens: int = CANDIDATE_OVERHEAD_TOKENS,
+    min_tokens: int = MIN_CANDIDATE_TOKENS,
+) -> List[str]:
+    """
+    在 max_input_tokens 预算内为每位候选人选取简历文本。
+
+    Args:
+        fixed_text: 提示词中的固定部分（岗位要求、评估说明等）
+        candidates: 候选人列表，按 rerank_score / retrieval_score 决定相关性
+        max_input_tokens: 整个提示词的token上限
+        text_key: 候选人简历文本所在的字段
+
+    Returns:
+        与 candidates 一一对应的截断后文本
+    """
+    if not candidates:
+        return []
+
+    texts = [str(c.get(text_key) or c.get("content") or "") for c in candidates]
+    needs = [count_tokens(t) for t in texts]
+    available = max_input_tokens - count_tokens(fixed_text) - overhead_tokens * len(candidates)
+
+    if sum(needs) <= available:
+        return texts
+
+    # 先给每位候选人保留下限，剩余预算再按相关性分配；预算连下限都不够时均分，不突破 max_input_tokens
+    floor = min(min_tokens, max(0, available) // len(candidates))
+    if floor < min_tokens:
+        print(f"[token] 提示词预算不足（剩余 {available} tokens），每位候选人只能保留 {floor} tokens")
+    base = [min(need, floor) for need in needs]
+    scores = [float(c.get("rerank_score", c.get("retrieval_score", 0.0))) for c in candidates]
+    extra = allocate_budget([need - b for need, b in zip(needs, base)], _relevance_weights(scores),
+                            max(0, available) - sum(base))
+
+    return [truncate_to_tokens(text, b + e, suffix="...(内容已截断)") for text, b, e in zip(texts, base, extra)]
+
+
+def fit_requirements(requirements: str, max_input_tokens: int, ratio: float = 0.25) -> str:
+    """岗位要求最多占用预算的 ratio 比例，避免挤占候选人简历的空间"""
+    return truncate_to_tokens(requirements, max(1, int(max_input_tokens * ratio)), suffix="...(内容已截断)")
+
+
+def prompt_tokens(prompt: str, max_input_tokens: Optional[int] = None) -> int:
+    """计算提示词token数，超过预算时打印告警"""
+    tokens = count_tokens(prompt)
+    if max_input_tokens is not None and tokens > max_input_tokens:
+        print(f"[token] 提示词 {tokens} tokens 超过预算 {max_input_tokens}")
+    return tokens
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from app.admission import AdmissionRejected, _StageLimiter, current_priority
+
+
+def _limiter(interactive_queue=4, batch_queue=4, max_wait_s=5.0):
+    return _StageLimiter("cpu", 1, {"interactive": interactive_queue, "batch": batch_queue}, max_wait_s)
+
+
+def _acquire_in_thread(limiter, priority, order):
+    def run():
+        limiter.acquire(priority)
+        order.append(priority)
+        limiter.release(0.01)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_interactive_waiters_are_admitted_before_earlier_batch_waiters():
+    limiter, order = _limiter(), []
+    limiter.acquire("batch")  # 占住唯一的名额
+    threads = [_acquire_in_thread(limiter, "batch", order)]
+    time.sleep(0.05)  # batch 先排队
+    threads.append(_acquire_in_thread(limiter, "interactive", order))
+    time.sleep(0.05)
+    limiter.release(0.01)
+    for thread in threads:
+        thread.join(timeout=2)
+    assert order == ["interactive", "batch"]
+
+
+def test_batch_is_rejected_while_interactive_is_still_admitted():
+    limiter, order = _limiter(interactive_queue=1, batch_queue=0), []
+    limiter.acquire("batch")
+    with pytest.raises(AdmissionRejected) as excinfo:
+        limiter.acquire("batch")
+    assert excinfo.value.retry_after_s >= 1
+    thread = _acquire_in_thread(limiter, "interactive", order)
+    time.sleep(0.05)
+    limiter.release(0.01)
+    thread.join(timeout=2)
+    assert order == ["interactive"]
+    assert limiter.metrics()["rejected"] == {"interactive": 0, "batch": 1}
+
+
+def test_queue_wait_timeout_is_rejected():
+    limiter = _limiter(max_wait_s=0.1)
+    limiter.acquire("batch")
+    with pytest.raises(AdmissionRejected):
+        limiter.acquire("interactive")
+    assert limiter.metrics()["timeouts"]["interactive"] == 1
+
+
+def test_http_returns_429_with_retry_after_for_batch_only(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from app import backend
+
+    monkeypatch.setenv("ENABLE_UI", "false")
+    monkeypatch.setenv("WARM_UP", "false")
+    monkeypatch.setenv("SCORING_MODE", "local")
+    monkeypatch.setenv("ADMISSION_FRONTEND_TOKEN", "frontend-secret")
+
+    def score_result_set(job_title, requirements, top_n, cfg, scoring_mode):
+        # 模拟 batch 队列已满而 interactive 仍有名额
+        if current_priority() == "batch":
+            raise AdmissionRejected("cpu", "batch", 7, "排队已满")
+        return {"results": []}
+
+    monkeypatch.setattr(backend, "score_result_set", score_result_set)
+    client = TestClient(backend.create_app())
+    body = {"job_title": "Java开发工程师", "requirements": "3年以上经验"}
+
+    rejected = client.post("/api/score", json=body)
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "7"
+    # 客户端伪造的前端密钥不能提升优先级
+    assert client.post("/api/score", json=body, headers={"X-Frontend-Token": "guess"}).status_code == 429
+    assert client.post("/api/score", json=body, headers={"X-Frontend-Token": "frontend-secret"}).status_code == 200
@@ -0,0 +1,55 @@
+import csv
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from app import bulk_score
+
+DATA = Path(__file__).resolve().parent.parent / "benchmarks" / "data" / "synthetic_1000.csv"
+
+
+def _run(tmp_path, out):
+    return bulk_score.main([
+        "--csv", str(tmp_path / "resumes.csv"), "--job-title", "Java Developer", "--requirements", "Java, Spring Boot",
+        "--mode", "local", "--no-rerank", "--workers", "1", "--chunk-size", "5", "--limit", "15", "--out", str(out),
+    ])
+
+
+def _ids(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return [row["id"] for row in csv.DictReader(f)]
+
+
+def test_resume_from_checkpoint_does_not_duplicate_rows(tmp_path, monkeypatch):
+    shutil.copy(DATA, tmp_path / "resumes.csv")
+    out = tmp_path / "bulk.csv"
+    checkpoint_path = tmp_path / "bulk.csv.ckpt.json"
+
+    # 记录第一块完成时的检查点与输出，模拟此后进程被中断
+    snapshot = {}
+    save = bulk_score.Checkpoint.save
+
+    def save_and_snapshot(checkpoint):
+        save(checkpoint)
+        if not snapshot:
+            snapshot["checkpoint"] = checkpoint_path.read_bytes()
+            snapshot["output"] = out.read_bytes()[:checkpoint.output_bytes]
+
+    monkeypatch.setattr(bulk_score.Checkpoint, "save", save_and_snapshot)
+    assert _run(tmp_path, out) == 0
+    monkeypatch.setattr(bulk_score.Checkpoint, "save", save)
+    full = _ids(out)
+    assert len(full) == 15
+
+    assert len(list(csv.DictReader(snapshot["output"].decode("utf-8").splitlines()))) == 5
+
+    # 中断时第二块写了一半：输出文件比检查点记录的更长
+    checkpoint_path.write_bytes(snapshot["checkpoint"])
+    out.write_bytes(snapshot["output"] + b'99999,Java Developer,7,7,7,3,"Java, Spr')
+    assert _run(tmp_path, out) == 0
+    resumed = _ids(out)
+    assert len(resumed) == len(set(resumed)) == 15
+    assert sorted(resumed) == sorted(full)
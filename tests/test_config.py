@@ -0,0 +1,21 @@
+import pytest
+
+from config import PERFORMANCE_PROFILES, AgentConfig
+
+
+def test_profile_fills_unset_fields():
+    cfg = AgentConfig(api_key="", profile="latency")
+    for name, value in PERFORMANCE_PROFILES["latency"].items():
+        assert getattr(cfg, name) == value
+
+
+def test_explicit_values_override_profile():
+    cfg = AgentConfig(api_key="", profile="quality", retrieval_top_n=7, temperature=0.5)
+    assert cfg.retrieval_top_n == 7
+    assert cfg.temperature == 0.5
+    assert cfg.max_input_tokens == PERFORMANCE_PROFILES["quality"]["max_input_tokens"]
+
+
+def test_token_budget_margin_must_leave_some_budget():
+    with pytest.raises(ValueError):
+        AgentConfig(api_key="", token_budget_margin=1.0)
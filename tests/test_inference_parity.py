@@ -0,0 +1,63 @@
+# ONNX（int8）与 PyTorch 推理后端的一致性；需要 onnxruntime 和已导出的模型（python -m rag_system.inference_backends --export）
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+from benchmarks.bench_inference import DEFAULT_CSV, load_texts, top_k_overlap  # noqa: E402
+from benchmarks.synthetic import BENCH_QUERIES  # noqa: E402
+from config import get_config  # noqa: E402
+from rag_system.inference_backends import (  # noqa: E402
+    FEATURE_EXTRACTION, TEXT_CLASSIFICATION, _model_dir, _onnx_file, create_onnx_cross_encoder,
+    create_onnx_embeddings
+)
+
+MIN_COSINE = 0.98
+MIN_TOP_K_OVERLAP = 0.8
+TOP_K = 5
+
+
+@pytest.fixture(scope="module")
+def cfg():
+    cfg = get_config()
+    for model_name in (cfg.embedding_model, cfg.cross_encoder_model):
+        if not _onnx_file(_model_dir(cfg.onnx_cache_dir, model_name, cfg.onnx_quantize), cfg.onnx_quantize).exists():
+            pytest.skip(f"未导出 {model_name} 的 ONNX 模型")
+    return cfg
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return load_texts(DEFAULT_CSV, 40, seed=0)
+
+
+def _torch_models(cfg):
+    try:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        from sentence_transformers import CrossEncoder
+
+        return HuggingFaceEmbeddings(model_name=cfg.embedding_model), CrossEncoder(cfg.cross_encoder_model)
+    except Exception as e:  # 模型未缓存且无法下载
+        pytest.skip(f"无法加载 PyTorch 模型: {e}")
+
+
+def test_embedding_cosine(cfg, texts):
+    torch_embeddings, _ = _torch_models(cfg)
+    a = np.asarray(torch_embeddings.embed_documents(texts), dtype=np.float32)
+    b = np.asarray(create_onnx_embeddings(cfg).embed_documents(texts), dtype=np.float32)
+    cosine = (a * b).sum(axis=1) / np.clip(np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1), 1e-12, None)
+    assert cosine.min() >= MIN_COSINE
+
+
+def test_rerank_top_k_agreement(cfg, texts):
+    _, torch_reranker = _torch_models(cfg)
+    onnx_reranker = create_onnx_cross_encoder(cfg)
+    rng = random.Random(0)
+    overlaps = []
+    for query in BENCH_QUERIES[:5]:
+        pairs = [(query, text[:cfg.rerank_max_chars]) for text in rng.sample(texts, k=20)]
+        overlaps.append(top_k_overlap(list(torch_reranker.predict(pairs)), list(onnx_reranker.predict(pairs)), TOP_K))
+    assert np.mean(overlaps) >= MIN_TOP_K_OVERLAP
@@ -0,0 +1,78 @@
+import csv
+import contextlib
+import io
+
+import pytest
+
+pytest.importorskip("langchain_community")
+pytest.importorskip("faiss")
+
+from app.ingestion import ResumeStore, ingest_records
+from benchmarks.stubs import HashEmbeddings
+from config import AgentConfig
+from rag_system.llama_rag_system import NoLLM, SimpleRAG
+
+RESUMES = [
+    ("Java Developer", "Java Spring Boot Microservices Kafka 5 years backend development at a bank"),
+    ("Data Science", "Python pandas scikit-learn deep learning NLP research 3 years"),
+    ("Web Designing", "HTML CSS React Figma responsive design agency 4 years"),
+]
+
+
+class FailingEmbeddings(HashEmbeddings):
+    def embed_documents(self, texts):
+        raise RuntimeError("嵌入服务不可用")
+
+
+def _rag(tmp_path):
+    path = tmp_path / "resumes.csv"
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Category", "Resume"])
+        writer.writerows(RESUMES)
+    cfg = AgentConfig(api_key="", use_rerank=False, warm_up=False, use_profiles=False, micro_batch=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SimpleRAG(str(path), cfg=cfg, llm=NoLLM(), embeddings=HashEmbeddings())
+
+
+def _stored(path):
+    with path.open(encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_ingest_records_bookkeeping(tmp_path):
+    rag = _rag(tmp_path)
+    store = ResumeStore(str(tmp_path / "ingested.csv"))
+    new_resume = "Go Kubernetes Docker SRE on-call 6 years cloud infrastructure"
+    records = [
+        {"category": "DevOps", "resume": new_resume, "source": "new.pdf"},
+        {"category": "Java Developer", "resume": RESUMES[0][1], "source": "existing.pdf"},  # 与已入库简历重复
+        {"category": "DevOps", "resume": new_resume, "source": "again.pdf"},  # 与本批更早的简历重复
+        {"source": "broken.pdf", "error": "无法解析"},
+    ]
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = ingest_records(rag, records, store, batch_size=2)
+    assert stats["received"] == 4
+    assert stats["added"] == 1
+    assert stats["duplicates"] == 2
+    assert stats["failed"] == [{"filename": "broken.pdf", "error": "无法解析"}]
+    assert stats["documents"] == len(RESUMES) + 1
+    # 只有被收录的简历落盘，行顺序与分配的文档ID一致
+    assert [row["Source"] for row in _stored(tmp_path / "ingested.csv")] == ["new.pdf"]
+    assert rag.documents[-1].metadata["id"] == len(RESUMES)
+
+
+def test_failed_embedding_leaves_no_dedup_state(tmp_path):
+    rag = _rag(tmp_path)
+    record = {"category": "DevOps", "resume": "Terraform AWS Ansible monitoring 2 years", "source": "a.pdf"}
+    rag.embeddings = FailingEmbeddings()
+    with contextlib.redirect_stdout(io.StringIO()), pytest.raises(RuntimeError):
+        rag.add_documents([record])
+    assert len(rag.documents) == len(RESUMES)
+
+    # 嵌入恢复后重新上传，不会被误判为重复
+    rag.embeddings = HashEmbeddings()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = rag.add_documents([record])
+    assert stats["added"] == 1 and stats["duplicates"] == 0
+    assert len(rag.documents) == len(RESUMES) + 1
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from rag_system.llm_router import LLMRouter
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class StubProvider:
+    """延迟 delay_s 后输出 chunks；chunks 中的异常在输出到该位置时抛出"""
+
+    def __init__(self, chunks, delay_s=0.0):
+        self.chunks = chunks
+        self.delay_s = delay_s
+        self.calls = 0
+
+    def stream(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay_s)
+        for chunk in self.chunks:
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+
+
+def _router(*providers, **kwargs):
+    kwargs.setdefault("hedge_delay_s", 0.05)
+    kwargs.setdefault("min_hedge_delay_s", 0.0)
+    return LLMRouter([(f"p{i}", p) for i, p in enumerate(providers)], **kwargs)
+
+
+def test_slow_primary_is_hedged():
+    router = _router(StubProvider(["slow"], delay_s=0.5), StubProvider(["fast"], delay_s=0.0))
+    assert list(router.stream("prompt")) == ["fast"]
+    assert router.hedged_requests == 1
+    assert router.metrics()["providers"]["p0"]["cancelled"] == 1
+
+
+def test_rate_limited_primary_fails_over():
+    router = _router(StubProvider([StatusError(429)]), StubProvider(["ok"]), hedge=False)
+    assert list(router.stream("prompt")) == ["ok"]
+    assert router.failovers == 1
+    assert not router.metrics()["providers"]["p0"]["healthy"]
+
+
+def test_bad_request_is_raised_without_failover():
+    backup = StubProvider(["ok"])
+    router = _router(StubProvider([StatusError(400)]), backup, hedge=False)
+    with pytest.raises(StatusError):
+        list(router.stream("prompt"))
+    assert backup.calls == 0
+
+
+def test_bad_request_after_hedge_lets_the_hedge_win():
+    # 首选超过对冲等待后才返回 400，已发出的对冲请求仍应胜出
+    router = _router(StubProvider([StatusError(400)], delay_s=0.2), StubProvider(["ok"], delay_s=0.3))
+    assert list(router.stream("prompt")) == ["ok"]
+
+
+def test_mid_stream_failure_cools_down_the_provider():
+    router = _router(StubProvider(["partial", StatusError(503)]), StubProvider(["ok"]), hedge=False)
+    stream = router.stream("prompt")
+    assert next(stream) == "partial"
+    with pytest.raises(StatusError):
+        next(stream)
+    providers = router.metrics()["providers"]
+    assert providers["p0"]["errors"] == 1 and not providers["p0"]["healthy"]
+    # 下一次请求避开冷却中的供应商
+    assert list(router.stream("prompt")) == ["ok"]
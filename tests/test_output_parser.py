@@ -0,0 +1,26 @@
+import json
+
+from rag_system.output_parser import SCORE_FIELDS, match_scores_to_candidates, parse_scores
+
+
+def _output(*items):
+    """模型输出：[(candidate_id, 综合评分), ...]，其余分数字段取相同值"""
+    return json.dumps([{"candidate_id": cid, **{field: score for field in SCORE_FIELDS}} for cid, score in items],
+                      ensure_ascii=False)
+
+
+def test_duplicated_candidate_id_is_discarded():
+    candidates = [{"id": 11}, {"id": 22}, {"id": 33}]
+    parsed = parse_scores(_output(("11", 9), ("11", 4), ("33", 7)))
+    assigned = match_scores_to_candidates(parsed, candidates)
+    assert sorted(assigned) == [0, 2]
+    assert assigned[0]["overall_score"] == 9
+    assert 1 not in assigned  # 候选人22 留给调用方重新请求，不会拿到重复对象的评分
+
+
+def test_unknown_id_is_discarded_and_numbering_still_matches():
+    candidates = [{"id": 11}, {"id": 22}]
+    parsed = parse_scores(_output(("99", 1), ("候选人2", 6)))
+    assigned = match_scores_to_candidates(parsed, candidates)
+    assert list(assigned) == [1]
+    assert assigned[1]["overall_score"] == 6
@@ -0,0 +1,28 @@
+from rag_system.dedup import content_hash
+from rag_system import profiles
+
+
+def test_employment_dates_are_not_years_of_experience():
+    assert profiles.extract_years("2016年7月-2019年6月 就职于某公司") is None
+    assert profiles.extract_years("Education 2012 - 2016, B.Tech") is None
+
+
+def test_years_with_duration_context():
+    assert profiles.extract_years("3年工作经验，2016年7月入职") == 3.0
+    assert profiles.extract_years("Total Experience: 4.5 years") == 4.5
+    assert profiles.extract_years("5+ years in Java") == 5.0
+
+
+def test_profiles_share_dedup_content_hash():
+    assert profiles.content_hash is content_hash
+
+
+def test_plain_english_is_not_a_degree():
+    text = "I will be happy to relocate, please contact me at any time."
+    assert profiles.extract_profile_rules(text)["education"] == ""
+
+
+def test_degree_abbreviations():
+    assert profiles.extract_profile_rules("B.E. in Computer Science")["education"] == "本科"
+    assert profiles.extract_profile_rules("BE in Mechanical Engineering")["education"] == "本科"
+    assert profiles.extract_profile_rules("M.Tech, IIT Bombay")["education"] == "硕士"
@@ -0,0 +1,28 @@
+from rag_system.requirements_parser import apply_filters, parse_requirements
+
+
+def test_graduation_year_is_not_min_years():
+    analysis = parse_requirements("Java开发工程师", "本科及以上学历，2019年后毕业\n熟悉Java、Spring")
+    assert analysis.min_years is None
+
+
+def test_min_years_requires_experience_context():
+    assert parse_requirements("Java开发工程师", "3年以上Java开发经验").min_years == 3.0
+    assert parse_requirements("Java开发工程师", "3-5年工作经验").min_years == 3.0
+    assert parse_requirements("Data Scientist", "5+ years of Python").min_years == 5.0
+    assert parse_requirements("Java开发工程师", "熟悉Java，2024年入职").min_years is None
+
+
+def test_nice_to_have_years_are_ignored():
+    analysis = parse_requirements("Java开发工程师", "2年以上Java开发经验\n8年以上大数据经验优先")
+    assert analysis.min_years == 2.0
+    assert "最低工作年限: 2 年" in analysis.compact()
+
+
+def test_category_filter_keeps_unknown_categories():
+    analysis = parse_requirements("Java开发工程师", "3年以上Java开发经验，熟悉Spring")
+    assert "Java Developer" in analysis.category_hints
+    candidates = [{"id": i, "category": "Java Developer"} for i in range(3)]
+    candidates += [{"id": 10, "category": "HR"}, {"id": 11, "category": "Unknown"}, {"id": 12}]
+    kept = [c["id"] for c in apply_filters(candidates, analysis, keep_at_least=2)]
+    assert kept == [0, 1, 2, 11, 12]
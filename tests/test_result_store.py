@@ -0,0 +1,52 @@
+from app import result_store, service
+from app.result_store import ResultStore
+from config import AgentConfig
+
+
+def _ranking(n):
+    return [{"id": i} for i in range(n)]
+
+
+def test_next_cursor_pages_through_whole_ranking():
+    result_set = ResultStore().create("岗位", "要求", _ranking(25), page_size=10)
+    assert result_set.next_cursor(0, 10) == 10
+    assert result_set.next_cursor(10, 10) == 20
+    assert result_set.next_cursor(20, 10) is None
+
+
+def test_sets_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_store.time, "monotonic", lambda: now[0])
+    store = ResultStore(ttl_s=60)
+    result_set = store.create("岗位", "要求", _ranking(5), page_size=5)
+    now[0] += 30
+    assert store.get(result_set.id) is result_set  # 访问刷新过期时间
+    now[0] += 59
+    assert store.get(result_set.id) is result_set
+    now[0] += 61
+    assert store.get(result_set.id) is None
+    assert store.metrics()["expired"] == 1
+
+
+def test_least_recently_used_set_is_evicted():
+    store = ResultStore(max_sets=2)
+    first = store.create("a", "", _ranking(1), 1)
+    second = store.create("b", "", _ranking(1), 1)
+    store.get(first.id)
+    store.create("c", "", _ranking(1), 1)
+    assert store.get(second.id) is None
+    assert store.get(first.id) is first
+    assert store.metrics()["evicted"] == 1
+
+
+def test_result_set_keeps_whole_retrieval_pool(monkeypatch):
+    class StubRAG:
+        top_n = 20
+
+        def search(self, query, top_k=5):
+            pool = _ranking(35)  # 混合检索的召回池可超过 top_n
+            return pool if top_k is None else pool[:top_k]
+
+    monkeypatch.setattr(service, "rag_system", StubRAG())
+    cfg = AgentConfig(api_key="", parse_requirements=False, admission_control=False)
+    assert len(service._retrieve("岗位", "要求", 10, cfg)) == 35
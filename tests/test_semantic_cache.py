@@ -0,0 +1,46 @@
+from app.semantic_cache import SemanticScoreCache, score_with_cache
+
+
+class _CountingRAG:
+    """记录送给大模型评分的候选人"""
+
+    def __init__(self):
+        self.scored = []
+
+    def score_retrieved(self, requirements, candidates, max_input_tokens=None):
+        self.scored += [c["id"] for c in candidates]
+        return [{"candidate_info": c, "overall_score": 80} for c in candidates]
+
+
+def _run(cache, rag, requirements):
+    candidates = [{"id": i} for i in range(3)]
+    return score_with_cache(cache, rag, "Java开发工程师", requirements, candidates, max_input_tokens=4000)
+
+
+def _cache():
+    # 常数嵌入：模拟对年限数字和单个技能词不敏感的嵌入模型，任意两段要求的相似度都是 1
+    return SemanticScoreCache(lambda text: [1.0, 0.0], threshold=0.95)
+
+
+def test_reordered_requirements_hit():
+    cache, rag = _cache(), _CountingRAG()
+    _run(cache, rag, "熟悉Java\n3年以上Java开发经验")
+    _run(cache, rag, "3年以上Java开发经验\n熟悉Java")
+    assert rag.scored == [0, 1, 2]
+    assert cache.metrics()["hits"] == 1
+
+
+def test_different_years_do_not_hit():
+    cache, rag = _cache(), _CountingRAG()
+    _run(cache, rag, "熟悉Java、Spring\n3年以上Java开发经验")
+    _run(cache, rag, "熟悉Java、Spring\n5年以上Java开发经验")
+    assert rag.scored == [0, 1, 2, 0, 1, 2]
+    assert cache.metrics()["hits"] == 0
+
+
+def test_different_skill_does_not_hit():
+    cache, rag = _cache(), _CountingRAG()
+    _run(cache, rag, "熟悉Java、Spring\n3年以上Java开发经验")
+    _run(cache, rag, "熟悉Java、Kafka\n3年以上Java开发经验")
+    assert rag.scored == [0, 1, 2, 0, 1, 2]
+    assert cache.metrics()["hits"] == 0
@@ -0,0 +1,48 @@
+import socket
+import time
+
+import pytest
+
+from rag_system.sharding import ShardClient, merge_scored
+
+
+def _hit(id_, vector_distance=None, bm25_score=None):
+    return {"id": id_, "vector_distance": vector_distance, "bm25_score": bm25_score}
+
+
+def test_merge_scored_orders_by_score_across_shards():
+    # 分片 A 的第二名比分片 B 的第一名分数更高，按名次轮流合并会把 B1 排在 A2 前面
+    shard_a = [_hit("a1", 0.1, 9.0), _hit("a2", 0.2, 8.0)]
+    shard_b = [_hit("b1", 0.9, 1.0), _hit("b2", 1.0, 0.5)]
+    merged = merge_scored([shard_a, shard_b], pool_size=4)
+    assert [r["id"] for r in merged] == ["a1", "a2", "b1", "b2"]
+    assert merged[0]["retrieval_score"] == 1.0
+    assert "vector_distance" not in merged[0] and "bm25_score" not in merged[0]
+
+
+def test_merge_scored_matches_weighted_rrf_on_global_ranks():
+    # 只有向量命中的 v 与只有 BM25 命中的 b：向量权重更高时 v 在前，反之 b 在前
+    shards = [[_hit("v", vector_distance=0.5)], [_hit("b", bm25_score=3.0)]]
+    assert [r["id"] for r in merge_scored(shards, 2, weights=(0.6, 0.4))] == ["v", "b"]
+    shards = [[_hit("v", vector_distance=0.5)], [_hit("b", bm25_score=3.0)]]
+    assert [r["id"] for r in merge_scored(shards, 2, weights=(0.4, 0.6))] == ["b", "v"]
+
+
+def test_merge_scored_keeps_only_global_top_k_per_retriever():
+    shards = [[_hit("a", 0.1), _hit("c", 0.3)], [_hit("b", 0.2), _hit("d", 0.4)]]
+    assert [r["id"] for r in merge_scored(shards, 2)] == ["a", "b"]
+
+
+def test_shard_client_connect_times_out():
+    # 端口在监听但从不完成认证握手，模拟卡死的分片
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    try:
+        client = ShardClient(f"127.0.0.1:{server.getsockname()[1]}", b"secret", timeout_s=0.2)
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            client.call("info")
+        assert time.monotonic() - start < 2
+    finally:
+        server.close()
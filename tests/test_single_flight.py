@@ -0,0 +1,62 @@
+import threading
+import time
+
+from app import service
+from app.admission import request_priority
+from app.service import _SingleFlight
+
+
+def _slow(calls, delay=0.2):
+    def fn():
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        return {"results": [len(calls)]}
+    return fn
+
+
+def _run_concurrently(targets):
+    threads = [threading.Thread(target=t) for t in targets]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)  # 保证第一个线程先成为执行方
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_calls_are_coalesced():
+    flights, calls, results = _SingleFlight(), [], []
+    fn = _slow(calls)
+    _run_concurrently([lambda: results.append(flights.do("k", fn))] * 4)
+    assert len(calls) == 1
+    assert results == [{"results": [1]}] * 4
+    assert flights.metrics()["coalesced"] == 3
+    assert flights.metrics()["waiting"] == 0
+
+
+def test_waiters_beyond_cap_execute_themselves():
+    flights, calls = _SingleFlight(), []
+    fn = _slow(calls)
+    _run_concurrently([lambda: flights.do("k", fn, max_waiters=1)] * 4)
+    # 1 个执行方 + 1 个等待者，另外 2 个超出上限自己执行
+    assert len(calls) == 3
+    assert flights.metrics()["overflow"] == 2
+
+
+def test_priorities_are_not_coalesced(monkeypatch):
+    calls = []
+    monkeypatch.setattr(service, "_score_result_set",
+                        lambda job_title, requirements, top_n, cfg, scoring_mode: _slow(calls)())
+
+    class _Cfg:
+        scoring_mode = "local"
+        coalesce_requests = True
+        coalesce_max_waiters = 64
+
+    def call(priority):
+        def run():
+            with request_priority(priority):
+                service.score_result_set("Java开发", "Spring", 3, _Cfg())
+        return run
+
+    _run_concurrently([call("batch"), call("interactive"), call("batch"), call("interactive")])
+    assert len(calls) == 2
@@ -0,0 +1,25 @@
+from rag_system.token_budget import CANDIDATE_OVERHEAD_TOKENS, budget_candidate_texts, count_tokens
+
+
+def _candidates(n):
+    return [{"content": f"候选人{i} Python Java Kafka 项目经验 " * 200, "rerank_score": float(n - i)} for i in range(n)]
+
+
+def test_budget_is_not_exceeded_when_floor_does_not_fit():
+    fixed = "岗位要求：Java开发工程师，3年以上经验"
+    candidates = _candidates(20)
+    max_input_tokens = count_tokens(fixed) + 20 * CANDIDATE_OVERHEAD_TOKENS + 300  # 每人只剩 15 tokens
+    texts = budget_candidate_texts(fixed, candidates, max_input_tokens)
+    assert len(texts) == len(candidates)
+    assert sum(count_tokens(t) for t in texts) <= 300
+
+
+def test_budget_is_not_exceeded_with_skewed_relevance():
+    fixed = "岗位要求：Java开发工程师"
+    candidates = _candidates(5)
+    candidates[0]["rerank_score"] = 100.0
+    max_input_tokens = count_tokens(fixed) + 5 * CANDIDATE_OVERHEAD_TOKENS + 1000
+    texts = budget_candidate_texts(fixed, candidates, max_input_tokens)
+    tokens = [count_tokens(t) for t in texts]
+    assert sum(tokens) <= 1000
+    assert tokens[0] == max(tokens)